@@ -7,6 +7,11 @@ import adsk.core, adsk.fusion, adsk.cam, traceback
 import json, tempfile
 from urllib.parse import unquote
 import os
+import copy
+import math
+import re
+import time
+import xml.etree.ElementTree as ET
 
 #############################################################################
 # global constants
@@ -28,12 +33,45 @@ _VALUE_INPUT_ID_HEIGHT_PROFILE = 'heightProfileValueInputId'
 _BOOL_INPUT_ID_APPLY_PROFILE_SIZE = 'applyProfileSizeBoolValueInputId'
 
 _SELECTION_INPUT_ID_TARGET = 'targetSelectionInputId'
+
+_BOOL_INPUT_ID_PARTITION_SKETCHES = 'partitionSketchesBoolValueInputId'
+_INTEGER_INPUT_ID_MAX_CELLS_PER_SKETCH = 'maxCellsPerSketchIntegerSpinnerInputId'
 _DROPDOWN_INPUT_ID_CONSTRUCTION_PLANE = 'constructionPlaneDropDownInputId'
 
 _CONSTRUCTION_PLANE_XY = "XY Plane"
 _CONSTRUCTION_PLANE_XZ = "XZ Plane"
 _CONSTRUCTION_PLANE_YZ = "YZ Plane"
 
+_DROPDOWN_INPUT_ID_EXTRUDE_OPERATION = 'extrudeOperationDropDownInputId'
+_VALUE_INPUT_ID_EXTRUDE_DISTANCE = 'extrudeDistanceValueInputId'
+
+_EXTRUDE_OPERATION_NONE = "None"
+_EXTRUDE_OPERATION_CUT = "Cut"
+_EXTRUDE_OPERATION_JOIN = "Join"
+_EXTRUDE_OPERATION_NEW_BODY = "New Body"
+
+# Publishing imports the cells in chunks of this many cells.  Each chunk is one
+# unit of work run from the custom event so Fusion stays responsive in between.
+_PUBLISH_CUSTOM_EVENT_ID = 'VoronoiPublishChunkEventId'
+_PUBLISH_CELLS_PER_CHUNK = 250
+
+# Default for the most cells published into a sketch when splitting the cells
+# into several sketches.  Fusion's profile computation for a sketch grows
+# quickly with the number of closed loops in it.
+_DEFAULT_MAX_CELLS_PER_SKETCH = 500
+
+# Curved (non-planar) faces are generated in the face's parameter (UV) space.
+# The area correction is sampled on a grid of this many cells per side.
+_SURFACE_DENSITY_GRID_SIZE = 24
+
+# Longest step (cm) along a curved edge when sampling a face boundary
+_SURFACE_BOUNDARY_STEP = 0.2
+
+_SVG_NAMESPACE = 'http://www.w3.org/2000/svg'
+_SVG_NUMBER_PATTERN = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+_SVG_MAX_SYMBOL_DEPTH = 8   # Symbols referencing symbols (shapes in a tile) are expanded this deep
+_XLINK_NAMESPACE = 'http://www.w3.org/1999/xlink'
+
 #############################################################################
 # Global variables
 
@@ -48,6 +86,12 @@ _constructionPlane = _CONSTRUCTION_PLANE_XY
 
 _units = 'cm'   # user specified units
 
+_partitionSketches = False  # Split the cells into several sketches by position
+
+_extrudeOperation = _EXTRUDE_OPERATION_NONE     # Extrude the cells once published
+_extrudeDistance = 0.2      # centimeters
+_maxCellsPerSketch = _DEFAULT_MAX_CELLS_PER_SKETCH
+
 _widthVoronoi = 0      # dimensions to use for voronoi.  Should be in centimeters.
 _heightVoronoi = 0
 
@@ -60,6 +104,15 @@ _selectedSketch = None  # direct reference to selected sketch entity
 # sketch - on that face, with the face outline as its profile - at publish time.
 _selectedFace = None
 
+# When a curved (non-planar) face is selected the diagram is generated in the
+# face's parameter space.  _surfaceMapping holds the UV range and the scale
+# factors used to map parameters to/from the editor's cm space along with the
+# area correcting density grid.  _surfaceCells is set to the published cell
+# polylines (editor cm space) until they're created in a sketch.
+_surfaceFace = None
+_surfaceMapping = None
+_surfaceCells = None
+
 # Set to the points that roughly define the selected profile
 _profilePoints = []
 _profileSketchName = ''
@@ -70,6 +123,22 @@ _profileHeight = 0
 
 _svgFilePath = ''
 
+_publisher = None       # The ChunkedSVGPublisher (or a subclass) for the publish in progress
+
+_dxfFile = None         # The temporary DXF file the editor's DXF text is streamed into
+_dxfFilePath = ''
+
+_arcLoops = None        # Cells sent from the editor as loops of arcs and lines
+_arcStats = {}          # Counts and timing of the arc fitting sent with the loops
+
+# The palette is created (hidden) when the add-in starts so it's ready by the
+# time the command runs.  _paletteStarted is set once its page has loaded and
+# sent the started event.  Until then, a request to initialize the editor is
+# remembered in _paletteInitPending and sent in response to that event.
+_paletteStarted = False
+_paletteInitPending = False
+_timePaletteShown = 0   # perf_counter() when the command last showed the palette
+
 # Command Inputs
 _targetSelectionInput = adsk.core.SelectionCommandInput.cast(None)
 _constructionPlaneDropDownInput = adsk.core.DropDownCommandInput.cast(None)
@@ -78,13 +147,17 @@ _heightValueCommandInput = adsk.core.ValueCommandInput.cast(None)
 _widthProfileStringValueCommandInput = adsk.core.StringValueCommandInput.cast(None)
 _heightProfileStringValueCommandInput = adsk.core.StringValueCommandInput.cast(None)
 _applyProfileSizeBoolValueInput = adsk.core.BoolValueCommandInput.cast(None)
+_partitionSketchesBoolValueInput = adsk.core.BoolValueCommandInput.cast(None)
+_maxCellsPerSketchSpinnerInput = adsk.core.IntegerSpinnerCommandInput.cast(None)
+_extrudeOperationDropDownInput = adsk.core.DropDownCommandInput.cast(None)
+_extrudeDistanceValueCommandInput = adsk.core.ValueCommandInput.cast(None)
 
 #############################################################################
 
 # Reset some of the variables before dialog appears
 def resetState():
     global _profilePoints, _profileSketchName, _profileSketch, _profileOrigin, _profileWidth, _profileHeight, _selectedSketchName, _selectedSketch, _svgFilePath
-    global _selectedFace
+    global _selectedFace, _surfaceFace, _surfaceMapping, _surfaceCells, _dxfFile, _dxfFilePath, _arcLoops, _arcStats
     _profilePoints = []
     _profileSketchName = ''
     _profileSketch = None
@@ -95,6 +168,15 @@ def resetState():
     _selectedSketch = None
     _svgFilePath = ''
     _selectedFace = None
+    _surfaceFace = None
+    _surfaceMapping = None
+    _surfaceCells = None
+    if _dxfFile is not None:
+        _dxfFile.close()
+        _dxfFile = None
+    _dxfFilePath = ''
+    _arcLoops = None
+    _arcStats = {}
 
 
 # Get the selected sketch name; otherwise an empty string
@@ -214,8 +296,9 @@ def sortProfileCurves(profileCurves):
     return sortedProfileCurves
 
 
-# Sample the points of a single 3D curve (an edge's geometry), stepping ~2mm
-# along non-linear curves.  Returns a list of Point3D in model space.
+# Sample the points of a single 3D curve (an edge's geometry), stepping at most
+# _SURFACE_BOUNDARY_STEP along non-linear curves.  All of a curve's points are
+# evaluated with one batch call.  Returns a list of Point3D in model space.
 def sampleCurve3DPoints(curve3D):
     pts = []
     if curve3D.objectType == adsk.core.Line3D.classType():
@@ -227,17 +310,11 @@ def sampleCurve3DPoints(curve3D):
         (retVal, startParam, endParam) = evaluator.getParameterExtents()
         (retVal, length) = evaluator.getLengthAtParameter(startParam, endParam)
 
-        num_steps = max(1, length / 0.2)   # step every 2mm
-        step = (endParam - startParam) / num_steps
+        numSteps = max(1, math.ceil(length / _SURFACE_BOUNDARY_STEP))
+        params = [startParam + (endParam - startParam) * i / numSteps for i in range(numSteps + 1)]
 
-        param = startParam
-        while param < endParam:
-            (result, pt) = evaluator.getPointAtParameter(param)
-            pts.append(pt)
-            param += step
-
-        (retVal, startPoint, endPoint) = evaluator.getEndPoints()
-        pts.append(endPoint)
+        (retVal, pts) = evaluator.getPointsAtParameters(params)
+        pts = list(pts) if retVal else []
     return pts
 
 
@@ -340,7 +417,7 @@ def getSelectedProfile():
     return profile, bbox, name
 
 
-# Get the selected planar face; otherwise None
+# Get the selected face (planar or curved); otherwise None
 def getSelectedFace():
     if _targetSelectionInput.selectionCount == 1:
         entity = _targetSelectionInput.selection(0).entity
@@ -375,12 +452,183 @@ def createSketchFromFace(face, projectOutline=True):
     return sketch, points
 
 
+# Returns True if the face lies on a plane.
+def isPlanarFace(face):
+    return face.geometry.surfaceType == adsk.core.SurfaceTypes.PlaneSurfaceType
+
+
+# Build the mapping between a curved face's parameter (UV) space and the editor's
+# cm space.  The first derivatives are evaluated on a grid in one batch call.  The
+# average lengths of the U and V partials give the scale to roughly preserve real
+# world proportions, and the normalized area of each grid cell (|Pu x Pv|) becomes
+# the density the editor uses to place more sites where the surface stretches.
+# Returns a dict or None if the face can't be evaluated.
+def getSurfaceMapping(face):
+    evaluator = face.evaluator
+    paramRange = evaluator.parametricRange()
+    uMin, vMin = paramRange.minPoint.x, paramRange.minPoint.y
+    uMax, vMax = paramRange.maxPoint.x, paramRange.maxPoint.y
+    if uMax <= uMin or vMax <= vMin:
+        return None
+
+    gridSize = _SURFACE_DENSITY_GRID_SIZE
+    params = []
+    for iRow in range(gridSize):
+        v = vMin + (iRow + 0.5) * (vMax - vMin) / gridSize
+        for iCol in range(gridSize):
+            u = uMin + (iCol + 0.5) * (uMax - uMin) / gridSize
+            params.append(adsk.core.Point2D.create(u, v))
+
+    (retVal, partialsU, partialsV) = evaluator.getFirstDerivatives(params)
+    if not retVal or len(partialsU) != len(params):
+        return None
+
+    uScale = sum(du.length for du in partialsU) / len(partialsU)
+    vScale = sum(dv.length for dv in partialsV) / len(partialsV)
+    if uScale <= 0 or vScale <= 0:
+        return None
+
+    areas = [du.crossProduct(dv).length for du, dv in zip(partialsU, partialsV)]
+    areaMax = max(areas)
+    density = [(area / areaMax if areaMax > 0 else 1.0) for area in areas]
+
+    return {
+        'uMin': uMin, 'vMin': vMin, 'uScale': uScale, 'vScale': vScale,
+        'width': (uMax - uMin) * uScale, 'height': (vMax - vMin) * vScale,
+        'cols': gridSize, 'rows': gridSize, 'density': density
+    }
+
+
+# Returns an array of arrays containing the points for each edge of the curved
+# face's outer loop, mapped into the editor's cm space through its parameter
+# space.  All of the sampled boundary points are mapped to parameters with one
+# batch call.  If the boundary is degenerate in parameter space (e.g. the seam
+# split loops of a full cylinder), the rectangle of the parametric range is
+# returned instead.
+def getSurfacePoints(face, mapping):
+    width, height = mapping['width'], mapping['height']
+    rangeCurves = [[adsk.core.Point2D.create(0, 0), adsk.core.Point2D.create(width, 0)],
+                   [adsk.core.Point2D.create(width, 0), adsk.core.Point2D.create(width, height)],
+                   [adsk.core.Point2D.create(width, height), adsk.core.Point2D.create(0, height)],
+                   [adsk.core.Point2D.create(0, height), adsk.core.Point2D.create(0, 0)]]
+
+    outerLoop = None
+    for iLoop in range(face.loops.count):
+        if face.loops.item(iLoop).isOuter:
+            outerLoop = face.loops.item(iLoop)
+            break
+
+    if outerLoop is None:
+        return rangeCurves
+
+    edgeCurves = []
+    edges = outerLoop.edges
+    for iEdge in range(edges.count):
+        edgeCurves.append(sampleCurve3DPoints(edges.item(iEdge).geometry))
+    edgeCurves = sortProfileCurves(edgeCurves)
+
+    modelPts = [pt for curve in edgeCurves for pt in curve]
+    (retVal, params) = face.evaluator.getParametersAtPoints(modelPts)
+    if not retVal or len(params) != len(modelPts):
+        return rangeCurves
+
+    uvPts = [adsk.core.Point2D.create((uv.x - mapping['uMin']) * mapping['uScale'],
+                                      (uv.y - mapping['vMin']) * mapping['vScale']) for uv in params]
+
+    # Shoelace area of the mapped boundary
+    area = 0
+    for iPt in range(len(uvPts)):
+        ptA, ptB = uvPts[iPt], uvPts[(iPt + 1) % len(uvPts)]
+        area += ptA.x * ptB.y - ptB.x * ptA.y
+    if abs(area) / 2 < 0.01 * width * height:
+        return rangeCurves
+
+    surfaceCurves = []
+    iPt = 0
+    for curve in edgeCurves:
+        surfaceCurves.append(uvPts[iPt:iPt + len(curve)])
+        iPt += len(curve)
+    return surfaceCurves
+
+
+# Add the published cells wrapped onto the curved face to the sketch, which is on
+# the root XY construction plane so sketch space is model space.  Each cell is a
+# closed loop of edges in the editor's cm space, split at its corners (see
+# generateSurfaceCells() in the editor).  Every point is mapped back to the
+# face's parameters and evaluated to model space with a single batch call.  Each
+# edge then becomes a fitted spline (or a line if it's only its two ends) and the
+# edges of a cell share their end points, so the corners stay sharp.  A cell
+# without corners is one closed spline.  Returns False if the face couldn't be
+# evaluated.
+def addSurfaceCells(sketch, face, mapping, cells):
+    params = []
+    for cell in cells:
+        for edge in cell:
+            for iCoord in range(0, len(edge) - 1, 2):
+                u = float(edge[iCoord]) / mapping['uScale'] + mapping['uMin']
+                v = float(edge[iCoord + 1]) / mapping['vScale'] + mapping['vMin']
+                params.append(adsk.core.Point2D.create(u, v))
+
+    if not params:
+        return True
+
+    (retVal, modelPts) = face.evaluator.getPointsAtParameters(params)
+    if not retVal or len(modelPts) != len(params):
+        return False
+
+    splines = sketch.sketchCurves.sketchFittedSplines
+    sketchLines = sketch.sketchCurves.sketchLines
+
+    def addSpline(points):
+        fitPoints = adsk.core.ObjectCollection.create()
+        for pt in points:
+            fitPoints.add(pt)
+        return splines.add(fitPoints)
+
+    iPt = 0
+    for cell in cells:
+        edges = []
+        for edge in cell:
+            edges.append(modelPts[iPt:iPt + len(edge) // 2])
+            iPt += len(edge) // 2
+
+        if len(edges) == 1:
+            # No corners.  The last point is the first one again.
+            if len(edges[0]) >= 4:
+                spline = addSpline(edges[0][:-1])
+                spline.isClosed = True
+            continue
+
+        firstPoint = None   # SketchPoint the cell starts from
+        lastPoint = None    # SketchPoint the last edge ended at
+        for iEdge, points in enumerate(edges):
+            if len(points) < 2:
+                continue
+            points = list(points)
+            if lastPoint is not None:
+                points[0] = lastPoint
+            if iEdge == len(edges) - 1 and firstPoint is not None:
+                points[-1] = firstPoint
+
+            if len(points) == 2:
+                curve = sketchLines.addByTwoPoints(points[0], points[1])
+            else:
+                curve = addSpline(points)
+
+            if firstPoint is None:
+                firstPoint = curve.startSketchPoint
+            lastPoint = curve.endSketchPoint
+
+    return True
+
+
 # HACK: the insert from SVG fixes the curves.  Use this to unfix so that
-# they move when their associated points are moved.
-def setFixedSketchPoints(sketchCurves, flag):
-    for iCurve in range(sketchCurves.count):
+# they move when their associated points are moved.  Only the given curves
+# (i.e. those added by the last import) are changed.
+def setFixedSketchPoints(curves, flag):
+    for curve in curves:
         try:
-            sketchCurves.item(iCurve).isFixed = flag
+            curve.isFixed = flag
         except Exception:
             # Some curves (e.g. projected reference geometry from a selected
             # face) may not allow their fixed state to change.  Skip them so
@@ -388,18 +636,818 @@ def setFixedSketchPoints(sketchCurves, flag):
             pass
 
 
+# Return the namespace qualified tag for an SVG element name.
+def svgTag(name):
+    return '{' + _SVG_NAMESPACE + '}' + name
+
+
+# Parse a numeric SVG attribute, returning the default if missing or invalid.
+def svgFloatAttribute(element, name, default=0.0):
+    try:
+        return float(element.get(name, default))
+    except ValueError:
+        return default
+
+
+# The editor exports the shape cell styles (Circle, Star, etc) as one shared
+# <symbol> plus a <use> reference per cell.  Sketch.importSVG doesn't resolve
+# those references so expand each <use> into a <g> holding a copy of the symbol
+# geometry with the <use> placement applied as a transform.  The geometry stays
+# shared until this point and the transform replaces any per-cell math.
+# Returns the SVG unchanged if it contains no references.
+def expandSVGSymbolReferences(svgStr):
+    if '<use' not in svgStr:
+        return svgStr
+
+    ET.register_namespace('', _SVG_NAMESPACE)
+    ET.register_namespace('xlink', _XLINK_NAMESPACE)
+
+    root = ET.fromstring(svgStr)
+
+    # Collect the symbol definitions by id
+    symbols = {}
+    for symbol in root.iter(svgTag('symbol')):
+        if symbol.get('id'):
+            symbols[symbol.get('id')] = symbol
+
+    # Symbols can hold references themselves (e.g. a tile of shapes) so
+    # repeat until none are left.
+    for iPass in range(_SVG_MAX_SYMBOL_DEPTH):
+        if not expandSVGUseElements(root, symbols):
+            break
+
+    # The definitions are no longer referenced
+    for parent in list(root.iter()):
+        for child in list(parent):
+            if child.tag == svgTag('defs') or child.tag == svgTag('symbol'):
+                parent.remove(child)
+
+    return ET.tostring(root, encoding='unicode')
+
+
+# Replace each <use> element under root with a group holding a copy of the
+# referenced symbol's content.  Returns True if any were found.
+def expandSVGUseElements(root, symbols):
+    hrefKeys = ('{' + _XLINK_NAMESPACE + '}href', 'href')
+
+    # Rebuild the children of each element holding references in one pass so
+    # large diagrams don't pay for repeated list searches.
+    found = False
+    for parent in list(root.iter()):
+        children = list(parent)
+        if not any(child.tag == svgTag('use') for child in children):
+            continue
+
+        expanded = []
+        for child in children:
+            if child.tag != svgTag('use'):
+                expanded.append(child)
+                continue
+
+            found = True
+
+            href = next((child.get(key) for key in hrefKeys if child.get(key)), '')
+            symbol = symbols.get(href.lstrip('#'))
+            if symbol is None:
+                continue
+
+            # <use x y width height> on a <symbol viewBox> maps the view box onto
+            # the rectangle at x,y then applies the <use> transform.
+            viewBox = [float(v) for v in symbol.get('viewBox', '0 0 0 0').replace(',', ' ').split()]
+            if len(viewBox) != 4:
+                viewBox = [0.0, 0.0, 0.0, 0.0]
+            width = svgFloatAttribute(child, 'width', viewBox[2])
+            height = svgFloatAttribute(child, 'height', viewBox[3])
+            scaleX = width / viewBox[2] if viewBox[2] else 1.0
+            scaleY = height / viewBox[3] if viewBox[3] else 1.0
+
+            transform = child.get('transform', '')
+            transform += ' translate({0},{1})'.format(svgFloatAttribute(child, 'x'), svgFloatAttribute(child, 'y'))
+            if scaleX != 1.0 or scaleY != 1.0:
+                transform += ' scale({0},{1})'.format(scaleX, scaleY)
+            transform += ' translate({0},{1})'.format(-viewBox[0], -viewBox[1])
+
+            group = ET.Element(svgTag('g'), {'transform': transform.strip()})
+            for attrName, attrValue in child.attrib.items():
+                if attrName not in ('x', 'y', 'width', 'height', 'transform', 'overflow') and attrName not in hrefKeys:
+                    group.set(attrName, attrValue)
+            for symbolChild in symbol:
+                group.append(copy.deepcopy(symbolChild))
+
+            # A tile holds many cells.  Put them in place of the group so
+            # they're siblings of the other cells when split into chunks.
+            flattened = flattenSVGGroup(group)
+            if len(flattened) > 1:
+                for element, elementTransform in flattened:
+                    if elementTransform:
+                        element.set('transform', elementTransform)
+                    expanded.append(element)
+            else:
+                expanded.append(group)
+
+        parent[:] = expanded
+
+    return found
+
+
+# Returns the elements to put in place of a group that carries nothing but a
+# transform: its children (and theirs for nested plain groups), each paired
+# with the transform it needs to keep its place.  Any other group is returned
+# as is.  Nothing is changed until the caller applies the transforms.
+def flattenSVGGroup(group, transform=''):
+    transform = (transform + ' ' + group.get('transform', '')).strip()
+    if set(group.attrib) - {'transform'}:
+        return [(group, transform)]
+
+    flattened = []
+    for child in group:
+        if child.tag == svgTag('g'):
+            flattened.extend(flattenSVGGroup(child, transform))
+        else:
+            flattened.append((child, (transform + ' ' + child.get('transform', '')).strip()))
+    return flattened
+
+
+# Split an SVG into several SVGs, each containing a slice of the cells.  The cells
+# are the children of the element with the most children (the Voronoi layer).
+# Everything else, including the root attributes that importSVG uses to place
+# the geometry, is kept the same in each chunk so they line up once imported.
+def splitSVGIntoChunks(svgStr, cellsPerChunk):
+    ET.register_namespace('', _SVG_NAMESPACE)
+    ET.register_namespace('xlink', _XLINK_NAMESPACE)
+
+    root = ET.fromstring(svgStr)
+
+    container = max(root.iter(), key=len)
+    cells = list(container)
+    if len(cells) <= cellsPerChunk:
+        return [svgStr]
+
+    chunks = []
+    for iCell in range(0, len(cells), cellsPerChunk):
+        container[:] = cells[iCell:iCell + cellsPerChunk]
+        chunks.append(ET.tostring(root, encoding='unicode'))
+    container[:] = cells
+
+    return chunks
+
+
+# Multiply two SVG transform matrices (a, b, c, d, e, f).  The result applies m2
+# then m1.
+def multiplySVGMatrices(m1, m2):
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (a1*a2 + c1*b2, b1*a2 + d1*b2,
+            a1*c2 + c1*d2, b1*c2 + d1*d2,
+            a1*e2 + c1*f2 + e1, b1*e2 + d1*f2 + f1)
+
+
+# Parse an SVG transform attribute into a matrix (a, b, c, d, e, f)
+def svgTransformMatrix(transform):
+    matrix = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+    for name, args in re.findall(r'([a-zA-Z]+)\s*\(([^)]*)\)', transform or ''):
+        values = [float(v) for v in _SVG_NUMBER_PATTERN.findall(args)]
+        if not values:
+            continue
+
+        if name == 'matrix' and len(values) == 6:
+            m = tuple(values)
+        elif name == 'translate':
+            m = (1.0, 0.0, 0.0, 1.0, values[0], values[1] if len(values) > 1 else 0.0)
+        elif name == 'scale':
+            m = (values[0], 0.0, 0.0, values[1] if len(values) > 1 else values[0], 0.0, 0.0)
+        elif name == 'rotate':
+            angle = math.radians(values[0])
+            m = (math.cos(angle), math.sin(angle), -math.sin(angle), math.cos(angle), 0.0, 0.0)
+            if len(values) == 3:
+                m = multiplySVGMatrices((1.0, 0.0, 0.0, 1.0, values[1], values[2]),
+                                        multiplySVGMatrices(m, (1.0, 0.0, 0.0, 1.0, -values[1], -values[2])))
+        else:
+            continue
+
+        matrix = multiplySVGMatrices(matrix, m)
+    return matrix
+
+
+# Position of an SVG element in its parent's coordinates: the first point of its
+# (first) geometry.  Returns None if it has no geometry.
+def svgElementAnchor(element):
+    matrix = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+    while element is not None:
+        matrix = multiplySVGMatrices(matrix, svgTransformMatrix(element.get('transform')))
+
+        point = None
+        if element.tag == svgTag('path'):
+            values = _SVG_NUMBER_PATTERN.findall(element.get('d', ''))
+            if len(values) >= 2:
+                point = (float(values[0]), float(values[1]))
+        elif element.tag in (svgTag('polygon'), svgTag('polyline')):
+            values = _SVG_NUMBER_PATTERN.findall(element.get('points', ''))
+            if len(values) >= 2:
+                point = (float(values[0]), float(values[1]))
+        elif element.tag in (svgTag('circle'), svgTag('ellipse')):
+            point = (svgFloatAttribute(element, 'cx'), svgFloatAttribute(element, 'cy'))
+        elif element.tag == svgTag('rect'):
+            point = (svgFloatAttribute(element, 'x'), svgFloatAttribute(element, 'y'))
+
+        if point is not None:
+            a, b, c, d, e, f = matrix
+            return (a*point[0] + c*point[1] + e, b*point[0] + d*point[1] + f)
+
+        element = element[0] if len(element) > 0 else None
+
+    return None
+
+
+# Split the cells of an SVG into spatial buckets of at most maxCells cells (see
+# partitionByPosition) and return an SVG for each.  Like splitSVGIntoChunks,
+# everything but the cells is kept the same in each so they line up once imported.
+def partitionSVGCells(svgStr, maxCells):
+    ET.register_namespace('', _SVG_NAMESPACE)
+    ET.register_namespace('xlink', _XLINK_NAMESPACE)
+
+    root = ET.fromstring(svgStr)
+
+    container = max(root.iter(), key=len)
+    cells = list(container)
+    countCells = len(cells)
+    if countCells <= maxCells:
+        return [svgStr]
+
+    anchors = [svgElementAnchor(cell) or (0.0, 0.0) for cell in cells]
+
+    svgs = []
+    for bucket in partitionByPosition(anchors, maxCells):
+        container[:] = [cells[i] for i in bucket]
+        svgs.append(ET.tostring(root, encoding='unicode'))
+    container[:] = cells
+
+    return svgs
+
+
+# Split a list of cells (arc loops or curved face cells) into chunks of
+# cellsPerChunk cells.  There's always at least one chunk.
+def splitCellsIntoChunks(cells, cellsPerChunk):
+    return [cells[i:i + cellsPerChunk] for i in range(0, len(cells), cellsPerChunk)] or [[]]
+
+
+# Split the loops of arcs and lines (see addArcLoops) into spatial buckets of at
+# most maxCells loops the same way as partitionSVGCells.
+def partitionArcLoops(loops, maxCells):
+    if len(loops) <= maxCells:
+        return [loops]
+    return [[loops[i] for i in bucket] for bucket in partitionByPosition([loop['start'] for loop in loops], maxCells)]
+
+
+# Split the curved face cells (see addSurfaceCells) into spatial buckets of at
+# most maxCells cells the same way as partitionSVGCells.
+def partitionSurfaceCells(cells, maxCells):
+    if len(cells) <= maxCells:
+        return [cells]
+    return [[cells[i] for i in bucket] for bucket in partitionByPosition([cell[0][0:2] for cell in cells], maxCells)]
+
+
+# Group the indices of the anchors (x,y) into spatial buckets of at most maxCells
+# each.  The anchors are sorted into columns with the same number of anchors
+# each, then each column into rows the same way, so the buckets are balanced and
+# compact (a kd-style grid).  The indices of each bucket are in their original
+# order.
+def partitionByPosition(anchors, maxCells):
+    countCells = len(anchors)
+    width = max(a[0] for a in anchors) - min(a[0] for a in anchors)
+    height = max(a[1] for a in anchors) - min(a[1] for a in anchors)
+    aspect = (width / height) if height > 0 else 1.0
+
+    # Grid of cols x rows buckets, roughly matching the diagram's aspect
+    countBuckets = int(math.ceil(countCells / maxCells))
+    cols = max(1, min(countBuckets, int(round(math.sqrt(countBuckets * aspect)))))
+    rows = int(math.ceil(countBuckets / cols))
+
+    buckets = []
+    byX = sorted(range(countCells), key=lambda i: anchors[i][0])
+    cellsPerCol = int(math.ceil(countCells / cols))
+    for iCol in range(0, countCells, cellsPerCol):
+        column = sorted(byX[iCol:iCol + cellsPerCol], key=lambda i: anchors[i][1])
+        cellsPerRow = int(math.ceil(len(column) / rows))
+        for iRow in range(0, len(column), cellsPerRow):
+            buckets.append(sorted(column[iRow:iRow + cellsPerRow]))
+    return buckets
+
+
+# Get the curves of the sketch that aren't in knownTokens (entity tokens), given
+# that there are countNew of them.  An import isn't guaranteed to append its
+# curves so they're found by token.  They usually are at the end though, so the
+# search starts there and stops once they've all been found.
+def newSketchCurves(sketchCurves, knownTokens, countNew):
+    curves = []
+    for iCurve in range(sketchCurves.count - 1, -1, -1):
+        if len(curves) >= countNew:
+            break
+        curve = sketchCurves.item(iCurve)
+        if curve.entityToken not in knownTokens:
+            curves.append(curve)
+    curves.reverse()
+    return curves
+
+
+# One sketch's worth of a publish: the chunks (SVGs, or lists of arc loops for
+# ChunkedArcPublisher) to import into the sketch.  If sketch is None one is
+# created (see ChunkedSVGPublisher) when the part starts.
+class PublishPart:
+    def __init__(self, chunks, sketch=None, isNewSketch=True):
+        self.chunks = chunks
+        self.sketch = sketch
+        self.isNewSketch = isNewSketch
+        self.knownTokens = set()    # Entity tokens of the sketch's curves, before and during the publish
+        self.curveTokens = set()    # Entity tokens of the curves imported into the sketch
+        self.timeStart = 0
+
+
+# Imports the SVG chunks of each part into its sketch one unit of work at a time
+# so Fusion isn't frozen while a large diagram is published.  Each call to step()
+# imports one chunk (under isComputeDeferred) with importChunk() and unfixes its
+# curves.  The steps are driven by firing the custom event with the given id
+# until step() returns False.  The app and ui are passed in (rather than using
+# the globals) so the publisher can be driven by a fake event loop.
+#
+# Parts are published one after the other.  A part without a sketch gets one from
+# createSketch(partIndex) when it starts, and a part's sketch is computed as soon
+# as its last chunk is in, so no sketch ever holds more than its part's cells.
+#
+# A progress dialog is shown while publishing.  If it's cancelled (or an import
+# fails) everything added is rolled back: sketches created for the publish are
+# deleted, otherwise the curves added to the existing sketch are deleted.  Once
+# everything is imported onFinished(publisher) is called, if given.
+class ChunkedSVGPublisher:
+    def __init__(self, app, ui, eventId, parts, xPos, yPos, createSketch=None, onFinished=None):
+        self.app = app
+        self.ui = ui
+        self.eventId = eventId
+        self.parts = parts
+        self.xPos = xPos
+        self.yPos = yPos
+        self.createSketch = createSketch
+        self.onFinished = onFinished
+        self.partIndex = 0
+        self.chunkIndex = 0     # Chunk of the current part
+        self.chunkTimes = []
+        self.countChunks = sum(len(part.chunks) for part in parts)
+        self.progressDialog = None
+        self.isFinished = False
+        self.wasCancelled = False
+        self.timeStart = 0
+
+    # Show the progress and queue up the first chunk
+    def start(self):
+        self.timeStart = time.perf_counter()
+
+        self.progressDialog = self.ui.createProgressDialog()
+        self.progressDialog.isCancelButtonShown = True
+        self.progressDialog.show('Publishing Voronoi', 'Importing chunk %v of %m', 0, self.countChunks)
+
+        self.app.fireCustomEvent(self.eventId)
+
+    # Import the next chunk.  Returns True if there are more chunks to import.
+    def step(self):
+        if self.isFinished:
+            return False
+
+        if self.progressDialog is not None and self.progressDialog.wasCancelled:
+            self.rollback()
+            return False
+
+        part = self.parts[self.partIndex]
+        if self.chunkIndex == 0:
+            part.timeStart = time.perf_counter()
+            if part.sketch is None:
+                part.sketch = self.createSketch(self.partIndex)
+                part.isNewSketch = True
+            sketchCurves = part.sketch.sketchCurves
+            part.knownTokens = set(sketchCurves.item(iCurve).entityToken for iCurve in range(sketchCurves.count))
+
+        timeChunk = time.perf_counter()
+
+        part.sketch.isComputeDeferred = True   # Help to speed up import
+        curveCount = part.sketch.sketchCurves.count
+
+        retValue = False
+        try:
+            retValue = self.importChunk(part.sketch, part.chunks[self.chunkIndex])
+        finally:
+            # Track the new curves even if the import failed part way, so
+            # they're rolled back
+            sketchCurves = part.sketch.sketchCurves
+            curves = newSketchCurves(sketchCurves, part.knownTokens, sketchCurves.count - curveCount)
+            for curve in curves:
+                part.knownTokens.add(curve.entityToken)
+                part.curveTokens.add(curve.entityToken)
+
+        if not retValue:
+            self.rollback()
+            if self.ui:
+                self.ui.messageBox('Failed to import the Voronoi.  Unable to continue.')
+            return False
+
+        # HACK: the insert from SVG can add contraints to fix the curves.  Unfix so that
+        # they are are movable.
+        setFixedSketchPoints(curves, False)
+
+        self.chunkTimes.append(time.perf_counter() - timeChunk)
+        print("Voronoi publish: chunk {0} of {1} imported in {2:.3f}s".format(len(self.chunkTimes), self.countChunks, self.chunkTimes[-1]))
+
+        if self.progressDialog is not None:
+            self.progressDialog.progressValue = len(self.chunkTimes)
+
+        self.chunkIndex += 1
+        if self.chunkIndex >= len(part.chunks):
+            # The part is done so let Fusion compute its sketch
+            part.sketch.isComputeDeferred = False
+            if len(self.parts) > 1:
+                print("Voronoi publish: sketch {0} of {1} published in {2:.3f}s".format(self.partIndex + 1, len(self.parts), time.perf_counter() - part.timeStart))
+
+            self.partIndex += 1
+            self.chunkIndex = 0
+            if self.partIndex >= len(self.parts):
+                self.finish()
+                return False
+
+        return True
+
+    # Import a chunk into the sketch.  Returns False if the import failed.
+    def importChunk(self, sketch, chunk):
+        fp = tempfile.NamedTemporaryFile(mode='w', suffix='.svg', delete=False)
+        fp.write(chunk)
+        fp.close()
+
+        try:
+            return sketch.importSVG(fp.name, self.xPos, self.yPos, 1)    # (filePath, xPos, yPos, scale)
+        finally:
+            try:
+                os.unlink(fp.name)
+            except OSError:
+                pass
+
+    # All chunks imported
+    def finish(self):
+        self.isFinished = True
+        if self.progressDialog is not None:
+            self.progressDialog.hide()
+        print("Voronoi publish: {0} chunks imported into {1} sketch(es) in {2:.3f}s".format(len(self.chunkTimes), len(self.parts), time.perf_counter() - self.timeStart))
+
+        # The publish stands even if the follow up fails
+        if self.onFinished is not None:
+            try:
+                self.onFinished(self)
+            except Exception:
+                if self.ui:
+                    self.ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+    # Remove everything added by the publish
+    def rollback(self):
+        self.isFinished = True
+        self.wasCancelled = True
+        if self.progressDialog is not None:
+            self.progressDialog.hide()
+
+        for part in self.parts[:self.partIndex + 1]:
+            if part.sketch is None:
+                continue
+
+            if part.isNewSketch:
+                part.sketch.deleteMe()
+            else:
+                # Only the curves the publish added, wherever they are
+                sketchCurves = part.sketch.sketchCurves
+                curves = [sketchCurves.item(iCurve) for iCurve in range(sketchCurves.count)]
+                for curve in curves:
+                    if curve.entityToken in part.curveTokens:
+                        try:
+                            curve.deleteMe()
+                        except Exception:
+                            pass
+                part.sketch.isComputeDeferred = False
+
+        print("Voronoi publish: cancelled after {0} of {1} chunks".format(len(self.chunkTimes), self.countChunks))
+
+
+# Publishes the cells wrapped onto a curved face the same way as the SVG.  Each
+# chunk is a list of the editor's cells (see addSurfaceCells).
+class ChunkedSurfacePublisher(ChunkedSVGPublisher):
+    def __init__(self, app, ui, eventId, parts, face, mapping, createSketch=None, onFinished=None):
+        super().__init__(app, ui, eventId, parts, 0, 0, createSketch, onFinished)
+        self.face = face
+        self.mapping = mapping
+
+    def importChunk(self, sketch, cells):
+        return addSurfaceCells(sketch, self.face, self.mapping, cells)
+
+
+# Publishes the loops of arcs and lines fitted by the editor the same way as the
+# SVG.  Each chunk is a list of loops (see addArcLoops) in sketch coordinates, so
+# there's no position to import at.  The number of lines and arcs added is kept
+# for the summary.
+class ChunkedArcPublisher(ChunkedSVGPublisher):
+    def __init__(self, app, ui, eventId, parts, createSketch=None, onFinished=None):
+        super().__init__(app, ui, eventId, parts, 0, 0, createSketch, onFinished)
+        self.countLines = 0
+        self.countArcs = 0
+
+    def importChunk(self, sketch, loops):
+        countLines, countArcs = addArcLoops(sketch, loops)
+        self.countLines += countLines
+        self.countArcs += countArcs
+        return True
+
+
+# Entity tokens of the curves a publish imported into all of its sketches.  Only
+# these curves bound the cells that get extruded; the sketches' other curves
+# don't, wherever the imports put the new curves.
+def publishedCurveTokens(publisher):
+    curveTokens = set()
+    for part in publisher.parts:
+        curveTokens.update(part.curveTokens)
+    return curveTokens
+
+
+# Get the construction plane chosen in the dialog
+def getConstructionPlane(rootComp):
+    # xYConstructionPlane, xZConstructionPlane, yZConstructionPlane
+    plane = rootComp.xYConstructionPlane
+    if _constructionPlane == _CONSTRUCTION_PLANE_XZ:
+        plane = rootComp.xZConstructionPlane
+    elif _constructionPlane == _CONSTRUCTION_PLANE_YZ:
+        plane = rootComp.yZConstructionPlane
+    return plane
+
+
+# Get the plane (or planar face) the Voronoi should be added on
+def getTargetPlanarEntity(rootComp):
+    if _selectedSketch is not None:
+        return _selectedSketch.referencePlane
+    if _profileSketch is not None:
+        return _profileSketch.referencePlane
+    if _selectedFace is not None:
+        return _selectedFace
+    return getConstructionPlane(rootComp)
+
+
+# Add a sketch with the same plane and transform as the source sketch, so SVG
+# imported at the same position lands in the same place in either.  A new
+# sketch picks its own origin and axes on the plane, which needn't match a
+# sketch created on a face or redefined since.  Raises if the transform can't
+# be matched.
+def createSketchLike(rootComp, sourceSketch, name):
+    sketch = rootComp.sketches.add(sourceSketch.referencePlane)
+    sketch.name = name
+
+    if not matchSketchTransform(sketch, sourceSketch):
+        sketch.deleteMe()
+        raise RuntimeError('Unable to line up the sketch "{0}" with "{1}".'.format(name, sourceSketch.name))
+    return sketch
+
+
+# Give the sketch the same transform as the source sketch if it differs, so its
+# sketch coordinates are the source's.  Returns False if they still differ.
+def matchSketchTransform(sketch, sourceSketch):
+    transform = sourceSketch.transform
+    if sketch.transform.isEqualTo(transform):
+        return True
+    try:
+        sketch.transform = transform
+    except Exception:
+        pass
+    return sketch.transform.isEqualTo(transform)
+
+
+# The sketch whose coordinates the editor's cells are in: the selected sketch or
+# the selected profile's sketch.  None if the cells go on a face or construction
+# plane, where any new sketch on it has the coordinates the editor used.
+def getSourceSketch():
+    if _selectedSketch is not None:
+        return _selectedSketch
+    return _profileSketch
+
+
+# Add a new sketch on the target for cells that are in sketch coordinates (the
+# arcs and lines), lined up with the source sketch if there is one.  Returns
+# None, after saying why, if it can't be lined up.
+def createTargetSketch(rootComp):
+    sourceSketch = getSourceSketch()
+    if sourceSketch is None:
+        sketch = rootComp.sketches.add(getTargetPlanarEntity(rootComp))
+        sketch.name = "Voronoi - " + sketch.name
+        return sketch
+
+    try:
+        return createSketchLike(rootComp, sourceSketch, "Voronoi - " + sourceSketch.name)
+    except RuntimeError as error:
+        if _ui:
+            _ui.messageBox(str(error))
+        return None
+
+
+# Import a DXF file as a single sketch on the planar entity.  The DXF holds
+# sketch coordinates of the source sketch, if given, so the new sketch is lined
+# up with it (see matchSketchTransform) or deleted if it can't be.  Returns the
+# new sketch or None.
+def importDXFToTarget(app, rootComp, filePath, planarEntity, sourceSketch=None):
+    timeStart = time.perf_counter()
+
+    importManager = app.importManager
+    options = importManager.createDXF2DImportOptions(filePath, planarEntity)
+    options.isSingleSketchResult = True
+    countSketches = rootComp.sketches.count
+    if not importManager.importToTarget(options, rootComp) or rootComp.sketches.count <= countSketches:
+        if _ui:
+            _ui.messageBox('Failed to import the Voronoi DXF.')
+        return None
+
+    sketch = rootComp.sketches.item(rootComp.sketches.count - 1)
+    if sourceSketch is not None and not matchSketchTransform(sketch, sourceSketch):
+        sketch.deleteMe()
+        if _ui:
+            _ui.messageBox('Failed to line up the imported Voronoi DXF with the sketch "{0}".'.format(sourceSketch.name))
+        return None
+
+    print("Voronoi publish: imported DXF in {0:.0f} ms".format((time.perf_counter() - timeStart) * 1000))
+    return sketch
+
+
+# Get the end of a sketch curve at the point.  Arcs are always counterclockwise so
+# either end may be the one drawn to.
+def sketchPointNear(curve, point):
+    startPoint = curve.startSketchPoint
+    endPoint = curve.endSketchPoint
+    if startPoint.geometry.distanceTo(point) <= endPoint.geometry.distanceTo(point):
+        return startPoint
+    return endPoint
+
+
+# Add the loops of arcs and lines fitted by the editor to the sketch.  Each loop
+# is { 'start': [x,y], 'segments': [...] } in sketch coordinates (centimeters)
+# where a segment is 0,x,y for a line to x,y or 1,xm,ym,x,y for an arc through
+# xm,ym to x,y.  The curves of a loop share their end points so it closes.
+# Returns the number of lines and arcs added.
+def addArcLoops(sketch, loops):
+    sketchLines = sketch.sketchCurves.sketchLines
+    sketchArcs = sketch.sketchCurves.sketchArcs
+
+    countLines = 0
+    countArcs = 0
+
+    for loop in loops:
+        segments = loop['segments']
+        startPoint = adsk.core.Point3D.create(loop['start'][0], loop['start'][1], 0)
+        firstPoint = None           # SketchPoint the loop starts from
+        lastPoint = startPoint      # Where the next curve starts from
+        lastXY = tuple(loop['start'])
+
+        i = 0
+        while i < len(segments):
+            isArc = (segments[i] == 1)
+            i += 5 if isArc else 3
+            endXY = (segments[i-2], segments[i-1])
+            if endXY == lastXY:
+                continue    # Too short to draw
+
+            endPoint = adsk.core.Point3D.create(endXY[0], endXY[1], 0)
+            if i >= len(segments) and firstPoint is not None:
+                endPoint = firstPoint
+
+            if isArc:
+                midPoint = adsk.core.Point3D.create(segments[i-4], segments[i-3], 0)
+                curve = sketchArcs.addByThreePoints(lastPoint, midPoint, endPoint)
+                countArcs += 1
+            else:
+                curve = sketchLines.addByTwoPoints(lastPoint, endPoint)
+                countLines += 1
+
+            if firstPoint is None:
+                firstPoint = sketchPointNear(curve, startPoint)
+            lastPoint = sketchPointNear(curve, adsk.core.Point3D.create(endXY[0], endXY[1], 0))
+            lastXY = endXY
+
+    return countLines, countArcs
+
+
+# Get the body the Voronoi is placed on, or None if it isn't on a body's face
+def getTargetBody(rootComp):
+    face = adsk.fusion.BRepFace.cast(getTargetPlanarEntity(rootComp))
+    return face.body if face else None
+
+
+# Collect the profiles of the cells imported into the sketches.  A profile is a
+# cell if all of the curves of its loops are imported curves (curveTokens holds
+# their entity tokens).  That leaves out the region around the cells bounded by
+# the sketch's own curves (e.g. a projected face outline).
+def getCellProfiles(sketches, curveTokens):
+    profiles = adsk.core.ObjectCollection.create()
+    for sketch in sketches:
+        for profile in sketch.profiles:
+            isCell = True
+            for loop in profile.profileLoops:
+                for profileCurve in loop.profileCurves:
+                    if profileCurve.sketchEntity.entityToken not in curveTokens:
+                        isCell = False
+                        break
+                if not isCell:
+                    break
+            if isCell:
+                profiles.add(profile)
+    return profiles
+
+
+# Extrude the cell profiles of the sketches as a single feature.  The operation is
+# one of the _EXTRUDE_OPERATION_* values.  A cut goes into the body (opposite the
+# sketch normal, which points out of a face) and a cut or join only affects the
+# target body when there is one.  Returns the feature or None.
+def extrudeCellProfiles(rootComp, sketches, curveTokens, operation, distance, body):
+    if operation == _EXTRUDE_OPERATION_NONE or distance <= 0:
+        return None
+
+    timeStart = time.perf_counter()
+
+    profiles = getCellProfiles(sketches, curveTokens)
+    if profiles.count == 0:
+        if _ui:
+            _ui.messageBox('No closed Voronoi cells were found to extrude.')
+        return None
+
+    timeProfiles = time.perf_counter()
+
+    featureOperations = {
+        _EXTRUDE_OPERATION_CUT: adsk.fusion.FeatureOperations.CutFeatureOperation,
+        _EXTRUDE_OPERATION_JOIN: adsk.fusion.FeatureOperations.JoinFeatureOperation,
+        _EXTRUDE_OPERATION_NEW_BODY: adsk.fusion.FeatureOperations.NewBodyFeatureOperation
+    }
+
+    extrudes = rootComp.features.extrudeFeatures
+    extrudeInput = extrudes.createInput(profiles, featureOperations[operation])
+    signedDistance = -distance if operation == _EXTRUDE_OPERATION_CUT else distance
+    extrudeInput.setDistanceExtent(False, adsk.core.ValueInput.createByReal(signedDistance))
+    if body is not None and operation != _EXTRUDE_OPERATION_NEW_BODY:
+        extrudeInput.participantBodies = [body]
+
+    try:
+        feature = extrudes.add(extrudeInput)
+    except Exception:
+        if _ui:
+            _ui.messageBox('Failed to extrude the Voronoi cells:\n{}'.format(traceback.format_exc()))
+        return None
+
+    timeEnd = time.perf_counter()
+    print("Voronoi extrude: {0} cells ({1}) in {2:.3f}s ({3:.3f}s collecting profiles, {4:.3f}s extruding)".format(
+        profiles.count, operation, timeEnd - timeStart, timeProfiles - timeStart, timeEnd - timeProfiles))
+    return feature
+
+
+# Get the palette, creating it (hidden) if it doesn't exist yet.
+def getPalette():
+    global _paletteStarted
+    palette = _ui.palettes.itemById(_PALETTE_ID)
+    if not palette:
+        _paletteStarted = False
+        palette = _ui.palettes.add(_PALETTE_ID, _PALETTE_TITLE, _PALETTE_HTML_FILENAME, False, True, True, 1120, 940, True)
+
+        # Float the palette.
+        palette.dockingState = adsk.core.PaletteDockingStates.PaletteDockStateFloating
+
+        # HACK: Disallow docking for now since this causes the palette to be lost
+        palette.dockingOption = adsk.core.PaletteDockingOptions.PaletteDockOptionsNone
+
+        # Add handler to HTMLEvent of the palette.
+        onHTMLEvent = MyHTMLEventHandler()
+        palette.incomingFromHTML.add(onHTMLEvent)
+        _handlers.append(onHTMLEvent)
+
+        # Add handler to CloseEvent of the palette.
+        onClosed = PaletteCloseEventHandler()
+        palette.closed.add(onClosed)
+        _handlers.append(onClosed)
+
+    return palette
+
+
 # Send information to the palette. This will trigger an event in the javascript
 # within the html so that it can be handled.
 # Note that all values are in centimeters (default units)
 def sendInitInfoToHTML(palette):
 
-    global _units, _widthVoronoi, _heightVoronoi, _profilePoints
+    global _units, _widthVoronoi, _heightVoronoi, _profilePoints, _surfaceMapping
 
     profile_data = [
         [{"x": f"{pt.x:.4f}", "y": f"{pt.y:.4f}"} for pt in path]
         for path in _profilePoints
     ]
     payload = {"units": _units, "width": str(_widthVoronoi), "height": str(_heightVoronoi), "profile": profile_data}
+    if _surfaceMapping is not None:
+        # Curved face - the profile is in parameter space and the editor needs
+        # the density grid to correct for the surface stretching.
+        payload["surface"] = {
+            "width": _surfaceMapping['width'], "height": _surfaceMapping['height'],
+            "cols": _surfaceMapping['cols'], "rows": _surfaceMapping['rows'],
+            "density": [round(d, 4) for d in _surfaceMapping['density']]
+        }
     palette.sendInfoToHTML('init', json.dumps(payload))
 
 
@@ -413,7 +1461,7 @@ class VoronoiCommandInputChangedHandler(adsk.core.InputChangedEventHandler):
         try:
             global _app, _units, _widthVoronoi, _heightVoronoi, _profilePoints, _profileOrigin, _profileWidth, _profileHeight, _profileSketchName, _profileSketch, _selectedSketchName, _constructionPlane
             global _widthValueCommandInput, _heightValueCommandInput, _widthProfileStringValueCommandInput, _heightProfileStringValueCommandInput
-            global _selectedFace
+            global _selectedFace, _surfaceFace, _surfaceMapping, _partitionSketches, _maxCellsPerSketch, _extrudeOperation, _extrudeDistance
 
             des = adsk.fusion.Design.cast(_app.activeProduct)
 
@@ -423,6 +1471,8 @@ class VoronoiCommandInputChangedHandler(adsk.core.InputChangedEventHandler):
             if changedInput.id == _SELECTION_INPUT_ID_TARGET:
                 # Selection changed - forget any previously selected face.
                 _selectedFace = None
+                _surfaceFace = None
+                _surfaceMapping = None
 
                 # Either a sketch, a profile, a face, or none selected...
                 _selectedSketchName = getSelectedSketchName()
@@ -440,7 +1490,15 @@ class VoronoiCommandInputChangedHandler(adsk.core.InputChangedEventHandler):
                     profileName = profileSketchName
                 elif _selectedSketchName == '':
                     face = getSelectedFace()
-                    if face is not None:
+                    if face is not None and not isPlanarFace(face):
+                        # Curved face - generate in the face's parameter space.
+                        # The sketch is created at publish time.
+                        mapping = getSurfaceMapping(face)
+                        if mapping is not None:
+                            _surfaceFace = face
+                            _surfaceMapping = mapping
+                            profilePoints = getSurfacePoints(face, mapping)
+                    elif face is not None:
                         # Defer creating the real sketch until publish - geometry
                         # created during inputChanged isn't committed.  Use a
                         # throwaway sketch only to sample the face outline in the
@@ -498,9 +1556,28 @@ class VoronoiCommandInputChangedHandler(adsk.core.InputChangedEventHandler):
                 _heightProfileStringValueCommandInput.isVisible = hasProfile
                 _applyProfileSizeBoolValueInput.isVisible = hasProfile
 
+                # The cells on a curved face are 3D splines, which can't be extruded
+                _extrudeOperationDropDownInput.isEnabled = (_surfaceFace is None)
+                _extrudeDistanceValueCommandInput.isEnabled = (_surfaceFace is None)
+
             elif changedInput.id == _DROPDOWN_INPUT_ID_CONSTRUCTION_PLANE:
                 _constructionPlane = _constructionPlaneDropDownInput.selectedItem.name
 
+            elif changedInput.id == _BOOL_INPUT_ID_PARTITION_SKETCHES:
+                _partitionSketches = _partitionSketchesBoolValueInput.value
+                _maxCellsPerSketchSpinnerInput.isVisible = _partitionSketches
+
+            elif changedInput.id == _INTEGER_INPUT_ID_MAX_CELLS_PER_SKETCH:
+                _maxCellsPerSketch = _maxCellsPerSketchSpinnerInput.value
+
+            elif changedInput.id == _DROPDOWN_INPUT_ID_EXTRUDE_OPERATION:
+                _extrudeOperation = _extrudeOperationDropDownInput.selectedItem.name
+                _extrudeDistanceValueCommandInput.isVisible = (_extrudeOperation != _EXTRUDE_OPERATION_NONE)
+
+            elif changedInput.id == _VALUE_INPUT_ID_EXTRUDE_DISTANCE:
+                if _extrudeDistanceValueCommandInput.isValidExpression:
+                    _extrudeDistance = _extrudeDistanceValueCommandInput.value
+
             elif changedInput.id == _BOOL_INPUT_ID_APPLY_PROFILE_SIZE:
                 # Copy profile size over to voronoi size.  _profileWidth/Height are
                 # set (in cm) whenever a profile or a face is selected.
@@ -546,37 +1623,19 @@ class VoronoiCommandExecuteHandler(adsk.core.CommandEventHandler):
         super().__init__()
     def notify(self, args):
         try:
-            # Create and display the palette.
-            palette = _ui.palettes.itemById(_PALETTE_ID)
-            if not palette:
-                palette = _ui.palettes.add(_PALETTE_ID, _PALETTE_TITLE, _PALETTE_HTML_FILENAME, True, True, True, 1120, 940, True)
-
-                # Float the palette.
-                palette.dockingState = adsk.core.PaletteDockingStates.PaletteDockStateFloating
-
-                # HACK: Disallow docking for now since this causes the palette to be lost
-                palette.dockingOption = adsk.core.PaletteDockingOptions.PaletteDockOptionsNone
-    
-                # Add handler to HTMLEvent of the palette.
-                onHTMLEvent = MyHTMLEventHandler()
-                palette.incomingFromHTML.add(onHTMLEvent)
-                _handlers.append(onHTMLEvent)
-    
-                # Add handler to CloseEvent of the palette.
-                onClosed = PaletteCloseEventHandler()
-                palette.closed.add(onClosed)
-                _handlers.append(onClosed)
-
-                # HACK: On creation, the html in the palette will callback to get the setup information
-                # Normally we would send it with sendInfoToHTML.  But that doesn't work on create.
-                # It does work on subsequent calls, therefore it's below.
+            global _paletteInitPending, _timePaletteShown
+            _timePaletteShown = time.perf_counter()
 
-            else:
-                palette.isVisible = True
+            # Display the palette (normally created hidden when the add-in started).
+            palette = getPalette()
+            palette.isVisible = True
 
-                # HACK: We are doing this here and not in create above since the msg never is
-                # received by the browser that first time.  Handled in a html callback.
+            if _paletteStarted:
                 sendInitInfoToHTML(palette)
+            else:
+                # The html hasn't finished loading.  It will callback with the
+                # started event once it has and the init info is sent then.
+                _paletteInitPending = True
 
         except Exception:
             if _ui:
@@ -614,10 +1673,15 @@ class VoronoiCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
             # Define the inputs.
             cmdInputs_ = cmd.commandInputs
 
-            _targetSelectionInput = cmdInputs_.addSelectionInput(_SELECTION_INPUT_ID_TARGET, 'Sketch, Profile, or Face', 'Select a sketch, profile, or planar face to place the Voronoi')
+            _targetSelectionInput = cmdInputs_.addSelectionInput(_SELECTION_INPUT_ID_TARGET, 'Sketch, Profile, or Face', 'Select a sketch, profile, or face (planar or curved) to place the Voronoi')
             _targetSelectionInput.addSelectionFilter('Sketches')
             _targetSelectionInput.addSelectionFilter('Profiles')
             _targetSelectionInput.addSelectionFilter('PlanarFaces')
+            _targetSelectionInput.addSelectionFilter('CylindricalFaces')
+            _targetSelectionInput.addSelectionFilter('ConicalFaces')
+            _targetSelectionInput.addSelectionFilter('SphericalFaces')
+            _targetSelectionInput.addSelectionFilter('ToroidalFaces')
+            _targetSelectionInput.addSelectionFilter('SplineFaces')
             _targetSelectionInput.setSelectionLimits(0,1)
 
             _constructionPlaneDropDownInput = cmdInputs_.addDropDownCommandInput(_DROPDOWN_INPUT_ID_CONSTRUCTION_PLANE, 'Construction Plane', adsk.core.DropDownStyles.TextListDropDownStyle)
@@ -653,6 +1717,22 @@ class VoronoiCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
             _applyProfileSizeBoolValueInput = cmdInputs_.addBoolValueInput(_BOOL_INPUT_ID_APPLY_PROFILE_SIZE, 'Use Profile Size', False, './/resources//CopyProfileSize')
             _applyProfileSizeBoolValueInput.isVisible = False
 
+            global _partitionSketchesBoolValueInput, _maxCellsPerSketchSpinnerInput
+            _partitionSketchesBoolValueInput = cmdInputs_.addBoolValueInput(_BOOL_INPUT_ID_PARTITION_SKETCHES, 'Split Into Sketches', True, '', _partitionSketches)
+            _partitionSketchesBoolValueInput.tooltip = 'Publish the cells into several sketches, grouped by position, to keep each sketch fast to compute'
+
+            _maxCellsPerSketchSpinnerInput = cmdInputs_.addIntegerSpinnerCommandInput(_INTEGER_INPUT_ID_MAX_CELLS_PER_SKETCH, 'Max Cells Per Sketch', 10, 100000, 50, _maxCellsPerSketch)
+            _maxCellsPerSketchSpinnerInput.isVisible = _partitionSketches
+
+            global _extrudeOperationDropDownInput, _extrudeDistanceValueCommandInput
+            _extrudeOperationDropDownInput = cmdInputs_.addDropDownCommandInput(_DROPDOWN_INPUT_ID_EXTRUDE_OPERATION, 'Extrude Cells', adsk.core.DropDownStyles.TextListDropDownStyle)
+            for operation in (_EXTRUDE_OPERATION_NONE, _EXTRUDE_OPERATION_CUT, _EXTRUDE_OPERATION_JOIN, _EXTRUDE_OPERATION_NEW_BODY):
+                _extrudeOperationDropDownInput.listItems.add(operation, (_extrudeOperation == operation))
+            _extrudeOperationDropDownInput.tooltip = 'Extrude all of the cells as one feature once they are published'
+
+            _extrudeDistanceValueCommandInput = cmdInputs_.addValueInput(_VALUE_INPUT_ID_EXTRUDE_DISTANCE, 'Extrude Distance', _units, adsk.core.ValueInput.createByReal(_extrudeDistance))
+            _extrudeDistanceValueCommandInput.isVisible = (_extrudeOperation != _EXTRUDE_OPERATION_NONE)
+
             # Change the OK button text to indicate we will show the voronoi editor palette
             cmd.okButtonText = _PALETTE_OK_BUTTON_TEXT
 
@@ -691,7 +1771,7 @@ class MyHTMLEventHandler(adsk.core.HTMLEventHandler):
         super().__init__()
     def notify(self, args):
         try:
-            global _svgFilePath
+            global _svgFilePath, _surfaceCells, _paletteStarted, _paletteInitPending, _dxfFile, _dxfFilePath, _arcLoops, _arcStats
 
             htmlArgs = adsk.core.HTMLEventArgs.cast(args)            
             data = json.loads(htmlArgs.data)
@@ -706,26 +1786,92 @@ class MyHTMLEventHandler(adsk.core.HTMLEventHandler):
 
             # Sent when the palette has been loaded and initialized
             if theAction == 'started':
+                _paletteStarted = True
 
                 # Return information to the palette. This can then be handled by the palette JS code
                 # NOTE: This isn't working.  On the JS side the value is a Promise object???
                 #htmlArgs.returnData = '{{"sketchName": "{0}","units": "{1}"}}'.format(selectedSketchName, _units)
 
-                # HACK: We are doing this here and not in create above since the msg never is
-                # received by the browser that first time.
-                # Send information to the palette. This will trigger an event in the javascript
-                # within the html so that it can be handled.
-
+                # Only initialize the editor if the command asked for it.  The
+                # palette is loaded hidden when the add-in starts.
                 palette = _ui.palettes.itemById(_PALETTE_ID)
-                if palette:
+                if palette and _paletteInitPending:
+                    _paletteInitPending = False
                     sendInitInfoToHTML(palette)
 
+            # Sent once the editor has drawn the first diagram after init
+            elif theAction == 'diagramReady':
+                print("Voronoi editor: first diagram drawn {0:.0f} ms after the command executed ({1:.0f} ms in the editor)".format(
+                    (time.perf_counter() - _timePaletteShown) * 1000, float(theArgs.get('msDiagram', 0))))
+
             # Sent when the palette should be closed
             elif theAction == 'close':
                 palette = _ui.palettes.itemById(_PALETTE_ID)
                 if palette:
                     palette.isVisible = False
 
+            # Sent when the voronoi is about to be streamed as DXF text.  The
+            # editor writes the DXF; it's only appended to a temporary file here.
+            elif theAction == 'dxfBegin':
+                if _dxfFile is not None:
+                    _dxfFile.close()
+                _dxfFile = tempfile.NamedTemporaryFile(mode='w', suffix='.dxf', delete=False)
+
+            # Sent with the next piece of the DXF text
+            elif theAction == 'dxfText':
+                if _dxfFile is not None:
+                    _dxfFile.write(theArgs.get('text', ''))
+
+            # Sent when all of the DXF text has been sent and it should be added
+            elif theAction == 'dxfEnd':
+                if _dxfFile is None:
+                    return
+
+                _dxfFile.close()
+                _dxfFilePath = _dxfFile.name
+                print("Generated temporary DXF file with {0} cells: {1}".format(int(theArgs.get('count', 0)), _dxfFilePath))
+                _dxfFile = None
+
+                palette = _ui.palettes.itemById(_PALETTE_ID)
+                if palette:
+                    palette.isVisible = False
+
+                createVoronoiCoreCmdDef = _ui.commandDefinitions.itemById(_CREATE_VORONOI_CORE_CMD_ID)
+                if createVoronoiCoreCmdDef is not None:
+                    createVoronoiCoreCmdDef.execute()
+                else:
+                    if _ui:
+                        _ui.messageBox('Failed to find the CreateVoronoi command definition.')
+
+            # Sent when the voronoi is about to be sent as loops of arcs and lines
+            elif theAction == 'arcsBegin':
+                _arcLoops = []
+                _arcStats = {'countBeziers': 0, 'countLines': 0}
+
+            # Sent with the next batch of loops of arcs and lines
+            elif theAction == 'arcsCells':
+                if _arcLoops is not None:
+                    _arcLoops.extend(theArgs.get('loops', []))
+                    _arcStats['countBeziers'] += int(theArgs.get('countBeziers', 0))
+                    _arcStats['countLines'] += int(theArgs.get('countLines', 0))
+
+            # Sent when all of the loops have been sent and they should be added
+            elif theAction == 'arcsEnd':
+                if _arcLoops is None:
+                    return
+                _arcStats['msFit'] = float(theArgs.get('msFit', 0))
+
+                palette = _ui.palettes.itemById(_PALETTE_ID)
+                if palette:
+                    palette.isVisible = False
+
+                createVoronoiCoreCmdDef = _ui.commandDefinitions.itemById(_CREATE_VORONOI_CORE_CMD_ID)
+                if createVoronoiCoreCmdDef is not None:
+                    createVoronoiCoreCmdDef.execute()
+                else:
+                    if _ui:
+                        _ui.messageBox('Failed to find the CreateVoronoi command definition.')
+
             # Sent when the voronoi should be published/added to a sketch
             elif theAction == 'publish':
                 
@@ -733,14 +1879,22 @@ class MyHTMLEventHandler(adsk.core.HTMLEventHandler):
                 if palette:
                     palette.isVisible = False
 
-                    svgStr = unquote(theArgs['svg'])
+                    if 'cells' in theArgs:
+                        # Cells for a curved face are sent as polylines in
+                        # parameter space rather than as an SVG.
+                        _surfaceCells = theArgs['cells']
+                    else:
+                        svgStr = unquote(theArgs['svg'])
+
+                        # Shape styles reference a shared symbol per cell
+                        svgStr = expandSVGSymbolReferences(svgStr)
 
-                    # Save the SVG to a temp file            
-                    fp = tempfile.NamedTemporaryFile(mode='w', suffix='.svg', delete=False)
-                    fp.write(svgStr)
-                    fp.close()
-                    _svgFilePath = fp.name
-                    print ("Generated temporary SVG file: " + _svgFilePath)
+                        # Save the SVG to a temp file            
+                        fp = tempfile.NamedTemporaryFile(mode='w', suffix='.svg', delete=False)
+                        fp.write(svgStr)
+                        fp.close()
+                        _svgFilePath = fp.name
+                        print ("Generated temporary SVG file: " + _svgFilePath)
 
                     # Get the command definition for the create voronoi core command which
                     # will do the work.
@@ -757,6 +1911,28 @@ class MyHTMLEventHandler(adsk.core.HTMLEventHandler):
                 _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
 
+# Event handler for the custom event that imports the next chunk of a publish.
+class PublishChunkEventHandler(adsk.core.CustomEventHandler):
+    def __init__(self):
+        super().__init__()
+    def notify(self, args):
+        global _publisher
+        try:
+            if _publisher is None:
+                return
+
+            if _publisher.step():
+                _app.fireCustomEvent(_PUBLISH_CUSTOM_EVENT_ID)   # Queue the next chunk
+            else:
+                _publisher = None
+        except Exception:
+            if _publisher is not None:
+                _publisher.rollback()
+                _publisher = None
+            if _ui:
+                _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
 # Event handler for the commandCreated event.
 class CreateVoronoiCommandCreatedEventHandler(adsk.core.CommandCreatedEventHandler):
     def __init__(self):
@@ -780,16 +1956,102 @@ class CreateVoronoiCommandExecuteHandler(adsk.core.CommandEventHandler):
 
         global _app, _svgFilePath, _selectedSketchName, _selectedSketch, _constructionPlane
         global _profileOrigin, _profileWidth, _profileHeight, _profileSketchName, _profileSketch, _heightVoronoi, _widthVoronoi
-        global _selectedFace
+        global _selectedFace, _surfaceFace, _surfaceMapping, _surfaceCells, _publisher, _dxfFilePath, _arcLoops, _arcStats
 
-        if _svgFilePath == '':
-            print("ERROR: Missing the SVG filepath")
+        if _publisher is not None:
+            if _ui:
+                _ui.messageBox('A Voronoi is still being published.  Please wait for it to finish.')
             return ()
 
         # Get the specified sketch or create one if none found
         design = _app.activeProduct
         rootComp = design.rootComponent
 
+        if _surfaceCells is not None:
+            # Curved face - wrap the cells onto the face, a chunk at a time and
+            # optionally split into several sketches.  They're 3D splines so the
+            # publish format and extrude (greyed out) don't apply.
+            if _surfaceFace is not None and _surfaceMapping is not None:
+                theSketch = rootComp.sketches.add(rootComp.xYConstructionPlane)
+                theSketch.name = "Voronoi - " + theSketch.name
+
+                cellParts = [_surfaceCells]
+                if _partitionSketches:
+                    cellParts = partitionSurfaceCells(_surfaceCells, max(1, _maxCellsPerSketch))
+
+                parts = [PublishPart(splitCellsIntoChunks(cellParts[0], _PUBLISH_CELLS_PER_CHUNK), theSketch, True)]
+                for cellPart in cellParts[1:]:
+                    parts.append(PublishPart(splitCellsIntoChunks(cellPart, _PUBLISH_CELLS_PER_CHUNK)))
+
+                def createPartSketch(partIndex):
+                    return createSketchLike(rootComp, theSketch, "{0} - Part {1}".format(theSketch.name, partIndex + 1))
+
+                _publisher = ChunkedSurfacePublisher(_app, _ui, _PUBLISH_CUSTOM_EVENT_ID, parts, _surfaceFace, _surfaceMapping, createPartSketch)
+                _publisher.start()
+            _surfaceCells = None
+            return ()
+
+        if _dxfFilePath != '':
+            # The DXF coordinates are already in sketch space so it's imported
+            # as its own sketch on the target's plane, lined up with the sketch
+            # the coordinates are from.
+            theSketch = importDXFToTarget(_app, rootComp, _dxfFilePath, getTargetPlanarEntity(rootComp), getSourceSketch())
+            if theSketch is not None:
+                # Every curve of the new sketch is a cell
+                curveTokens = set(curve.entityToken for curve in theSketch.sketchCurves)
+                extrudeCellProfiles(rootComp, [theSketch], curveTokens, _extrudeOperation, _extrudeDistance, getTargetBody(rootComp))
+            try:
+                os.unlink(_dxfFilePath)
+            except OSError:
+                pass
+            _dxfFilePath = ''
+            return ()
+
+        if _arcLoops is not None:
+            # Like the DXF, the loops are in sketch space so they go into their
+            # own sketch on the target's plane, lined up with the sketch they're
+            # from.  Like the SVG, they're published a chunk at a time and
+            # optionally split into several sketches.
+            theSketch = createTargetSketch(rootComp)
+            if theSketch is None:
+                _arcLoops = None
+                _arcStats = {}
+                return ()
+
+            loopParts = [_arcLoops]
+            if _partitionSketches:
+                loopParts = partitionArcLoops(_arcLoops, max(1, _maxCellsPerSketch))
+
+            parts = [PublishPart(splitCellsIntoChunks(loopParts[0], _PUBLISH_CELLS_PER_CHUNK), theSketch, True)]
+            for loopPart in loopParts[1:]:
+                parts.append(PublishPart(splitCellsIntoChunks(loopPart, _PUBLISH_CELLS_PER_CHUNK)))
+
+            def createPartSketch(partIndex):
+                return createSketchLike(rootComp, theSketch, "{0} - Part {1}".format(theSketch.name, partIndex + 1))
+
+            arcStats = _arcStats
+            extrudeOperation = _extrudeOperation
+            extrudeDistance = _extrudeDistance
+            targetBody = getTargetBody(rootComp)
+            def extrudePublished(publisher):
+                # Compare with the spline segments (one per Bezier) and lines the
+                # cells would have had as an SVG or DXF.
+                print("Voronoi publish: {0} lines and {1} arcs instead of {2} spline segments and {3} lines ({4:.0f} ms fitting in the editor)".format(
+                    publisher.countLines, publisher.countArcs, arcStats.get('countBeziers', 0), arcStats.get('countLines', 0), arcStats.get('msFit', 0)))
+                extrudeCellProfiles(rootComp, [part.sketch for part in publisher.parts], publishedCurveTokens(publisher),
+                                    extrudeOperation, extrudeDistance, targetBody)
+
+            _arcLoops = None
+            _arcStats = {}
+
+            _publisher = ChunkedArcPublisher(_app, _ui, _PUBLISH_CUSTOM_EVENT_ID, parts, createPartSketch, extrudePublished)
+            _publisher.start()
+            return ()
+
+        if _svgFilePath == '':
+            print("ERROR: Missing the SVG filepath")
+            return ()
+
         theSketch = None
 
         if _selectedSketch is not None:
@@ -806,20 +2068,14 @@ class CreateVoronoiCommandExecuteHandler(adsk.core.CommandEventHandler):
             if faceBounds is not None:
                 _profileOrigin, _profileWidth, _profileHeight = faceBounds
 
+        # Anything other than a selected sketch or the profile's sketch is
+        # created for this publish (and deleted if it's cancelled).
+        isNewSketch = (_selectedSketch is None and _profileSketch is None)
+
         if theSketch is None:
-            # Which plane if no sketch?
-            # xYConstructionPlane, xZConstructionPlane, yZConstructionPlane
-            plane = rootComp.xYConstructionPlane
-            if _constructionPlane == _CONSTRUCTION_PLANE_XZ:
-                plane = rootComp.xZConstructionPlane
-            elif _constructionPlane == _CONSTRUCTION_PLANE_YZ:
-                plane = rootComp.yZConstructionPlane
-
-            theSketch = rootComp.sketches.add(plane)
+            theSketch = rootComp.sketches.add(getConstructionPlane(rootComp))
             theSketch.name = "Voronoi - " + theSketch.name
 
-        theSketch.isComputeDeferred = True  # Help to speed up import
-
         xPos = 0
         yPos = 0
 
@@ -832,25 +2088,43 @@ class CreateVoronoiCommandExecuteHandler(adsk.core.CommandEventHandler):
         else:
             yPos = _heightVoronoi
 
-        # import the temp svg file into the sketch.
-        retValue = theSketch.importSVG(_svgFilePath, xPos, yPos, 1)    # (filePath, xPos, yPos, scale)
+        with open(_svgFilePath, 'r') as fp:
+            svgStr = fp.read()
 
         try:
             os.unlink(_svgFilePath)
         except OSError:
             pass
-        
-        # Check if the import was successful
-        if not retValue:
-            if _ui:
-                _ui.messageBox('Failed to import the Voronoi.  Unable to continue.')
-        else:
-            # HACK: the insert from SVG can add contraints to fix the curves.  Unfix so that
-            # they are are movable.
-            setFixedSketchPoints(theSketch.sketchCurves, False)
+        _svgFilePath = ''
+
+        # Optionally split the cells by position into several sketches.  The
+        # first goes into the target sketch and the rest into new sketches on
+        # the same plane.
+        svgParts = [svgStr]
+        if _partitionSketches:
+            svgParts = partitionSVGCells(svgStr, max(1, _maxCellsPerSketch))
+
+        parts = [PublishPart(splitSVGIntoChunks(svgParts[0], _PUBLISH_CELLS_PER_CHUNK), theSketch, isNewSketch)]
+        for svgPart in svgParts[1:]:
+            parts.append(PublishPart(splitSVGIntoChunks(svgPart, _PUBLISH_CELLS_PER_CHUNK)))
+
+        def createPartSketch(partIndex):
+            return createSketchLike(rootComp, theSketch, "{0} - Part {1}".format(theSketch.name, partIndex + 1))
+
+        # Once published, optionally extrude all of the cells in one go
+        extrudeOperation = _extrudeOperation
+        extrudeDistance = _extrudeDistance
+        targetBody = getTargetBody(rootComp)
+        def extrudePublished(publisher):
+            extrudeCellProfiles(rootComp, [part.sketch for part in publisher.parts], publishedCurveTokens(publisher),
+                                extrudeOperation, extrudeDistance, targetBody)
+
+        # Import the cells a chunk at a time from the custom event so that
+        # Fusion stays responsive and the publish can be cancelled.
+        _publisher = ChunkedSVGPublisher(_app, _ui, _PUBLISH_CUSTOM_EVENT_ID, parts, xPos, yPos, createPartSketch, extrudePublished)
+        _publisher.start()
+
 
-        theSketch.isComputeDeferred = False
- 
 def run(context):
     try:
         global _ui, _app
@@ -878,6 +2152,15 @@ def run(context):
             createVoronoiCoreCmdDef.commandCreated.add(onCommandCreated)
             _handlers.append(onCommandCreated)
         
+        # Create the palette now, hidden, so it's loaded when the command runs
+        getPalette()
+
+        # Register the custom event used to publish in chunks
+        publishChunkEvent = _app.registerCustomEvent(_PUBLISH_CUSTOM_EVENT_ID)
+        onPublishChunk = PublishChunkEventHandler()
+        publishChunkEvent.add(onPublishChunk)
+        _handlers.append(onPublishChunk)
+
         # Get the CREATE panel in the MODEL workspace. 
         createPanel = _ui.allToolbarPanels.itemById(_SOLID_CREATE_PANEL_ID)
 
@@ -919,6 +2202,8 @@ def stop(context):
         cmdDef = _ui.commandDefinitions.itemById(_CREATE_VORONOI_CORE_CMD_ID)
         if cmdDef:
             cmdDef.deleteMe()
+
+        _app.unregisterCustomEvent(_PUBLISH_CUSTOM_EVENT_ID)
         _handlers.clear()
     except Exception:
         if _ui:
@@ -21,12 +21,25 @@ This software makes use of the following:
 $(function() {
     console.log( "Document ready!  Loading up the Dilithium crystals!" );
 
+    // Most cells the diagram can have
+    const MAX_CELL_COUNT = 100000;
+
     // The default number of iterations for Lloyd's relaxation
     const DEFAULT_LLOYDS_ITERATIONS = 20;
 
     // Value determines how fast Lloyd's relaxtion occurs each iteration
     const LLOYDS_OMEGA = 0.2;
 
+    // Default raster relaxation grid resolution (cells along the longer side)
+    const DEFAULT_RELAX_GRID = 256;
+
+    // Default tolerance when publishing curved cells as arcs and lines (centimeters)
+    const DEFAULT_ARC_TOLERANCE_CM = 0.02;
+
+    // Default and minimum size of a tile in tile mode (centimeters)
+    const DEFAULT_TILE_SIZE_CM = 5;
+    const MIN_TILE_SIZE_CM = 0.5;
+
     // Default page sizes for standard (inches) and metric (centimeters)
     const DEFAULT_PAGE_WIDTH_STANDARD   = 6;
     const DEFAULT_PAGE_HEIGHT_STANDARD  = 4; 
@@ -56,6 +69,11 @@ $(function() {
         ymax: -Infinity
     }
 
+    // Set when the target is a curved face.  The diagram is then generated in
+    // the face's parameter space and this holds the grid of area correcting
+    // densities (0-1) covering it.  Null for planar targets.
+    var _surface = null;
+
     var _profilePath = null;        // Profile path
     var _profilePathGap = null;     // Profile gap path
 
@@ -139,23 +157,50 @@ $(function() {
         window.URL.revokeObjectURL(blob_url);
     });
 
+    $('#downloadDXFBtn').on('click', function() {
+
+        // Hand the text to the blob a buffer at a time.  The browser can keep
+        // the parts out of the JS heap.
+        var parts = [];
+        var count = generateDXF(function(text) {
+            parts.push(new Blob([text]));
+        });
+        console.log("Generated DXF with " + count + " cells.");
+
+        var blob = new Blob(parts, { type: 'application/dxf' });
+        var blob_url = window.URL.createObjectURL(blob);
+
+        var anchor = document.createElement('a');
+        anchor.setAttribute('href', blob_url);
+        anchor.setAttribute('download', 'voronoi.dxf');
+        anchor.setAttribute('target', '_blank');
+        anchor.click();
+        window.URL.revokeObjectURL(blob_url);
+    });
+
     function showDebugText(str) {
         $('#debug_text').html(str);
     }
 
-    // For the cell count range
-    const $valueSpanCellCount = $('#cellCountValueSpan');
+    // For the cell count.  The slider covers the usual counts and larger ones
+    // (e.g. for a DXF of a big panel) are typed into the number input.
     const $valueCellCount = $('#cellCountRange');
-    $valueSpanCellCount.html($valueCellCount.val());
+    const $valueCellCountInput = $('#cellCountInput');
+    $valueCellCountInput.val($valueCellCount.val());
     $valueCellCount.on('input change', () => {
-        $valueSpanCellCount.html($valueCellCount.val());
+        $valueCellCountInput.val($valueCellCount.val());
+        generateCells();
+        updateView();
+    });
+    $valueCellCountInput.on('change', () => {
+        $valueCellCount.val(Math.min(propertyCellCount(), Number($valueCellCount.attr('max'))));
         generateCells();
         updateView();
     });
 
     function propertyCellCount(defaultCount = 100) {
-        var count = parseInt($valueCellCount.val());
-        if (count !== NaN && count > 1 && count < 2000) {
+        var count = parseInt($valueCellCountInput.val());
+        if (!isNaN(count) && count > 1 && count <= MAX_CELL_COUNT) {
             return count;
         }
         else {
@@ -223,6 +268,63 @@ $(function() {
         return style;
     }
 
+    // Format to publish to Fusion with
+    const PublishFormat = {
+        SVG: 'svg',
+        DXF: 'dxf',
+        Arcs: 'arcs'    // Arcs and lines, see fitLoopWithBiarcs()
+    };
+
+    const $valuePublishFormat = $('#publishFormatSelect');
+    $valuePublishFormat.change(() => {
+        $valueArcTolerance.prop( "disabled", _surface !== null || propertyPublishFormat() !== PublishFormat.Arcs );
+    });
+
+    function propertyPublishFormat() {
+        var format = $valuePublishFormat.val();
+        return (format === PublishFormat.DXF || format === PublishFormat.Arcs) ? format : PublishFormat.SVG;
+    }
+
+    // How far the arcs and lines may stray from the curves they replace (centimeters)
+    var _arcTolerance = DEFAULT_ARC_TOLERANCE_CM;
+
+    const $valueArcTolerance = $('#arcToleranceInput');
+    $valueArcTolerance.on('input change', () => {
+        _arcTolerance = propertyArcTolerance();
+    });
+
+    // Return the arc tolerance (in CMs).
+    function propertyArcTolerance() {
+        var val = Number($valueArcTolerance.val());
+        if (isNaN(val) || val <= 0) {
+            return _arcTolerance; // Incoming is invalid so use current value
+        }
+        else {
+            switch (_units) {
+                case 'in': val = inches2cms(val); break;
+                case 'ft': val = ft2cms(val); break;
+                case 'mm': val = mm2cms(val); break;
+                default:   break; // cm
+            }
+            return val;
+        }
+    }
+
+    // Set the arc tolerance (always in cms)
+    function setPropertyArcTolerance(val) {
+        _arcTolerance = val;
+
+        // Form display value in selected units
+        let formVal;
+        switch (_units) {
+            case 'in': formVal = cms2inches(val); break;
+            case 'ft': formVal = cms2ft(val); break;
+            case 'mm': formVal = cms2mm(val); break;
+            default:   formVal = val; break; // cm
+        }
+        $valueArcTolerance.val(Number(formVal.toPrecision(3)));
+    }
+
     // Page width
     var _pageWidth = inches2cms(DEFAULT_PAGE_WIDTH_STANDARD); // internally always centimeters
 
@@ -315,6 +417,66 @@ $(function() {
         $valuePagePadding.val(Number(formVal.toFixed(3)));
     }
 
+    // Tile mode.  The cells are generated and relaxed for a single square tile
+    // whose sites wrap around at its edges, so the pattern is seamless when
+    // the tile is repeated across the page or profile.
+    const $valueTileMode = $('#tileModeCheckbox');
+    $valueTileMode.change( () => {
+        $valueTileSize.prop( "disabled", !$valueTileMode.is(":checked") );
+        forceUpdate();
+    });
+
+    // Returns true if in tile mode.  Not supported on curved faces.
+    function propertyTileMode() {
+        return ($valueTileMode.is(":checked") && _surface === null);
+    }
+
+    // Size of a tile (centimeters)
+    var _tileSize = DEFAULT_TILE_SIZE_CM;
+
+    const $valueTileSize = $('#tileSizeInput');
+    $valueTileSize.on('input change', () => {
+        var newVal = propertyTileSize();
+        if (newVal !== _tileSize) {
+            _tileSize = newVal;
+            if (propertyTileMode()) {
+                forceUpdate();
+            }
+        }
+    });
+
+    // Return the tile size (in CMs).
+    function propertyTileSize() {
+        var val = Number($valueTileSize.val());
+        if (isNaN(val) || val <= 0) {
+            return _tileSize; // Incoming is invalid so use current value
+        }
+        else {
+            switch (_units) {
+                case 'in': val = inches2cms(val); break;
+                case 'ft': val = ft2cms(val); break;
+                case 'mm': val = mm2cms(val); break;
+                default:   break; // cm
+            }
+            return Math.max(val, MIN_TILE_SIZE_CM);
+        }
+    }
+
+    // Set the tile size (always in cms)
+    function setPropertyTileSize(val) {
+        _tileSize = val;
+
+        // Form display value in selected units
+        let formVal;
+        switch (_units) {
+            case 'in': formVal = cms2inches(val); break;
+            case 'ft': formVal = cms2ft(val); break;
+            case 'mm': formVal = cms2mm(val); break;
+            default:   formVal = val; break; // cm
+        }
+        $valueTileSize.val(Number(formVal.toFixed(3)));
+    }
+
     // Number of iterations for Lloyd's Relaxation
     var _lloydsRelaxation = 0;
 
@@ -358,6 +520,67 @@ $(function() {
 
     setPropertyLloyds(DEFAULT_LLOYDS_ITERATIONS);
 
+    // How the cell centroids are found while relaxing
+    const RelaxMode = {
+        Exact: 'exact',     // Cell polygons, clipped to the profile
+        Raster: 'raster'    // Profile rasterized into a grid (see relaxCellSitesRaster)
+    };
+
+    // Restart the relaxation from the original sites
+    function restartRelaxation() {
+        setLloydsCounter(propertyLloyds());
+        initRelaxedCellSites();
+        updateView();
+    }
+
+    const $valueRelaxMode = $('#relaxModeSelect');
+    $valueRelaxMode.change(() => {
+        $valueRelaxGrid.prop( "disabled", propertyRelaxMode() !== RelaxMode.Raster );
+        $valueRelaxExactFinal.prop( "disabled", propertyRelaxMode() !== RelaxMode.Raster );
+        restartRelaxation();
+    });
+
+    function propertyRelaxMode() {
+        return ($valueRelaxMode.val() === RelaxMode.Raster) ? RelaxMode.Raster : RelaxMode.Exact;
+    }
+
+    function setPropertyRelaxMode(val) {
+        $valueRelaxMode.val(val);
+        $valueRelaxGrid.prop( "disabled", val !== RelaxMode.Raster );
+        $valueRelaxExactFinal.prop( "disabled", val !== RelaxMode.Raster );
+    }
+
+    // Raster relaxation grid resolution
+    const $valueSpanRelaxGrid = $('#relaxGridValueSpan');
+    const $valueRelaxGrid = $('#relaxGridRange');
+    $valueSpanRelaxGrid.html($valueRelaxGrid.val());
+    $valueRelaxGrid.on('input change', () => {
+        $valueSpanRelaxGrid.html($valueRelaxGrid.val());
+        restartRelaxation();
+    });
+
+    function propertyRelaxGrid() {
+        return Number($valueRelaxGrid.val());
+    }
+
+    function setPropertyRelaxGrid(val) {
+        $valueRelaxGrid.val(val);
+        $valueSpanRelaxGrid.html(val);
+    }
+
+    // Finish the raster relaxation with an exact iteration
+    const $valueRelaxExactFinal = $('#relaxExactFinalCheckbox');
+    $valueRelaxExactFinal.change( () => {
+        restartRelaxation();
+    });
+
+    function propertyRelaxExactFinal() {
+        return ($valueRelaxExactFinal.is(":checked"));
+    }
+
+    setPropertyRelaxMode(RelaxMode.Exact);
+    setPropertyRelaxGrid(DEFAULT_RELAX_GRID);
+
     // Units indicator
     const $valueUnitsIndicator = $('.units');
     function updatePropertyUnitsIndicator() {
@@ -402,6 +625,8 @@ $(function() {
         updatePropertyUnitsIndicator();
         updateCellGapForUnits();
         setPropertyPagePadding(_padding);
+        setPropertyTileSize(_tileSize);
+        setPropertyArcTolerance(_arcTolerance);
     }
 
     updatePropertyUnitsIndicator();
@@ -445,6 +670,25 @@ $(function() {
         $valueClipCellsIntersect.prop( "disabled", isClippingDisabled );
     }
 
+    // Curved face surface (see _surface)
+    function propertySurface() {
+        return _surface;
+    }
+
+    function setPropertySurface(surface) {
+        if (surface !== undefined && surface !== null && surface.density !== undefined &&
+            surface.density.length === surface.cols * surface.rows) {
+            _surface = surface;
+        }
+        else {
+            _surface = null;
+        }
+
+        // The cells are wrapped onto a curved face as splines whatever the format
+        $valuePublishFormat.prop( "disabled", _surface !== null );
+        $valueArcTolerance.prop( "disabled", _surface !== null || propertyPublishFormat() !== PublishFormat.Arcs );
+    }
+
     // Clip Outside and Intersect Profile
 
     const $valueClipCellsOutside = $('#clipCellsOutsideCheckbox');
@@ -536,21 +780,24 @@ $(function() {
         $valueClipCellsIntersect.prop( "disabled", isEnabled || !hasProfile );
 
         var cellStyle = propertyCellEdgeStyle();
-        var isShape = (cellStyle != CellEdgeStyle.Curved && cellStyle != CellEdgeStyle.Straight);
+        var isShape = isShapeEdgeStyle(cellStyle);
         $valueCellGap.prop( "disabled", isShape );
         $valueCellScale.prop( "disabled", !isShape );
 
         $valueCellEdgeStyle.prop( "disabled", isEnabled );
         $valueCellCount.prop( "disabled", isEnabled );
+        $valueCellCountInput.prop( "disabled", isEnabled );
         $valueLloyds.prop( "disabled", isEnabled );
+        $valueRelaxMode.prop( "disabled", isEnabled );
         $valuePagePadding.prop( "disabled", isEnabled );
+        $valueTileMode.prop( "disabled", isEnabled );
     }
 
     // Change in the cell edge style
     function cellEdgeStyleChanged() {
 
         var cellStyle = propertyCellEdgeStyle();
-        var isShape = (cellStyle != CellEdgeStyle.Curved && cellStyle != CellEdgeStyle.Straight);
+        var isShape = isShapeEdgeStyle(cellStyle);
         $valueCellGap.prop( "disabled", isShape );
         $valueCellScale.prop( "disabled", !isShape );
 
@@ -735,6 +982,55 @@ $(function() {
         }
     }
 
+    // Convert a point (pixels) to the profile's coordinates (centimeters).  This
+    // is the inverse of the mapping in createProfilePath().
+    function profilePixelsToCms(px, py) {
+        return [pixels2cms(px) + _profileBounds.xmin, _profileBounds.ymax - pixels2cms(py)];
+    }
+
+    // Return the surface density (0-1) at a point (pixels).  Always 1 when not
+    // generating for a curved face.
+    function surfaceDensityAt(px, py) {
+        if (_surface === null) return 1;
+
+        var [x, y] = profilePixelsToCms(px, py);
+        var col = Math.floor(x / _surface.width * _surface.cols);
+        var row = Math.floor(y / _surface.height * _surface.rows);
+        col = Math.min(Math.max(col, 0), _surface.cols - 1);
+        row = Math.min(Math.max(row, 0), _surface.rows - 1);
+        return _surface.density[row * _surface.cols + col];
+    }
+
+    // Returns the [x,y] centroid of a polygon.  For a curved face the centroid
+    // is weighted by the surface density so that relaxation evens out the cells
+    // on the surface rather than in parameter space.  The polygon is split into
+    // a triangle fan and each triangle weighted by its area times the density
+    // at its centroid.
+    function cellCentroid(pts) {
+        if (_surface === null) {
+            return d3.polygonCentroid(pts);
+        }
+
+        var sumW = 0, sumX = 0, sumY = 0;
+        var [x0, y0] = pts[0];
+        for (var k = 1; k < pts.length - 1; k++) {
+            var [x1, y1] = pts[k];
+            var [x2, y2] = pts[k+1];
+            var area = ((x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0)) / 2;
+            var cx = (x0 + x1 + x2) / 3;
+            var cy = (y0 + y1 + y2) / 3;
+            var w = area * surfaceDensityAt(cx, cy);
+            sumW += w;
+            sumX += w * cx;
+            sumY += w * cy;
+        }
+
+        if (Math.abs(sumW) < 1e-10) {
+            return d3.polygonCentroid(pts);
+        }
+        return [sumX / sumW, sumY / sumW];
+    }
+
     // Returns the [x,y] centroid of a paper Path / CompoundPath made of straight
     // segments, or null if it has no usable area.  For a CompoundPath the largest
     // child is used (the clipped cell may split into slivers along a concave edge).
@@ -758,11 +1054,22 @@ $(function() {
             pts.push([path.segments[s].point.x, path.segments[s].point.y]);
         }
 
-        var centroid = d3.polygonCentroid(pts);
+        var centroid = cellCentroid(pts);
         if (isNaN(centroid[0]) || isNaN(centroid[1])) return null;
         return centroid;
     }
 
+    // Returns true if all of the points of a Voronoi cell polygon are inside the
+    // profile path.
+    function isCellInsideProfile(cell, profilePath) {
+        for (var k = 0; k < cell.length - 1; k++) { // last point dups the first
+            if (!profilePath.contains(new paper.Point(cell[k][0], cell[k][1]))) {
+                return false;
+            }
+        }
+        return true;
+    }
+
     // Centroid of a Voronoi cell constrained to the profile (clipped Lloyd's
     // relaxation).  d3 bounds the Voronoi to the profile's rectangular bounding
     // box, so without this the centroids of boundary cells sit out in the box
@@ -771,18 +1078,11 @@ $(function() {
     // the plain polygon centroid; only boundary cells pay for the clip.
     function constrainedCellCentroid(cell, profilePath) {
         if (profilePath === null) {
-            return d3.polygonCentroid(cell);
+            return cellCentroid(cell);
         }
 
-        var allInside = true;
-        for (var k = 0; k < cell.length - 1; k++) { // last point dups the first
-            if (!profilePath.contains(new paper.Point(cell[k][0], cell[k][1]))) {
-                allInside = false;
-                break;
-            }
-        }
-        if (allInside) {
-            return d3.polygonCentroid(cell);
+        if (isCellInsideProfile(cell, profilePath)) {
+            return cellCentroid(cell);
         }
 
         // Boundary cell: clip it to the profile and use the clipped centroid.
@@ -801,6 +1101,447 @@ $(function() {
         return centroid; // null if the clip produced no area
     }
 
+    /////////////////////////////////////////////////////////////////////////
+    // Relaxation
+
+    // Move a site towards its cell centroid.  The site is left where it is if
+    // the move would take it out of the profile (isInside(x,y) returns false).
+    function moveCellSiteTowards(index, centroid, isInside) {
+        const [x0, y0] = cellSiteAt(index);
+        const [x1, y1] = centroid;
+
+        var xNew = x0 + (x1 - x0) * LLOYDS_OMEGA;
+        var yNew = y0 + (y1 - y0) * LLOYDS_OMEGA;
+
+        // Safety net: never let a site leave the profile.  If the move
+        // would exit it, keep the site at its (inside) previous spot.
+        if (isInside !== null && !isInside(xNew, yNew)) {
+            return;
+        }
+
+        setCellSiteAt(index, xNew, yNew);
+    }
+
+    // One iteration of Lloyd's relaxation using the exact (profile clipped)
+    // centroid of each cell.  If indices is given only those sites are moved.
+    function relaxCellSitesExact(indices = null) {
+        // Constrain relaxation to the profile (gap path if present) so
+        // sites distribute within the actual shape instead of drifting
+        // out toward the rectangular Voronoi bounds.
+        let profilePathRelax = _profilePathGap !== null ? _profilePathGap : _profilePath;
+        let isInside = (profilePathRelax === null) ? null :
+            (x, y) => profilePathRelax.contains(new paper.Point(x, y));
+
+        // Move the cell sites towards their cell centroids
+        var count = (indices !== null) ? indices.length : cellSitesCount();
+        for (var k = 0; k < count; k++) {
+            var i = (indices !== null) ? indices[k] : k;
+            var cell = _voronoi.cellPolygon(i);
+            if (cell == null) continue;
+
+            var centroid = constrainedCellCentroid(cell, profilePathRelax);
+            if (centroid == null) continue; // clip produced no area; leave site put
+
+            moveCellSiteTowards(i, centroid, isInside);
+        }
+    }
+
+    // The profile (or page) rasterized into a grid for the raster relaxation.
+    // weights holds the weight of each grid cell: 0 outside of the profile,
+    // otherwise 1 (or the surface density for a curved face).  Rebuilt when
+    // the profile, page or resolution changes.
+    var _relaxRaster = null;
+
+    function relaxRaster() {
+        let profilePath = _profilePathGap !== null ? _profilePathGap : _profilePath;
+
+        var padding = cms2pixels(propertyPagePadding());
+        var bounds = (profilePath !== null) ? profilePath.bounds :
+            new paper.Rectangle(padding + 1, padding + 1, _pageWidthInner - 1, _pageHeightInner - 1);
+
+        var resolution = propertyRelaxGrid();
+        var key = [resolution, bounds.x, bounds.y, bounds.width, bounds.height,
+                   (profilePath !== null) ? profilePath.id : -1, (_surface !== null)].join('|');
+        if (_relaxRaster !== null && _relaxRaster.key === key) {
+            return _relaxRaster;
+        }
+
+        var cellSize = Math.max(bounds.width, bounds.height) / resolution;
+        var cols = Math.max(1, Math.ceil(bounds.width / cellSize));
+        var rows = Math.max(1, Math.ceil(bounds.height / cellSize));
+        var weights = new Float32Array(cols * rows);
+
+        if (profilePath !== null) {
+            // Draw the profile into an offscreen canvas with a pixel per grid cell
+            var canvasMask = document.createElement('canvas');
+            canvasMask.width = cols;
+            canvasMask.height = rows;
+            var ctx = canvasMask.getContext('2d');
+            ctx.setTransform(1 / cellSize, 0, 0, 1 / cellSize, -bounds.x / cellSize, -bounds.y / cellSize);
+            ctx.fill(new Path2D(profilePath.pathData), 'evenodd');
+
+            var pixels = ctx.getImageData(0, 0, cols, rows).data;
+            for (var i = 0; i < weights.length; i++) {
+                weights[i] = (pixels[4*i + 3] >= 128) ? 1 : 0;
+            }
+        }
+        else {
+            weights.fill(1);
+        }
+
+        if (_surface !== null) {
+            for (var row = 0; row < rows; row++) {
+                for (var col = 0; col < cols; col++) {
+                    var i = row * cols + col;
+                    if (weights[i] > 0) {
+                        weights[i] = surfaceDensityAt(bounds.x + (col + 0.5) * cellSize, bounds.y + (row + 0.5) * cellSize);
+                    }
+                }
+            }
+        }
+
+        _relaxRaster = {
+            key: key,
+            x: bounds.x,
+            y: bounds.y,
+            cellSize: cellSize,
+            cols: cols,
+            rows: rows,
+            weights: weights
+        };
+        return _relaxRaster;
+    }
+
+    // Returns true if the point (pixels) is in a grid cell inside the profile
+    function isInsideRelaxRaster(raster, x, y) {
+        var col = Math.floor((x - raster.x) / raster.cellSize);
+        var row = Math.floor((y - raster.y) / raster.cellSize);
+        if (col < 0 || row < 0 || col >= raster.cols || row >= raster.rows) {
+            return false;
+        }
+        return raster.weights[row * raster.cols + col] > 0;
+    }
+
+    // Centroids of the cells approximated on the rasterized profile.  Each grid
+    // cell inside the profile is assigned to its nearest site and the
+    // centroids of all of the cells are accumulated in a single sweep over the
+    // grid.  The nearest site is found by walking the Delaunay triangulation
+    // from the previous grid cell's site, and the sweep is serpentine so that
+    // walk is usually a step or two.  The cost depends on the grid resolution
+    // rather than on the profile's complexity.  Returns an [x,y] centroid per
+    // site, or null for a site without any grid cells.
+    function rasterCellCentroids(raster) {
+        var count = cellSitesCount();
+
+        var sumW = new Float64Array(count);
+        var sumX = new Float64Array(count);
+        var sumY = new Float64Array(count);
+
+        var site = 0;
+        for (var row = 0; row < raster.rows; row++) {
+            var y = raster.y + (row + 0.5) * raster.cellSize;
+            var isReversed = (row % 2) === 1;
+            for (var c = 0; c < raster.cols; c++) {
+                var col = isReversed ? raster.cols - 1 - c : c;
+                var w = raster.weights[row * raster.cols + col];
+                if (w <= 0) continue;
+
+                var x = raster.x + (col + 0.5) * raster.cellSize;
+                site = _delaunay.find(x, y, site);
+                sumW[site] += w;
+                sumX[site] += w * x;
+                sumY[site] += w * y;
+            }
+        }
+
+        var centroids = new Array(count);
+        for (var i = 0; i < count; i++) {
+            centroids[i] = (sumW[i] > 0) ? [sumX[i] / sumW[i], sumY[i] / sumW[i]] : null;
+        }
+        return centroids;
+    }
+
+    // One iteration of Lloyd's relaxation using the raster centroids
+    function relaxCellSitesRaster() {
+        var raster = relaxRaster();
+        var centroids = rasterCellCentroids(raster);
+
+        var isInside = (_profilePath === null) ? null :
+            (x, y) => isInsideRelaxRaster(raster, x, y);
+
+        for (var i = 0; i < centroids.length; i++) {
+            if (centroids[i] === null) continue;    // No grid cells; leave site put
+            moveCellSiteTowards(i, centroids[i], isInside);
+        }
+    }
+
+    // One iteration of relaxation using the selected mode.  isLast is true for
+    // the final iteration, which is exact if requested.
+    function relaxCellSitesStep(isLast) {
+        if (propertyTileMode()) {
+            relaxCellSitesTile();
+        }
+        else if (propertyRelaxMode() === RelaxMode.Raster && !(isLast && propertyRelaxExactFinal())) {
+            relaxCellSitesRaster();
+        }
+        else {
+            relaxCellSitesExact();
+        }
+    }
+
+    // Mean distance from each site to its exact (profile clipped) cell
+    // centroid, relative to the average cell spacing.  Zero for a perfectly
+    // relaxed (centroidal) diagram.
+    function relaxationResidual() {
+        let profilePath = _profilePathGap !== null ? _profilePathGap : _profilePath;
+        var area = (profilePath !== null) ? Math.abs(profilePath.area) : _pageWidthInner * _pageHeightInner;
+        var spacing = Math.sqrt(area / Math.max(1, cellSitesCount()));
+
+        var sum = 0, count = 0;
+        for (var i = 0, l = cellSitesCount(); i < l; i++) {
+            var cell = _voronoi.cellPolygon(i);
+            if (cell == null) continue;
+            var centroid = constrainedCellCentroid(cell, profilePath);
+            if (centroid == null) continue;
+            sum += getDistanceArray(cellSiteAt(i), centroid);
+            count++;
+        }
+        return (count > 0) ? sum / count / spacing : 0;
+    }
+
+    // Compare the speed and quality of the relaxation modes on the current
+    // sites.  Call from the console, e.g. benchmarkRelaxation(50).  Each mode
+    // starts from the original (unrelaxed) sites and the current diagram is
+    // restored afterwards.
+    window.benchmarkRelaxation = function(iterations = DEFAULT_LLOYDS_ITERATIONS, resolutions = [128, 256, 512]) {
+        if (_cellSites.length === 0) return [];
+
+        var counterSaved = lloydsCounter();
+        var sitesSaved = _cellSitesRelaxed.map(site => [site[0], site[1]]);
+        var modeSaved = propertyRelaxMode();
+        var gridSaved = propertyRelaxGrid();
+
+        function run(name, relax) {
+            initRelaxedCellSites();
+            generateVoronoi();
+
+            var timeStart = performance.now();
+            for (var i = 0; i < iterations; i++) {
+                relax();
+                generateVoronoi();
+            }
+            var ms = performance.now() - timeStart;
+
+            return {
+                mode: name,
+                cells: cellSitesCount(),
+                iterations: iterations,
+                ms: Math.round(ms),
+                msPerIteration: Number((ms / iterations).toFixed(2)),
+                residual: Number(relaxationResidual().toFixed(4)),
+                sites: _cellSitesRelaxed.map(site => [site[0], site[1]])
+            };
+        }
+
+        var results = [run('exact', relaxCellSitesExact)];
+        resolutions.forEach(function(resolution) {
+            $valueRelaxGrid.val(resolution);
+            results.push(run('raster ' + resolution, relaxCellSitesRaster));
+        });
+
+        // Average distance (pixels) of each mode's sites from the exact sites
+        var sitesExact = results[0].sites;
+        results.forEach(function(result) {
+            var sum = 0;
+            for (var i = 0; i < sitesExact.length; i++) {
+                sum += getDistanceArray(sitesExact[i], result.sites[i]);
+            }
+            result.offsetFromExact = Number((sum / sitesExact.length).toFixed(2));
+            delete result.sites;
+        });
+
+        setPropertyRelaxMode(modeSaved);
+        setPropertyRelaxGrid(gridSaved);
+        _cellSitesRelaxed = sitesSaved;
+        setLloydsCounter(counterSaved);
+        generateVoronoi();
+        updateView();
+
+        console.table(results);
+        return results;
+    };
+
+    /////////////////////////////////////////////////////////////////////////
+    // Tiles
+    //
+    // In tile mode the cell sites are in tile coordinates, [0, tile size).
+    // The Voronoi is built from the sites plus copies of them shifted into the
+    // 8 surrounding tiles so the tile's cells are those of an infinitely
+    // repeating pattern.  The tile's own sites come first, so site i of the
+    // tile is also site/cell i of the Delaunay and Voronoi, and the rest of
+    // the editor can use them as usual.
+
+    // Offsets (in tiles) of the copies of the sites.  The tile itself first.
+    const TILE_COPY_OFFSETS = [[0,0], [-1,-1], [0,-1], [1,-1], [-1,0], [1,0], [-1,1], [0,1], [1,1]];
+
+    function tileSizePixels() {
+        return cms2pixels(propertyTileSize());
+    }
+
+    function generateTileVoronoi() {
+        var tileSize = tileSizePixels();
+        var count = _cellSitesRelaxed.length;
+
+        var points = new Float64Array(count * TILE_COPY_OFFSETS.length * 2);
+        for (var c = 0; c < TILE_COPY_OFFSETS.length; c++) {
+            var [dx, dy] = TILE_COPY_OFFSETS[c];
+            for (var i = 0; i < count; i++) {
+                points[2 * (c * count + i)] = _cellSitesRelaxed[i][0] + dx * tileSize;
+                points[2 * (c * count + i) + 1] = _cellSitesRelaxed[i][1] + dy * tileSize;
+            }
+        }
+
+        _delaunay = new d3.Delaunay(points);
+        _voronoi = _delaunay.voronoi([-tileSize, -tileSize, 2 * tileSize, 2 * tileSize]);
+    }
+
+    // One iteration of Lloyd's relaxation for a tile.  Sites that move across
+    // an edge of the tile wrap around to the opposite edge.
+    function relaxCellSitesTile() {
+        var tileSize = tileSizePixels();
+        for (var i = 0, l = cellSitesCount(); i < l; i++) {
+            var cell = _voronoi.cellPolygon(i);
+            if (cell == null) continue;
+
+            const [x0, y0] = cellSiteAt(i);
+            const [x1, y1] = cellCentroid(cell);
+
+            var xNew = x0 + (x1 - x0) * LLOYDS_OMEGA;
+            var yNew = y0 + (y1 - y0) * LLOYDS_OMEGA;
+
+            setCellSiteAt(i, ((xNew % tileSize) + tileSize) % tileSize, ((yNew % tileSize) + tileSize) % tileSize);
+        }
+    }
+
+    // The path the tiles are clipped to.  The profile (gap path) if there is
+    // one, otherwise the page inside its padding.
+    function tileClipPath() {
+        if (propertyProfile().length > 0 && _profilePathGap !== null) {
+            return _profilePathGap;
+        }
+        var padding = cms2pixels(propertyPagePadding());
+        return new paper.Path.Rectangle({
+            rectangle: new paper.Rectangle(padding + 1, padding + 1, _pageWidthInner - 1, _pageHeightInner - 1),
+            insert: false
+        });
+    }
+
+    // Offsets (pixels) of the tiles covering the clip path.  The offsets are
+    // on a grid starting at the clip path's corner.  The cells along a tile's
+    // edges extend past it, so the grid starts before the corner with the
+    // first tile whose cells (cellBounds from tileCellBounds()) reach into
+    // the clip path's bounds and ends with the last one.
+    function tileOffsets(clipPath, cellBounds) {
+        var tileSize = tileSizePixels();
+        var bounds = clipPath.bounds;
+
+        var xStart = bounds.x + (Math.floor(-cellBounds.right / tileSize) + 1) * tileSize;
+        var yStart = bounds.y + (Math.floor(-cellBounds.bottom / tileSize) + 1) * tileSize;
+
+        var offsets = [];
+        for (var y = yStart; y + cellBounds.y < bounds.bottom; y += tileSize) {
+            for (var x = xStart; x + cellBounds.x < bounds.right; x += tileSize) {
+                offsets.push([x, y]);
+            }
+        }
+        return offsets;
+    }
+
+    // Bounds (tile coordinates) of all of the tile's cells.  Cells along the
+    // tile's edges extend past it.
+    function tileCellBounds() {
+        var xMin = Infinity, yMin = Infinity, xMax = -Infinity, yMax = -Infinity;
+        for (var i = 0, l = cellSitesCount(); i < l; i++) {
+            var cell = _voronoi.cellPolygon(i);
+            if (cell == null) continue;
+            for (var k = 0; k < cell.length; k++) {
+                xMin = Math.min(xMin, cell[k][0]); xMax = Math.max(xMax, cell[k][0]);
+                yMin = Math.min(yMin, cell[k][1]); yMax = Math.max(yMax, cell[k][1]);
+            }
+        }
+        return new paper.Rectangle(xMin, yMin, xMax - xMin, yMax - yMin);
+    }
+
+    const TilePlacement = {
+        Inside: 0,      // All of the tile's cells are inside the clip path
+        Outside: 1,     // All of the tile's cells are outside the clip path
+        Boundary: 2     // The clip path's edge crosses the tile's cells
+    };
+
+    // Where the cells of the tile at offset are relative to the clip path.
+    // cellBounds is from tileCellBounds().
+    function tilePlacement(cellBounds, offset, clipPath) {
+        var rect = new paper.Rectangle(cellBounds.x + offset[0], cellBounds.y + offset[1], cellBounds.width, cellBounds.height);
+        if (!rect.intersects(clipPath.bounds)) {
+            return TilePlacement.Outside;
+        }
+
+        // Any of the clip path's points in the rect (e.g. a hole) makes it a
+        // boundary tile even if no edge crosses the rect's edges.
+        var paths = (clipPath.className === 'CompoundPath') ? clipPath.children : [clipPath];
+        for (var iPath = 0; iPath < paths.length; iPath++) {
+            var segments = paths[iPath].segments;
+            for (var k = 0; k < segments.length; k++) {
+                if (rect.contains(segments[k].point)) {
+                    return TilePlacement.Boundary;
+                }
+            }
+        }
+
+        var rectPath = new paper.Path.Rectangle({ rectangle: rect, insert: false });
+        var isIntersecting = clipPath.intersects(rectPath);
+        rectPath.remove();
+
+        if (isIntersecting) {
+            return TilePlacement.Boundary;
+        }
+        return clipPath.contains(rect.center) ? TilePlacement.Inside : TilePlacement.Outside;
+    }
+
+    // Draw the tiles.  The tile's cells are drawn once into a symbol and an
+    // instance of it is placed for each tile inside the clip path.  Only the
+    // tiles crossing the clip path's edge are drawn as individual cells so
+    // they can be clipped.
+    function drawTiles() {
+        var clipPath = tileClipPath();
+        var cellBounds = tileCellBounds();
+
+        var tile = new paper.Group();
+        for (var i = 0, l = cellSitesCount(); i < l; i++) {
+            var path = createVoronoiPath(i);
+            if (path !== null) {
+                tile.addChild(path);
+            }
+        }
+        var definition = new paper.SymbolDefinition(tile, true);
+
+        tileOffsets(clipPath, cellBounds).forEach(function(offset) {
+            var placement = tilePlacement(cellBounds, offset, clipPath);
+            if (placement === TilePlacement.Boundary) {
+                for (var i = 0, l = cellSitesCount(); i < l; i++) {
+                    var path = createVoronoiPath(i);
+                    if (path !== null) {
+                        path.translate(offset);
+                        clipCellPathToProfile(path, i, offset, clipPath, true);
+                    }
+                }
+            }
+            else if (placement === TilePlacement.Inside || !propertyClipCellsOutside()) {
+                definition.place(new paper.Point(offset[0], offset[1]));
+            }
+        });
+    }
+
     function cellSitesCount() {
         return _cellSitesRelaxed.length;
     }
@@ -840,6 +1581,11 @@ $(function() {
 
     function generateVoronoi() {
 
+        if (propertyTileMode()) {
+            generateTileVoronoi();
+            return;
+        }
+
         _delaunay = d3.Delaunay.from(_cellSitesRelaxed);
 
         var padding = cms2pixels(propertyPagePadding());
@@ -955,6 +1701,15 @@ $(function() {
         // Create a set of random cell sites.  These are center points of each cell.
         var sites = [];
 
+        // In tile mode the sites are in a single tile (see generateTileVoronoi)
+        if (propertyTileMode()) {
+            var tileSize = tileSizePixels();
+            for (var iCells = 0; iCells < countCells; ++iCells) {
+                sites.push([nextRandomNumber() * tileSize, nextRandomNumber() * tileSize]);
+            }
+            return sites;
+        }
+
         // Create a set of random cell sites.  These are center points of each cell.
         // The sites must fall within the bounds of the Paper.js profile gap path if
         // it exists.  Otherwise, within the profile path.
@@ -964,7 +1719,10 @@ $(function() {
                 var siteX = nextRandomNumber() * _pageWidthInner + padding;
                 var siteY = nextRandomNumber() * _pageHeightInner + padding;
                 
-                if (profilePath.contains(new paper.Point(siteX, siteY))) {
+                // On a curved face, also reject by the surface density so
+                // stretched areas of the surface get proportionally more sites.
+                if (profilePath.contains(new paper.Point(siteX, siteY)) &&
+                    (_surface === null || nextRandomNumber() < surfaceDensityAt(siteX, siteY))) {
                     sites.push([siteX, siteY]);
                 }
                 else {
@@ -989,7 +1747,12 @@ $(function() {
     function generateCells(forceCellUpdate = false) {
         // Need to update cell sites?
         var newCellSitesCount = propertyCellCount();
-        if (forceCellUpdate || _cellSitesCount !== newCellSitesCount) {
+        if (!forceCellUpdate && _cellSitesCount !== newCellSitesCount && _voronoi !== null && _cellSites.length > 0 &&
+            !propertyTileMode()) {
+            // Just the count changed so keep the relaxed sites
+            updateCellSitesCount(newCellSitesCount);
+        }
+        else if (forceCellUpdate || _cellSitesCount !== newCellSitesCount) {
             _cellSites = generateCellSites(newCellSitesCount);
             _cellSitesCount = _cellSites.length;
 
@@ -1002,16 +1765,153 @@ $(function() {
         }
     }
 
-    /////////////////////////////////////////////////////////////////////////
+    // Number of relaxation passes run around the sites changed by a cell count
+    // change
+    const LOCAL_RELAX_PASSES = 3;
+    const MAX_INSERT_ROUNDS = 20;           // Insertion gives up after this many rounds
+    const LARGE_DECREASE_FRACTION = 0.25;   // Removing more than this relaxes all sites again
 
-    const POINT_OP = {Add: 0, Sub: 1, Div: 2, Mul: 3};
+    // Add or remove sites to get to the new count without starting over.  The
+    // relaxed sites are kept.  New sites are inserted into the largest cells,
+    // halfway from the site towards its farthest corner inside the profile,
+    // and the sites of the smallest cells are removed.  The original and
+    // relaxed site arrays are changed together so they stay aligned.  Then a
+    // few relaxation passes are run over just the changed sites and their
+    // neighbors.  After a large decrease all of the sites are relaxed again.
+    function updateCellSitesCount(countCells) {
+        let profilePath = _profilePathGap !== null ? _profilePathGap : _profilePath;
 
-    // HACK!  Used for paper point ops.  They fail to work so this hack.
-    // OP: arg1 OP arg2
-    // Add: point + point
-    // Sub: point - point
-    // Div: point / num
-    // Mul: point * num
+        var changed = new Set();    // Indices (after the change) of sites to relax
+        var isRelaxAll = false;
+
+        // Area of each cell, in the diagram's current state
+        function cellAreas() {
+            var areas = new Float64Array(cellSitesCount());
+            for (var i = 0; i < areas.length; i++) {
+                var cell = _voronoi.cellPolygon(i);
+                areas[i] = (cell == null) ? 0 : Math.abs(d3.polygonArea(cell));
+            }
+            return areas;
+        }
+
+        // Indices of the sites ordered by the area of their cells
+        function sortedByArea(areas, isDescending) {
+            var indices = Array.from(areas.keys());
+            indices.sort((a, b) => isDescending ? areas[b] - areas[a] : areas[a] - areas[b]);
+            return indices;
+        }
+
+        // Insert, a round at a time since each cell gets at most one new site
+        for (var round = 0; round < MAX_INSERT_ROUNDS && cellSitesCount() < countCells; round++) {
+            var countBefore = cellSitesCount();
+            var order = sortedByArea(cellAreas(), true);
+            var countAdd = Math.min(countCells - countBefore, order.length);
+
+            for (var k = 0; k < order.length && cellSitesCount() - countBefore < countAdd; k++) {
+                var i = order[k];
+                var cell = _voronoi.cellPolygon(i);
+                if (cell == null) continue;
+
+                // Corners, farthest from the site first
+                const [x0, y0] = cellSiteAt(i);
+                var corners = cell.slice(0, cell.length - 1);
+                corners.sort((a, b) => getDistanceArray([x0, y0], b) - getDistanceArray([x0, y0], a));
+
+                for (var c = 0; c < corners.length; c++) {
+                    var site = [(x0 + corners[c][0]) / 2, (y0 + corners[c][1]) / 2];
+                    if (profilePath === null || profilePath.contains(new paper.Point(site[0], site[1]))) {
+                        _cellSites.push([site[0], site[1]]);
+                        _cellSitesRelaxed.push(site);
+                        changed.add(_cellSitesRelaxed.length - 1);
+                        break;
+                    }
+                }
+            }
+
+            generateVoronoi();
+
+            if (cellSitesCount() === countBefore) {
+                break;  // No room left for more sites
+            }
+        }
+
+        if (cellSitesCount() < countCells) {
+            console.log("Inserted " + (cellSitesCount() - _cellSitesCount) + " cell sites, " +
+                (countCells - cellSitesCount()) + " short of " + countCells + ".");
+        }
+
+        // Remove the sites of the smallest cells.  Their neighbors get relaxed.
+        if (cellSitesCount() > countCells) {
+            var order = sortedByArea(cellAreas(), false);
+            var isRemoved = new Uint8Array(cellSitesCount());
+            var countRemove = cellSitesCount() - Math.max(countCells, 2);
+            for (var k = 0; k < countRemove; k++) {
+                isRemoved[order[k]] = 1;
+            }
+
+            // The smallest cells are removed in one batch, so after a large
+            // decrease the survivors are far from relaxed
+            isRelaxAll = countRemove > LARGE_DECREASE_FRACTION * cellSitesCount();
+
+            var neighbors = new Set();
+            for (var i = 0; i < isRemoved.length; i++) {
+                if (isRemoved[i]) {
+                    for (const j of _delaunay.neighbors(i)) {
+                        neighbors.add(j);
+                    }
+                }
+            }
+
+            // Compact the arrays, mapping the old indices to the new ones
+            var indexNew = new Int32Array(isRemoved.length);
+            var count = 0;
+            for (var i = 0; i < isRemoved.length; i++) {
+                indexNew[i] = -1;
+                if (isRemoved[i]) continue;
+                _cellSites[count] = _cellSites[i];
+                _cellSitesRelaxed[count] = _cellSitesRelaxed[i];
+                indexNew[i] = count++;
+            }
+            _cellSites.length = count;
+            _cellSitesRelaxed.length = count;
+
+            changed = new Set([...changed].map(i => indexNew[i]).filter(i => i >= 0));
+            neighbors.forEach(j => { if (indexNew[j] >= 0) changed.add(indexNew[j]); });
+
+            generateVoronoi();
+        }
+
+        _cellSitesCount = _cellSites.length;
+
+        // Relax the changed sites and their neighbors
+        for (var pass = 0; pass < LOCAL_RELAX_PASSES && changed.size > 0; pass++) {
+            var indices = new Set(changed);
+            changed.forEach(i => {
+                for (const j of _delaunay.neighbors(i)) {
+                    indices.add(j);
+                }
+            });
+
+            relaxCellSitesExact(Array.from(indices));
+            generateVoronoi();
+        }
+
+        // Then relax all of the sites again, a pass per frame
+        if (isRelaxAll) {
+            setLloydsCounter(propertyLloyds());
+        }
+    }
+
+    /////////////////////////////////////////////////////////////////////////
+
+    const POINT_OP = {Add: 0, Sub: 1, Div: 2, Mul: 3};
+
+    // HACK!  Used for paper point ops.  They fail to work so this hack.
+    // OP: arg1 OP arg2
+    // Add: point + point
+    // Sub: point - point
+    // Div: point / num
+    // Mul: point * num
     function pointOp(arg1, arg2, op) {
         switch (op) {
             case POINT_OP.Add:
@@ -1053,6 +1953,118 @@ $(function() {
         }
     }
 
+    // Returns true if the edge style places a shape/symbol at each cell
+    // rather than drawing the cell edges.
+    function isShapeEdgeStyle(edgeStyle) {
+        return (edgeStyle != CellEdgeStyle.Curved && edgeStyle != CellEdgeStyle.Straight);
+    }
+
+    // Radius (pixels) of the shared shape definitions.  Each cell scales its
+    // placed instance relative to this.
+    const SHAPE_SYMBOL_RADIUS = 100;
+
+    var _shapeSymbols = {};     // Shape symbol definitions, keyed by edge style
+
+    // Return the shared symbol definition for a shape edge style, creating it
+    // the first time it's needed.  Every cell places an instance of the same
+    // definition so the SVG export stays compact (one <symbol> plus a <use>
+    // per cell) instead of a fully expanded path per cell.
+    function shapeSymbolDefinition(edgeStyle) {
+        if (_shapeSymbols[edgeStyle] !== undefined) {
+            return _shapeSymbols[edgeStyle];
+        }
+
+        var center = new paper.Point(0, 0);
+        var radius = SHAPE_SYMBOL_RADIUS;
+        var size = new paper.Size(radius*2, radius*2);
+        var path = null;
+
+        if (edgeStyle == CellEdgeStyle.Circle) {
+            path = new paper.Path.Circle({ center: center, radius: radius, insert: false });
+        }
+        else if (edgeStyle == CellEdgeStyle.Square) {
+            path = new paper.Path.Rectangle({ point: [-radius, -radius], size: size, insert: false });
+        }
+        else if (edgeStyle == CellEdgeStyle.SquareRounded) {
+            path = new paper.Path.Rectangle({ point: [-radius, -radius], size: size, radius: radius*0.4, insert: false });
+        }
+        else if (edgeStyle == CellEdgeStyle.Star) {
+            path = new paper.Path.Star({ center: center, points: 6, radius1: radius*0.5, radius2: radius, insert: false });
+        }
+        else if (edgeStyle == CellEdgeStyle.Triangle) {
+            path = new paper.Path.RegularPolygon({ center: center, sides: 3, radius: radius, insert: false });
+        }
+        else if (edgeStyle == CellEdgeStyle.Pentagon) {
+            path = new paper.Path.RegularPolygon({ center: center, sides: 5, radius: radius, insert: false });
+        }
+        else if (edgeStyle == CellEdgeStyle.Hexagon) {
+            path = new paper.Path.RegularPolygon({ center: center, sides: 6, radius: radius, insert: false });
+        }
+        else if (edgeStyle == CellEdgeStyle.Octogon) {
+            path = new paper.Path.RegularPolygon({ center: center, sides: 8, radius: radius, insert: false });
+        }
+
+        var definition = null;
+        if (path !== null) {
+            setCellPathAttributes(path, edgeStyle);
+            path.strokeScaling = false;     // Keep a constant stroke however the instance is scaled
+            definition = new paper.SymbolDefinition(path, true);   // Already centered on 0,0
+        }
+
+        _shapeSymbols[edgeStyle] = definition;
+        return definition;
+    }
+
+    // Expand a placed shape symbol into a stand-alone path (not inserted) with
+    // the instance transform applied.  Used where real path geometry is needed,
+    // e.g. for intersecting and clipping against the profile.
+    function expandSymbolItem(item) {
+        var path = item.definition.item.clone({ insert: false });
+        path.transform(item.matrix);
+        return path;
+    }
+
+    var _cellRadii = null;      // Per-site shape radius (pixels), see computeCellRadii()
+
+    // Compute the shape radius for every cell site in a single pass over the
+    // Delaunay triangulation.  The radius of a site is half the distance to
+    // its nearest neighbour, which is always one of its Delaunay neighbours.
+    // Each halfedge is visited once and updates both of its endpoints.
+    function computeCellRadii() {
+        var count = cellSitesCount();
+        var minDistSq = new Float64Array(count).fill(Infinity);
+
+        var triangles = _delaunay.triangles;
+        if (triangles.length > 0) {
+            var points = _delaunay.points;
+            for (var e = 0, l = triangles.length; e < l; e++) {
+                var i = triangles[e];
+                var j = triangles[(e % 3 === 2) ? e - 2 : e + 1];
+                var dx = points[2*i] - points[2*j];
+                var dy = points[2*i+1] - points[2*j+1];
+                var dSq = dx*dx + dy*dy;
+                if (dSq < minDistSq[i]) minDistSq[i] = dSq;
+                if (dSq < minDistSq[j]) minDistSq[j] = dSq;
+            }
+        }
+        else {
+            // Degenerate (e.g. collinear or too few sites) so no triangles.
+            // Fall back to the neighbours d3 derives from the hull.
+            for (var i = 0; i < count; i++) {
+                const center = cellSiteAt(i);
+                for (const j of _delaunay.neighbors(i)) {
+                    var d = getDistanceArray(center, cellSiteAt(j));
+                    if (d*d < minDistSq[i]) minDistSq[i] = d*d;
+                }
+            }
+        }
+
+        _cellRadii = new Float64Array(count);
+        for (var i = 0; i < count; i++) {
+            _cellRadii[i] = Math.sqrt(minDistSq[i]) / 2;     // Infinity if no neighbours
+        }
+    }
+
     function createVoronoiPath(index) {
 
         var cell = _voronoi.cellPolygon(index);
@@ -1064,22 +2076,16 @@ $(function() {
         }
 
         var path = null;
-        var isSymbol = false;
 
         var edgeStyle = propertyCellEdgeStyle();
 
-        if (edgeStyle == CellEdgeStyle.Curved || edgeStyle == CellEdgeStyle.Straight) {
+        const center = cellSiteAt(index);
+
+        if (!isShapeEdgeStyle(edgeStyle)) {
             path = new paper.Path();
             path.closed = true;
             setCellPathAttributes(path, edgeStyle);
-        }
-        else {
-            isSymbol = true;
-        }
-
-        const center = cellSiteAt(index);
 
-        if (!isSymbol) {
             for (var i = 0, l = points.length; i < l; i++) {
                 var point = points[i];
 
@@ -1103,58 +2109,18 @@ $(function() {
             removeSmallBits(path);
         }
         else {
-            var minDistance = Infinity; // Used for shapes/symbols
-
-            for (const j of _voronoi.neighbors(index)) {
-                // Keep track of min distance from center to neighbor centers
-                const centerN = cellSiteAt(j);
-                var d = getDistanceArray(center, centerN);
-                if (d < minDistance) {
-                    minDistance = d;
-                }
-            }
-
             // Need to make a shape?
-            if (minDistance !== Infinity) {
-                var pointCenter = new paper.Point(center[0], center[1]);
-                
-                var halfDist = minDistance/2;
+            var halfDist = (_cellRadii !== null && index < _cellRadii.length) ? _cellRadii[index] : Infinity;
+            var definition = shapeSymbolDefinition(edgeStyle);
 
-                if (edgeStyle == CellEdgeStyle.Circle) {
-                    path = new paper.Path.Circle(pointCenter, halfDist);
-                }
-                else if (edgeStyle == CellEdgeStyle.Square) {
-                    path = new paper.Path.Rectangle(
-                        new paper.Point(pointCenter.x - halfDist, pointCenter.y - halfDist),
-                        new paper.Size(minDistance, minDistance));
-                }
-                else if (edgeStyle == CellEdgeStyle.SquareRounded) {
-                    var rect = new paper.Rectangle(
-                        new paper.Point(pointCenter.x - halfDist, pointCenter.y - halfDist),
-                        new paper.Size(minDistance, minDistance));
-                    path = new paper.Path.Rectangle(rect, new paper.Size(minDistance*0.2, minDistance*0.2));
-                }
-                else if (edgeStyle == CellEdgeStyle.Star) {
-                    path = new paper.Path.Star(pointCenter, 6, halfDist*0.5, halfDist);
-                }
-                else if (edgeStyle == CellEdgeStyle.Triangle) {
-                    path = new paper.Path.RegularPolygon(pointCenter, 3, halfDist);
-                }
-                else if (edgeStyle == CellEdgeStyle.Pentagon) {
-                    path = new paper.Path.RegularPolygon(pointCenter, 5, halfDist);
-                }
-                else if (edgeStyle == CellEdgeStyle.Hexagon) {
-                    path = new paper.Path.RegularPolygon(pointCenter, 6, halfDist);
-                }
-                else if (edgeStyle == CellEdgeStyle.Octogon) {
-                    path = new paper.Path.RegularPolygon(pointCenter, 8, halfDist);
-                }
+            if (halfDist !== Infinity && halfDist > 0 && definition !== null) {
+                var pointCenter = new paper.Point(center[0], center[1]);
 
-                if (path !== null) {
-                    setCellPathAttributes(path, edgeStyle);
-                    path.rotate(Math.random() * 360, pointCenter);
-                    path.scale(propertyCellScale(), propertyCellScale(), pointCenter);
-                }
+                // Place an instance of the shared shape and give it this cell's
+                // transform: random rotation plus scale to fit the cell.
+                path = definition.place(pointCenter);
+                path.rotate(Math.random() * 360, pointCenter);
+                path.scale(propertyCellScale() * halfDist / SHAPE_SYMBOL_RADIUS, pointCenter);
             }
         }
 
@@ -1200,63 +2166,91 @@ $(function() {
             return;
         }
 
+        // Shapes are sized from the nearest neighbour distances.  Compute them
+        // all up front rather than walking the neighbours of each cell.
+        if (isShapeEdgeStyle(propertyCellEdgeStyle())) {
+            computeCellRadii();
+        }
+
+        if (propertyTileMode()) {
+            drawTiles();
+            return;
+        }
+
         for (var i = 0, l = cellSitesCount(); i < l; i++) {
+            clipCellPathToProfile(createVoronoiPath(i), i);
+        }
+    }
 
-            var newPath = createVoronoiPath(i);
+    // If there's a profile, handle clipping the path created for cell site
+    // 'index'.  Returns the path to use for the cell (possibly replaced by the
+    // clipped version) or null if the cell was removed.  For a tile, offset is
+    // the position of the tile the path was moved to and clipPath is the path
+    // to clip to (see drawTiles).  The tiles overlap the clip path's edges, so
+    // their cells are clipped even if their sites are outside of it.
+    function clipCellPathToProfile(newPath, index, offset = [0, 0], clipPath = null, isTile = false) {
+        if (clipPath === null && _profilePath !== null) {
+            clipPath = _profilePathGap;
+        }
 
-            // If there's a profile, handle clipping cells
-            if  (newPath !== null && _profilePath !== null && _profilePathGap !== null) {
+        if  (newPath !== null && clipPath !== null) {
 
-                var removeCell = false;     // Set to true if cell to be clipped
+            var removeCell = false;     // Set to true if cell to be clipped
 
-                var [xCenter, yCenter] = cellSiteAt(i);
-                var ptCenter = new paper.Point(xCenter, yCenter);
+            var [xCenter, yCenter] = cellSiteAt(index);
+            var ptCenter = new paper.Point(xCenter + offset[0], yCenter + offset[1]);
 
-                var isContained = _profilePathGap.contains(newPath.position);
-                var isIntersecting = _profilePathGap.intersects(newPath);
+            // Placed shape symbols have no geometry of their own so test
+            // against an expanded copy.  Only cells that end up clipped
+            // keep the expanded geometry; the rest stay symbol instances.
+            var cellPath = (newPath instanceof paper.SymbolItem) ? expandSymbolItem(newPath) : newPath;
 
-                if (propertyClipCellsOutside()) {
-                    // If cell is outside profile then toss.
-                    removeCell |= (!isContained && !isIntersecting);
-                }
+            var isContained = clipPath.contains(newPath.position);
+            var isIntersecting = clipPath.intersects(cellPath);
 
-                if (isIntersecting) {
+            if (propertyClipCellsOutside()) {
+                // If cell is outside profile then toss.
+                removeCell |= (!isContained && !isIntersecting);
+            }
 
-                    // If cell intersects profile then toss if requested to.
-                    if (propertyClipCellsIntersect()) {
-                        removeCell |= true;
-                    }
-                    // The cell's own site lies outside the usable region, so clipping
-                    // it would leave only a thin sliver hugging the edge — drop it.
-                    else if (!_profilePathGap.contains(ptCenter)) {
-                        removeCell |= true;
-                    }
-                    // Otherwise clip the cell to the profile so it fills exactly up to
-                    // the edge.  (The padding margin is already baked into the gap path,
-                    // so no extra edge culling is needed here.)
-                    else {
-                        var newPathMod = _profilePathGap.intersect(newPath);
-                        newPath.remove();
-                        newPath = newPathMod;
-                        setCellPathAttributes(newPath, propertyCellEdgeStyle());
-
-                        // Need to reparent from profile layer back to Voronoi layer
-                        newPath.remove();
-                        _layerVoronoi.addChild(newPath);
-                    }
-                }
+            if (isIntersecting) {
 
-                if (removeCell) {
-                    newPath.remove();
-                    newPath = null;
+                // If cell intersects profile then toss if requested to.
+                if (propertyClipCellsIntersect()) {
+                    removeCell |= true;
                 }
+                // The cell's own site lies outside the usable region, so clipping
+                // it would leave only a thin sliver hugging the edge — drop it.
+                else if (!isTile && !clipPath.contains(ptCenter)) {
+                    removeCell |= true;
+                }
+                // Otherwise clip the cell to the profile so it fills exactly up to
+                // the edge.  (The padding margin is already baked into the gap path,
+                // so no extra edge culling is needed here.)
                 else {
-                    // TEST: Show center point of cell
-                    // var pathCenter = new paper.Path.Circle(ptCenter, 4);
-                    // pathCenter.strokeColor = isIntersecting ? 'yellow' : isContained ? 'green' : 'red';
+                    var newPathMod = clipPath.intersect(cellPath);
+                    newPath.remove();
+                    newPath = newPathMod;
+                    setCellPathAttributes(newPath, propertyCellEdgeStyle());
+
+                    // Need to reparent from profile layer back to Voronoi layer
+                    newPath.remove();
+                    _layerVoronoi.addChild(newPath);
                 }
             }
+
+            if (removeCell) {
+                newPath.remove();
+                newPath = null;
+            }
+            else {
+                // TEST: Show center point of cell
+                // var pathCenter = new paper.Path.Circle(ptCenter, 4);
+                // pathCenter.strokeColor = isIntersecting ? 'yellow' : isContained ? 'green' : 'red';
+            }
         }
+
+        return newPath;
     }
 
     /////////////////////////////////////////////////////////////////////////
@@ -1301,6 +2295,653 @@ $(function() {
         return svg;
     }
 
+    /////////////////////////////////////////////////////////////////////////
+    // DXF Export
+    //
+    // The drawn cells are written out one at a time as LWPOLYLINE (straight
+    // edges) or SPLINE (curved edges) entities.  Unlike the SVG export the
+    // whole file is never built as one string: the text goes to a sink a
+    // buffer at a time, so memory use doesn't grow with the number of cells
+    // beyond the drawing itself.
+
+    const DXF_LAYER = 'Voronoi';
+    const DXF_FLUSH_CHARS = 65536;      // Text buffered before passing to the sink (or a message to Fusion)
+
+    // Convert a point (pixels) to sketch coordinates (centimeters, Y up)
+    function exportPixelsToCms(px, py) {
+        if (propertyProfile().length > 0) {
+            return profilePixelsToCms(px, py);
+        }
+        return [pixels2cms(px), propertyPageHeight() - pixels2cms(py)];
+    }
+
+    // Convert an array of [x,y] points (pixels) to a flat array of sketch
+    // coordinates [x0,y0,x1,y1,...] (centimeters).
+    function exportPointsToCms(points) {
+        var coords = new Array(points.length * 2);
+        for (var i = 0; i < points.length; i++) {
+            var [x, y] = exportPixelsToCms(points[i][0], points[i][1]);
+            coords[2*i] = Number(x.toFixed(4));
+            coords[2*i+1] = Number(y.toFixed(4));
+        }
+        return coords;
+    }
+
+    // Pass the loops of a paper path to onLoop(coords, isBezier).  Loops with
+    // only straight edges are passed as their vertices.  Otherwise they're
+    // passed as the control points of the closed chain of cubic Béziers
+    // (3 per curve plus the start point).
+    function exportPaperPath(item, onLoop) {
+        var loops = (item.className === 'CompoundPath') ? item.children : [item];
+        for (var iLoop = 0; iLoop < loops.length; iLoop++) {
+            var curves = loops[iLoop].curves;
+            if (curves.length < 2) continue;
+
+            var isBezier = curves.some(function(curve) { return curve.hasHandles(); });
+            var points = [];
+            if (isBezier) {
+                points.push([curves[0].point1.x, curves[0].point1.y]);
+                for (var c = 0; c < curves.length; c++) {
+                    var curve = curves[c];
+                    points.push([curve.point1.x + curve.handle1.x, curve.point1.y + curve.handle1.y]);
+                    points.push([curve.point2.x + curve.handle2.x, curve.point2.y + curve.handle2.y]);
+                    points.push([curve.point2.x, curve.point2.y]);
+                }
+            }
+            else {
+                for (var c = 0; c < curves.length; c++) {
+                    points.push([curves[c].point1.x, curves[c].point1.y]);
+                }
+            }
+            onLoop(exportPointsToCms(points), isBezier);
+        }
+    }
+
+    // Pass the loops of each cell of a drawn item to onLoop(coords, isBezier).
+    // Placed symbols (shape cells and whole tiles) are expanded with their
+    // placement applied, so the export matches what's drawn.
+    function exportPaperItem(item, matrix, onLoop) {
+        if (item instanceof paper.SymbolItem) {
+            exportPaperItem(item.definition.item, matrix.appended(item.matrix), onLoop);
+        }
+        else if (item.className === 'Group' || item.className === 'Layer') {
+            var matrixChildren = matrix.appended(item.matrix);
+            for (var i = 0; i < item.children.length; i++) {
+                exportPaperItem(item.children[i], matrixChildren, onLoop);
+            }
+        }
+        else if (item.className === 'Path' || item.className === 'CompoundPath') {
+            if (matrix.isIdentity()) {
+                exportPaperPath(item, onLoop);
+            }
+            else {
+                var path = item.clone({ insert: false });
+                path.transform(matrix);
+                exportPaperPath(path, onLoop);
+            }
+        }
+    }
+
+    // Pass each cell of the diagram, as drawn, to onLoop(coords, isBezier) one
+    // loop at a time.  Exporting the drawn cells keeps the export the same as
+    // the preview (e.g. small bits removed, shape rotations and edits made
+    // with the cell editor).
+    function forEachExportCell(onLoop) {
+        if (_voronoi === null) return;
+
+        // Bring the drawing up to date if a change hasn't been drawn yet
+        if (_updateView) {
+            _updateView = false;
+            draw();
+            updateView();   // Still let the frame handler run (e.g. relaxation)
+        }
+
+        var matrix = new paper.Matrix();
+        _layerVoronoi.children.forEach(function(item) {
+            exportPaperItem(item, matrix, onLoop);
+        });
+    }
+
+    function dxfGroup(code, value) {
+        return code + '\n' + value + '\n';
+    }
+
+    function dxfGroups(groups) {
+        var str = '';
+        for (var i = 0; i < groups.length; i++) {
+            str += dxfGroup(groups[i][0], groups[i][1]);
+        }
+        return str;
+    }
+
+    function dxfHandle(value) {
+        return value.toString(16).toUpperCase();
+    }
+
+    // Handles of the tables, their entries and the other fixed objects of the
+    // DXF.  Entities are numbered from DXF_FIRST_ENTITY_HANDLE.  The file is
+    // streamed front to back so $HANDSEED (the next free handle) is set above
+    // any handle a diagram can reach.
+    const DXF_HANDLES = {
+        BLOCK_RECORD: 0x1, LAYER: 0x2, STYLE: 0x3, LTYPE: 0x5, VIEW: 0x6,
+        UCS: 0x7, VPORT: 0x8, APPID: 0x9, DIMSTYLE: 0xA,
+        rootDictionary: 0xC, groupDictionary: 0xD,
+        layer0: 0x10, layerVoronoi: 0x11, styleStandard: 0x12,
+        ltypeByBlock: 0x13, ltypeByLayer: 0x14, ltypeContinuous: 0x15,
+        appidAcad: 0x16, dimstyleStandard: 0x17,
+        modelSpace: 0x18, paperSpace: 0x19,
+        blockModelSpace: 0x1A, endblkModelSpace: 0x1B, blockPaperSpace: 0x1C, endblkPaperSpace: 0x1D,
+        vportActive: 0x1E
+    };
+    const DXF_FIRST_ENTITY_HANDLE = 0x100;
+    const DXF_HANDSEED = 0x10000000;
+
+    // Everything of a DXF R2000 (AC1015) file before its entities: the header,
+    // the symbol tables with their standard entries and the model and paper
+    // space blocks, all with handles and owners.  Units are centimeters.
+    function dxfHeader() {
+        var h = {};
+        Object.keys(DXF_HANDLES).forEach(name => { h[name] = dxfHandle(DXF_HANDLES[name]); });
+
+        function table(name, entries, extra = []) {
+            var groups = [[0, 'TABLE'], [2, name], [5, h[name]], [330, 0], [100, 'AcDbSymbolTable'], [70, entries.length]].concat(extra);
+            entries.forEach(entry => { groups = groups.concat(entry); });
+            return groups.concat([[0, 'ENDTAB']]);
+        }
+
+        function entry(kind, handle, owner, subclass, name, extra = []) {
+            var handleCode = (kind === 'DIMSTYLE') ? 105 : 5;
+            return [[0, kind], [handleCode, h[handle]], [330, h[owner]], [100, 'AcDbSymbolTableRecord'],
+                    [100, subclass], [2, name], [70, 0]].concat(extra);
+        }
+
+        function ltype(handle, name) {
+            return entry('LTYPE', handle, 'LTYPE', 'AcDbLinetypeTableRecord', name,
+                         [[3, ''], [72, 65], [73, 0], [40, 0.0]]);
+        }
+
+        function layer(handle, name) {
+            return entry('LAYER', handle, 'LAYER', 'AcDbLayerTableRecord', name, [[62, 7], [6, 'Continuous']]);
+        }
+
+        function block(handle, handleEnd, owner, name, extra = []) {
+            return [[0, 'BLOCK'], [5, h[handle]], [330, h[owner]], [100, 'AcDbEntity']].concat(extra,
+                [[8, 0], [100, 'AcDbBlockBegin'], [2, name], [70, 0], [10, 0.0], [20, 0.0], [30, 0.0], [3, name], [1, ''],
+                 [0, 'ENDBLK'], [5, h[handleEnd]], [330, h[owner]], [100, 'AcDbEntity']], extra,
+                [[8, 0], [100, 'AcDbBlockEnd']]);
+        }
+
+        var groups = [[0, 'SECTION'], [2, 'HEADER'],
+            [9, '$ACADVER'], [1, 'AC1015'],
+            [9, '$HANDSEED'], [5, dxfHandle(DXF_HANDSEED)],
+            [9, '$INSUNITS'], [70, 5],          // Centimeters
+            [9, '$MEASUREMENT'], [70, 1],       // Metric
+            [0, 'ENDSEC'],
+            [0, 'SECTION'], [2, 'CLASSES'], [0, 'ENDSEC'],
+            [0, 'SECTION'], [2, 'TABLES']];
+        groups = groups.concat(
+            table('VPORT', [entry('VPORT', 'vportActive', 'VPORT', 'AcDbViewportTableRecord', '*Active',
+                                  [[10, 0.0], [20, 0.0], [11, 1.0], [21, 1.0], [12, 0.0], [22, 0.0], [40, 100.0], [41, 1.0]])]),
+            table('LTYPE', [ltype('ltypeByBlock', 'ByBlock'), ltype('ltypeByLayer', 'ByLayer'), ltype('ltypeContinuous', 'Continuous')]),
+            table('LAYER', [layer('layer0', '0'), layer('layerVoronoi', DXF_LAYER)]),
+            table('STYLE', [entry('STYLE', 'styleStandard', 'STYLE', 'AcDbTextStyleTableRecord', 'Standard',
+                                  [[40, 0.0], [41, 1.0], [50, 0.0], [71, 0], [42, 0.25], [3, 'txt'], [4, '']])]),
+            table('VIEW', []),
+            table('UCS', []),
+            table('APPID', [entry('APPID', 'appidAcad', 'APPID', 'AcDbRegAppTableRecord', 'ACAD')]),
+            table('DIMSTYLE', [entry('DIMSTYLE', 'dimstyleStandard', 'DIMSTYLE', 'AcDbDimStyleTableRecord', 'Standard')],
+                  [[100, 'AcDbDimStyleTable'], [71, 0]]),
+            table('BLOCK_RECORD', [entry('BLOCK_RECORD', 'modelSpace', 'BLOCK_RECORD', 'AcDbBlockTableRecord', '*Model_Space'),
+                                   entry('BLOCK_RECORD', 'paperSpace', 'BLOCK_RECORD', 'AcDbBlockTableRecord', '*Paper_Space')]),
+            [[0, 'ENDSEC'], [0, 'SECTION'], [2, 'BLOCKS']],
+            block('blockModelSpace', 'endblkModelSpace', 'modelSpace', '*Model_Space'),
+            block('blockPaperSpace', 'endblkPaperSpace', 'paperSpace', '*Paper_Space', [[67, 1]]),
+            [[0, 'ENDSEC'], [0, 'SECTION'], [2, 'ENTITIES']]);
+        return dxfGroups(groups);
+    }
+
+    // Everything after the entities: the root dictionary of the objects
+    function dxfFooter() {
+        var root = dxfHandle(DXF_HANDLES.rootDictionary);
+        var group = dxfHandle(DXF_HANDLES.groupDictionary);
+        return dxfGroups([[0, 'ENDSEC'],
+            [0, 'SECTION'], [2, 'OBJECTS'],
+            [0, 'DICTIONARY'], [5, root], [330, 0], [100, 'AcDbDictionary'], [281, 1],
+            [3, 'ACAD_GROUP'], [350, group],
+            [0, 'DICTIONARY'], [5, group], [330, root], [100, 'AcDbDictionary'], [281, 1],
+            [0, 'ENDSEC'],
+            [0, 'EOF']]);
+    }
+
+    // The start of the index'th entity of the file, in model space
+    function dxfEntity(kind, index) {
+        return dxfGroup(0, kind) + dxfGroup(5, dxfHandle(DXF_FIRST_ENTITY_HANDLE + index)) +
+            dxfGroup(330, dxfHandle(DXF_HANDLES.modelSpace)) + dxfGroup(100, 'AcDbEntity') + dxfGroup(8, DXF_LAYER);
+    }
+
+    // Closed LWPOLYLINE through the points [x0,y0,x1,y1,...]
+    function dxfPolyline(coords, index) {
+        var str = dxfEntity('LWPOLYLINE', index) +
+            dxfGroup(100, 'AcDbPolyline') + dxfGroup(90, coords.length / 2) + dxfGroup(70, 1);
+        for (var i = 0; i < coords.length; i += 2) {
+            str += dxfGroup(10, coords[i]) + dxfGroup(20, coords[i+1]);
+        }
+        return str;
+    }
+
+    // Cubic SPLINE for a chain of Béziers given its control points
+    // [x0,y0,x1,y1,...] (3 per curve plus the start point).  Each Bézier is a
+    // span of the spline with a knot of multiplicity 3 between the spans.
+    function dxfSpline(coords, index) {
+        var countPoints = coords.length / 2;
+        var countCurves = (countPoints - 1) / 3;
+
+        var knots = [0, 0, 0, 0];
+        for (var k = 1; k < countCurves; k++) {
+            knots.push(k, k, k);
+        }
+        knots.push(countCurves, countCurves, countCurves, countCurves);
+
+        var str = dxfEntity('SPLINE', index) +
+            dxfGroup(100, 'AcDbSpline') + dxfGroup(70, 8) + dxfGroup(71, 3) +
+            dxfGroup(72, knots.length) + dxfGroup(73, countPoints) + dxfGroup(74, 0);
+        for (var k = 0; k < knots.length; k++) {
+            str += dxfGroup(40, knots[k]);
+        }
+        for (var i = 0; i < coords.length; i += 2) {
+            str += dxfGroup(10, coords[i]) + dxfGroup(20, coords[i+1]) + dxfGroup(30, 0);
+        }
+        return str;
+    }
+
+    // Generate the diagram as DXF text, passing it to sink(text) a buffer at a
+    // time.  Returns the number of loops written.
+    function generateDXF(sink) {
+        var buffer = dxfHeader();
+        var count = 0;
+
+        forEachExportCell(function(coords, isBezier) {
+            buffer += isBezier ? dxfSpline(coords, count) : dxfPolyline(coords, count);
+            count++;
+            if (buffer.length >= DXF_FLUSH_CHARS) {
+                sink(buffer);
+                buffer = '';
+            }
+        });
+
+        sink(buffer + dxfFooter());
+        return count;
+    }
+
+    /////////////////////////////////////////////////////////////////////////
+    // Arc Export
+    //
+    // Fusion turns the Béziers of curved cells into splines, which are slow for
+    // its sketch solver, profile detection and CAM.  This approximates each
+    // Bézier with tangent continuous pairs of arcs (biarcs), or a line where
+    // it's straight, to within a tolerance.  A Bézier that a biarc can't fit
+    // is split in half and each half fitted in turn.  Runs of the arcs that
+    // lie on the same circle (and lines on the same line) are then merged
+    // back together, across the Béziers of a loop as well as within them.
+
+    const ARC_LOOPS_PER_MESSAGE = 500;  // Loops per message when sending to Fusion
+    const BIARC_MAX_DEPTH = 8;          // Most times a Bézier is split in half
+    const BIARC_ERROR_SAMPLES = 8;      // Points checked along a Bézier for the fit
+
+    // Point at t along the cubic Bézier p0,p1,p2,p3
+    function bezierPoint(p0, p1, p2, p3, t) {
+        var mt = 1 - t;
+        var a = mt*mt*mt, b = 3*mt*mt*t, c = 3*mt*t*t, d = t*t*t;
+        return [a*p0[0] + b*p1[0] + c*p2[0] + d*p3[0],
+                a*p0[1] + b*p1[1] + c*p2[1] + d*p3[1]];
+    }
+
+    // Distance from point p to the segment a-b
+    function distanceToSegment(p, a, b) {
+        var dx = b[0] - a[0], dy = b[1] - a[1];
+        var lenSq = dx*dx + dy*dy;
+        var t = (lenSq > 0) ? Math.max(0, Math.min(1, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / lenSq)) : 0;
+        return Math.hypot(p[0] - (a[0] + t * dx), p[1] - (a[1] + t * dy));
+    }
+
+    // The arc from point a, leaving in direction t, to point b.  Returns its
+    // center, radius, the point halfway along it and the angles it starts at
+    // and sweeps (counterclockwise positive), or null if it's straight.
+    function arcFromTangent(a, t, b) {
+        var len = Math.hypot(t[0], t[1]);
+        if (len === 0) return null;
+        var tx = t[0] / len, ty = t[1] / len;
+
+        var dx = b[0] - a[0], dy = b[1] - a[1];
+        var cross = tx * dy - ty * dx;      // > 0 turning counterclockwise
+        if (Math.abs(cross) < 1e-12) return null;
+
+        // The center is along the normal on b's side
+        var side = Math.sign(cross);
+        var radius = (dx*dx + dy*dy) / (2 * Math.abs(cross));
+        var center = [a[0] - ty * side * radius, a[1] + tx * side * radius];
+
+        // The arc sweeps twice the angle between the tangent and the chord
+        var sweep = 2 * Math.atan2(Math.abs(cross), tx * dx + ty * dy);
+        var angleStart = Math.atan2(a[1] - center[1], a[0] - center[0]);
+        var angle = angleStart + side * sweep / 2;
+
+        return {
+            center: center,
+            radius: radius,
+            mid: [center[0] + radius * Math.cos(angle), center[1] + radius * Math.sin(angle)],
+            angleStart: angleStart,
+            sweep: side * sweep
+        };
+    }
+
+    // Distance from point p to the arc from arcFromTangent() with the ends a
+    // and b.  Points off to the side of the arc's span are nearest an end.
+    function distanceToArc(p, arc, a, b) {
+        var angle = Math.atan2(p[1] - arc.center[1], p[0] - arc.center[0]);
+        var along = ((angle - arc.angleStart) * Math.sign(arc.sweep)) % (2 * Math.PI);
+        if (along < 0) along += 2 * Math.PI;
+
+        if (along <= Math.abs(arc.sweep)) {
+            return Math.abs(Math.hypot(p[0] - arc.center[0], p[1] - arc.center[1]) - arc.radius);
+        }
+        return Math.min(Math.hypot(p[0] - a[0], p[1] - a[1]), Math.hypot(p[0] - b[0], p[1] - b[1]));
+    }
+
+    // The circle through the points a, m and b, or null if they're in a line.
+    // isCCW is true if going from a through m to b is counterclockwise.
+    function circleThrough(a, m, b) {
+        var d = 2 * (a[0] * (m[1] - b[1]) + m[0] * (b[1] - a[1]) + b[0] * (a[1] - m[1]));
+        if (Math.abs(d) < 1e-12) return null;
+
+        var sa = a[0]*a[0] + a[1]*a[1], sm = m[0]*m[0] + m[1]*m[1], sb = b[0]*b[0] + b[1]*b[1];
+        var center = [(sa * (m[1] - b[1]) + sm * (b[1] - a[1]) + sb * (a[1] - m[1])) / d,
+                      (sa * (b[0] - m[0]) + sm * (a[0] - b[0]) + sb * (m[0] - a[0])) / d];
+
+        return {
+            center: center,
+            radius: Math.hypot(a[0] - center[0], a[1] - center[1]),
+            isCCW: d > 0
+        };
+    }
+
+    // Whether a run of arcs (or lines) can be replaced by a single arc (or
+    // line).  points holds the run's start then each curve's mid point (arcs
+    // only) and end.  All of them have to be within the tolerance of the
+    // replacement and, for an arc, in order along it.
+    function isRunMergeable(points, isArc, tolerance) {
+        var first = points[0];
+        var last = points[points.length - 1];
+
+        if (!isArc) {
+            return points.every(p => distanceToSegment(p, first, last) <= tolerance);
+        }
+
+        var circle = circleThrough(first, points[Math.floor(points.length / 2)], last);
+        if (circle === null) return false;
+
+        var angleStart = Math.atan2(first[1] - circle.center[1], first[0] - circle.center[0]);
+        var alongLast = 0;
+        for (var k = 1; k < points.length; k++) {
+            var p = points[k];
+            if (Math.abs(Math.hypot(p[0] - circle.center[0], p[1] - circle.center[1]) - circle.radius) > tolerance) {
+                return false;
+            }
+
+            var angle = Math.atan2(p[1] - circle.center[1], p[0] - circle.center[0]);
+            var along = ((angle - angleStart) * (circle.isCCW ? 1 : -1)) % (2 * Math.PI);
+            if (along < 0) along += 2 * Math.PI;
+            if (along <= alongLast) return false;
+            alongLast = along;
+        }
+        return true;
+    }
+
+    // Merge runs of consecutive arcs that lie on the same circle, and lines
+    // that lie on the same line, to within the tolerance.  The segments start
+    // at start and are as described in fitBezierWithBiarcs().
+    function mergeArcSegments(start, segments, tolerance) {
+        var merged = [];
+        var last = start;
+
+        for (var i = 0; i < segments.length;) {
+            var isArc = (segments[i] === 1);
+
+            // Grow the run while it still fits a single arc or line
+            var points = [last];
+            var j = i;
+            while (j < segments.length && (segments[j] === 1) === isArc) {
+                var pointsNext = isArc ?
+                    points.concat([[segments[j+1], segments[j+2]], [segments[j+3], segments[j+4]]]) :
+                    points.concat([[segments[j+1], segments[j+2]]]);
+                if (j > i && !isRunMergeable(pointsNext, isArc, tolerance)) break;
+
+                points = pointsNext;
+                j += isArc ? 5 : 3;
+            }
+
+            last = points[points.length - 1];
+            if (isArc) {
+                // The run's middle point is on it (a mid point or a joint)
+                var through = points[Math.floor(points.length / 2)];
+                merged.push(1, through[0], through[1], last[0], last[1]);
+            }
+            else {
+                merged.push(0, last[0], last[1]);
+            }
+            i = j;
+        }
+
+        return merged;
+    }
+
+    // Fit the cubic Bézier p0,p1,p2,p3 with a line or a biarc, splitting it
+    // until within the tolerance.  Each segment is appended to segments as 0,x,y
+    // for a line to x,y or as 1,xm,ym,x,y for an arc through xm,ym to x,y.
+    function fitBezierWithBiarcs(p0, p1, p2, p3, tolerance, segments, depth) {
+
+        // All of a Bézier is inside the hull of its control points
+        if (distanceToSegment(p1, p0, p3) <= tolerance && distanceToSegment(p2, p0, p3) <= tolerance) {
+            segments.push(0, p3[0], p3[1]);
+            return;
+        }
+
+        // End tangents
+        var t0 = [p1[0] - p0[0], p1[1] - p0[1]];
+        if (t0[0] === 0 && t0[1] === 0) t0 = [p2[0] - p0[0], p2[1] - p0[1]];
+        var t1 = [p3[0] - p2[0], p3[1] - p2[1]];
+        if (t1[0] === 0 && t1[1] === 0) t1 = [p3[0] - p1[0], p3[1] - p1[1]];
+
+        // The biarc joins at the incenter of the triangle made by the end
+        // points and the intersection of the end tangents.  That needs the
+        // tangents to meet ahead of p0 and behind p3.
+        var biarc = null;
+        var det = t0[0] * t1[1] - t0[1] * t1[0];
+        if (Math.abs(det) > 1e-12) {
+            var ex = p3[0] - p0[0], ey = p3[1] - p0[1];
+            var a = (ex * t1[1] - ey * t1[0]) / det;
+            var b = (t0[0] * ey - t0[1] * ex) / det;
+            if (a > 0 && b > 0) {
+                var v = [p0[0] + a * t0[0], p0[1] + a * t0[1]];
+                var la = Math.hypot(p3[0] - v[0], p3[1] - v[1]);
+                var lb = Math.hypot(p0[0] - v[0], p0[1] - v[1]);
+                var lc = Math.hypot(ex, ey);
+                var sum = la + lb + lc;
+                var joint = [(la * p0[0] + lb * p3[0] + lc * v[0]) / sum,
+                             (la * p0[1] + lb * p3[1] + lc * v[1]) / sum];
+
+                // The second arc is made backwards from p3 so it ends on its tangent
+                var arc0 = arcFromTangent(p0, t0, joint);
+                var arc1 = arcFromTangent(p3, [-t1[0], -t1[1]], joint);
+                biarc = { joint: joint, arcs: [arc0, arc1], ends: [[p0, joint], [joint, p3]] };
+            }
+        }
+
+        if (biarc !== null) {
+            // Largest distance of the Bézier from the biarc
+            var error = 0;
+            for (var k = 1; k < BIARC_ERROR_SAMPLES; k++) {
+                var q = bezierPoint(p0, p1, p2, p3, k / BIARC_ERROR_SAMPLES);
+                var d = Infinity;
+                for (var i = 0; i < 2; i++) {
+                    var arc = biarc.arcs[i];
+                    var [end0, end1] = biarc.ends[i];
+                    d = Math.min(d, (arc === null) ? distanceToSegment(q, end0, end1) : distanceToArc(q, arc, end0, end1));
+                }
+                error = Math.max(error, d);
+            }
+
+            if (error <= tolerance || depth >= BIARC_MAX_DEPTH) {
+                for (var i = 0; i < 2; i++) {
+                    var arc = biarc.arcs[i];
+                    var end = biarc.ends[i][1];
+                    if (arc === null) {
+                        segments.push(0, end[0], end[1]);
+                    }
+                    else {
+                        segments.push(1, arc.mid[0], arc.mid[1], end[0], end[1]);
+                    }
+                }
+                return;
+            }
+        }
+        else if (depth >= BIARC_MAX_DEPTH) {
+            segments.push(0, p3[0], p3[1]);
+            return;
+        }
+
+        // Split in half (de Casteljau) and fit each half
+        var p01 = [(p0[0] + p1[0]) / 2, (p0[1] + p1[1]) / 2];
+        var p12 = [(p1[0] + p2[0]) / 2, (p1[1] + p2[1]) / 2];
+        var p23 = [(p2[0] + p3[0]) / 2, (p2[1] + p3[1]) / 2];
+        var p012 = [(p01[0] + p12[0]) / 2, (p01[1] + p12[1]) / 2];
+        var p123 = [(p12[0] + p23[0]) / 2, (p12[1] + p23[1]) / 2];
+        var pMid = [(p012[0] + p123[0]) / 2, (p012[1] + p123[1]) / 2];
+
+        fitBezierWithBiarcs(p0, p01, p012, pMid, tolerance, segments, depth + 1);
+        fitBezierWithBiarcs(pMid, p123, p23, p3, tolerance, segments, depth + 1);
+    }
+
+    // Fit a loop from forEachExportCell() with arcs and lines.  Returns
+    // { start: [x,y], segments: [...] } with the segments as described in
+    // fitBezierWithBiarcs().  Straight loops become lines between their vertices.
+    // Half the tolerance goes to fitting the Béziers and half to merging the
+    // fitted arcs, so the merged arcs stay within the tolerance.
+    function fitLoopWithBiarcs(coords, isBezier, tolerance) {
+        var segments = [];
+        var start = [coords[0], coords[1]];
+
+        if (isBezier) {
+            for (var i = 0; i + 7 < coords.length; i += 6) {
+                fitBezierWithBiarcs([coords[i], coords[i+1]], [coords[i+2], coords[i+3]],
+                    [coords[i+4], coords[i+5]], [coords[i+6], coords[i+7]], tolerance / 2, segments, 0);
+            }
+            segments = mergeArcSegments(start, segments, tolerance / 2);
+        }
+        else {
+            for (var i = 2; i < coords.length; i += 2) {
+                segments.push(0, coords[i], coords[i+1]);
+            }
+            segments.push(0, start[0], start[1]);
+        }
+
+        return {
+            start: start,
+            segments: segments.map(value => Number(value.toFixed(5)))
+        };
+    }
+
+    /////////////////////////////////////////////////////////////////////////
+    // Curved Face Export
+
+    // Flatness (cm) when flattening curved cell edges for a curved face and the
+    // longest edge (cm) allowed between the points sent for a cell.  The points
+    // are evaluated on the surface so long edges would cut across it.  A loop
+    // is split into edges where its direction turns by more than the corner
+    // angle (degrees) so the corners stay sharp once fitted on the face.
+    const SURFACE_FLATNESS_CM = 0.02;
+    const SURFACE_MAX_STEP_CM = 0.2;
+    const SURFACE_CORNER_DEGREES = 1;
+
+    // Returns the cells currently displayed for wrapping onto a curved face, in
+    // the profile's coordinates (centimeters).  Each cell is a closed loop given
+    // as its edges, from corner to corner.  An edge is a flat array
+    // [x0,y0,x1,y1,...] that starts where the previous one ends.  A loop with no
+    // corners is a single edge that ends where it starts.
+    function generateSurfaceCells() {
+        var cells = [];
+
+        var items = _layerVoronoi.children;
+        for (var i = 0; i < items.length; i++) {
+            var item = items[i];
+            var path = (item instanceof paper.SymbolItem) ? expandSymbolItem(item) : item.clone({ insert: false });
+
+            var loops = (path.className === 'CompoundPath') ? path.children : [path];
+            for (var iLoop = 0; iLoop < loops.length; iLoop++) {
+                if (loops[iLoop].curves.length < 2) continue;
+                cells.push(surfaceLoopEdges(loops[iLoop]));
+            }
+        }
+
+        return cells;
+    }
+
+    // Split the closed loop at its corners into edges (see generateSurfaceCells())
+    function surfaceLoopEdges(loop) {
+        var curves = loop.curves;
+
+        var corners = [];
+        for (var c = 0; c < curves.length; c++) {
+            var tangentIn = curves[(c + curves.length - 1) % curves.length].getTangentAtTime(1);
+            var tangentOut = curves[c].getTangentAtTime(0);
+            if (Math.abs(tangentIn.getDirectedAngle(tangentOut)) > SURFACE_CORNER_DEGREES) {
+                corners.push(c);
+            }
+        }
+        if (corners.length === 0) {
+            corners.push(0);    // Smooth all the way round
+        }
+
+        var edges = [];
+        for (var k = 0; k < corners.length; k++) {
+            var cEnd = (k + 1 < corners.length) ? corners[k + 1] : corners[0] + curves.length;
+            var edge = [];
+            for (var c = corners[k]; c < cEnd; c++) {
+                appendSurfaceCurvePoints(curves[c % curves.length], edge);
+            }
+            edges.push(edge);
+        }
+        return edges;
+    }
+
+    // Append the points along the curve to the flat array of coordinates.  The
+    // curve's first point is left out if it's already there (the end of the
+    // curve before it).
+    function appendSurfaceCurvePoints(curve, coords) {
+        var maxStep = cms2pixels(SURFACE_MAX_STEP_CM);
+
+        var points = [curve.point1, curve.point2];
+        if (!curve.isStraight()) {
+            var path = new paper.Path({ segments: [curve.segment1.clone(), curve.segment2.clone()], insert: false });
+            path.flatten(cms2pixels(SURFACE_FLATNESS_CM));
+            points = path.segments.map(segment => segment.point);
+        }
+
+        for (var s = 0; s + 1 < points.length; s++) {
+            var pt = points[s];
+            var ptNext = points[s + 1];
+
+            // Subdivide long edges
+            var steps = Math.max(1, Math.ceil(pt.getDistance(ptNext) / maxStep));
+            for (var k = (s === 0 && coords.length > 0) ? 1 : 0; k <= steps; k++) {
+                if (k === steps && s + 2 < points.length) continue;     // The next piece starts here
+                var t = k / steps;
+                var [x, y] = profilePixelsToCms(pt.x + (ptNext.x - pt.x) * t, pt.y + (ptNext.y - pt.y) * t);
+                coords.push(Number(x.toFixed(4)), Number(y.toFixed(4)));
+            }
+        }
+    }
+
     var scaleLast = 1;
 
     function scaleView(newScale) {
@@ -1403,39 +3044,16 @@ $(function() {
 
             draw();     // Note, draw may trigger another update view
 
+            if (_timeDiagramRequested !== null && _voronoi !== null) {
+                firstDiagramDrawn();
+            }
+
             if (_voronoi !== null) {
                 // Get relaxation count and adjust cell cites/centers
                 if (lloydsCounter() > 0) {
                     setLloydsCounter(lloydsCounter()-1);
 
-                    // Constrain relaxation to the profile (gap path if present) so
-                    // sites distribute within the actual shape instead of drifting
-                    // out toward the rectangular Voronoi bounds.
-                    let profilePathRelax = _profilePathGap !== null ? _profilePathGap : _profilePath;
-
-                    // Move the cell sites towards their cell centroids
-                    for (var i = 0, l = cellSitesCount(); i < l; i++) {
-                        var cell = _voronoi.cellPolygon(i);
-                        if (cell == null) continue;
-
-                        const [x0,y0] = cellSiteAt(i);
-
-                        var centroid = constrainedCellCentroid(cell, profilePathRelax);
-                        if (centroid == null) continue; // clip produced no area; leave site put
-                        const [x1, y1] = centroid;
-
-                        var xNew = x0 + (x1 - x0) * LLOYDS_OMEGA;
-                        var yNew = y0 + (y1 - y0) * LLOYDS_OMEGA;
-
-                        // Safety net: never let a site leave the profile.  If the move
-                        // would exit it, keep the site at its (inside) previous spot.
-                        if (profilePathRelax !== null &&
-                            !profilePathRelax.contains(new paper.Point(xNew, yNew))) {
-                            continue;
-                        }
-
-                        setCellSiteAt(i, xNew, yNew);
-                    }
+                    relaxCellSitesStep(lloydsCounter() === 0);
 
                     _voronoi.update();
                     generateVoronoi();
@@ -1452,6 +3070,7 @@ $(function() {
         setPropertyPageWidth(inches2cms(DEFAULT_PAGE_WIDTH_STANDARD));
         setPropertyPageHeight(inches2cms(DEFAULT_PAGE_HEIGHT_STANDARD));
         setPropertyProfile([]);
+        setPropertySurface(null);
         resizeCanvas();
     }
 
@@ -1489,6 +3108,20 @@ $(function() {
         if (!hitResult || (hitResult.item && hitResult.item.layer !== _layerVoronoi))
             return;
 
+        // Shape cells are placed symbols sharing one definition, so editing
+        // their segments would change every cell.  Swap the cell for its own
+        // path the first time its outline is edited.
+        if (hitResult.item instanceof paper.SymbolItem && hitResult.type !== 'fill') {
+            var symbolItem = hitResult.item;
+            var cellPath = expandSymbolItem(symbolItem);
+            cellPath.insertAbove(symbolItem);
+            symbolItem.remove();
+
+            hitResult = cellPath.hitTest(event.point, hitOptions);
+            if (!hitResult)
+                return;
+        }
+
         if (event.modifiers.shift) {
             if (hitResult.type == 'segment') {
                 if (hitResult.item.segments.length > 3) {
@@ -1548,9 +3181,6 @@ $(function() {
     //forceUpdate();   // Update and draw the diagram
     resizeHandler();
 
-    // Queue up event to tell Fusion we are alive
-    setTimeout(sendEventStartedToFusion, 500);
-
     // TEST: Receive data to Fusion 360
     //handleActionStarted(TEST_INIT_FROM_FUSION);
 
@@ -1560,6 +3190,8 @@ $(function() {
     function handleActionStarted(jsonStr) {
         var jsonData = JSON.parse(jsonStr);
         if (jsonData) {
+            _timeDiagramRequested = performance.now();
+
             // Reset to defaults
             reset();
 
@@ -1580,6 +3212,10 @@ $(function() {
                 setPropertyProfile(jsonData.profile);
             }
 
+            if (typeof jsonData.surface !== 'undefined') {
+                setPropertySurface(jsonData.surface);
+            }
+
             // Now update the diagram
             forceUpdate(); 
         }
@@ -1588,27 +3224,99 @@ $(function() {
         }
     }
 
-    // Used to check if running in Fusion 360.  It takes a moment for 'adsk' namespace
-    // to be injected by Fusion.
-    var _fusionStartCounter = 4;
+    /////////////////////////////////////////////////////////////////////////
+    // Startup
+
+    // Fusion injects the 'adsk' namespace shortly after the page loads.  Check
+    // for it every FUSION_POLL_MS and send the started event the moment it's
+    // there.  The palette is loaded hidden when the add-in starts and Fusion
+    // may be slow to inject it then, so after FUSION_WAIT_MS keep checking
+    // every FUSION_POLL_SLOW_MS for as long as the page is open.
+    const FUSION_POLL_MS = 10;
+    const FUSION_POLL_SLOW_MS = 250;
+    const FUSION_WAIT_MS = 2000;
+
+    var _fusionStarted = false;
+    var _fusionWaitStart = 0;
+
+    // performance.now() when a diagram was last requested (page load or init
+    // from Fusion) and not yet drawn.  Used to measure the time to the first
+    // diagram.
+    var _timeDiagramRequested = null;
+
+    function waitForFusion() {
+        _fusionWaitStart = performance.now();
+        _timeDiagramRequested = 0;  // Measure from the page load
+
+        if (typeof adsk !== 'undefined') {
+            sendEventStartedToFusion();
+            return;
+        }
+
+        // Don't wait on Fusion to show something.  If it does turn up then
+        // the init it sends replaces this default diagram.
+        $("#downloadSVGBtn").show();
+        $("#downloadDXFBtn").show();
+        forceUpdate();
+
+        pollForFusion();
+    }
+
+    function pollForFusion() {
+        if (typeof adsk !== 'undefined') {
+            sendEventStartedToFusion();
+        }
+        else if (performance.now() - _fusionWaitStart < FUSION_WAIT_MS) {
+            setTimeout(pollForFusion, FUSION_POLL_MS);
+        }
+        else {
+            setTimeout(pollForFusion, FUSION_POLL_SLOW_MS);
+        }
+    }
+
+    // Called after a requested diagram is drawn for the first time
+    function firstDiagramDrawn() {
+        var msDiagram = performance.now() - _timeDiagramRequested;
+        var msPage = performance.now();
+        console.log("Time to first diagram: " + msDiagram.toFixed(0) + " ms (" + msPage.toFixed(0) + " ms since page load)");
+        _timeDiagramRequested = null;
+
+        loadDeferredScripts();
+
+        if (_fusionStarted) {
+            var jsonDataStr = JSON.stringify({
+                action: "diagramReady",
+                arguments: {
+                    msDiagram: msDiagram,
+                    msPage: msPage
+                }
+            });
+            adsk.fusionSendData('send', jsonDataStr);
+        }
+    }
+
+    // Load the scripts that aren't needed to draw the first diagram
+    var _deferredScriptsLoaded = false;
+
+    function loadDeferredScripts() {
+        if (_deferredScriptsLoaded) return;
+        _deferredScriptsLoaded = true;
+
+        var script = document.createElement('script');
+        script.src = 'dist/bootstrap-4.5.3-dist/js/bootstrap.bundle.min.js';
+        document.body.appendChild(script);
+    }
 
     function sendEventStartedToFusion() {
 
-        if (typeof adsk === 'undefined') {
-            if (_fusionStartCounter > 0) {
-                _fusionStartCounter--;
-                setTimeout(sendEventStartedToFusion, 250);  // Let's try again
-            }
-            else {
-                // Not running within Fusion so show the SVG download button and update view
-                $("#downloadSVGBtn").show();
-                forceUpdate(); 
-            }
+        if (typeof adsk === 'undefined' || _fusionStarted) {
             return;
         }
+        _fusionStarted = true;
 
         $("#publishToFusionBtn").show();    // Show the publish button
         $("#downloadSVGBtn").hide();        // Hide the SVG download button (REVIEW: Blocked by the embedded browser)
+        $("#downloadDXFBtn").hide();
 
         // Package up data as JSON
         var jsonDataStr = `{
@@ -1630,6 +3338,29 @@ $(function() {
             return; // Not running in Fusion 360
         }
 
+        if (propertySurface() !== null) {
+            // Curved face.  Send the cells in the face's parameter space and let
+            // Fusion map them onto the surface.
+            var jsonCellsStr = JSON.stringify({
+                action: "publish",
+                arguments: {
+                    cells: generateSurfaceCells()
+                }
+            });
+            adsk.fusionSendData('send', jsonCellsStr);
+            return;
+        }
+
+        if (propertyPublishFormat() === PublishFormat.DXF) {
+            sendDXFToFusion();
+            return;
+        }
+
+        if (propertyPublishFormat() === PublishFormat.Arcs) {
+            sendArcsToFusion();
+            return;
+        }
+
         var svg = generateSVG(true);    // Generate for Fusion 360
 
         if (svg === null || svg === '') {
@@ -1653,6 +3384,68 @@ $(function() {
         adsk.fusionSendData('send', jsonDataStr);
     }
 
+    // Stream the diagram to Fusion as DXF.  The text from generateDXF() is
+    // sent a buffer at a time and Fusion appends it to the DXF file as it
+    // arrives.
+    function sendDXFToFusion() {
+        adsk.fusionSendData('send', JSON.stringify({ action: "dxfBegin", arguments: {} }));
+
+        var count = generateDXF(function(text) {
+            adsk.fusionSendData('send', JSON.stringify({ action: "dxfText", arguments: { text: text } }));
+        });
+
+        adsk.fusionSendData('send', JSON.stringify({ action: "dxfEnd", arguments: { count: count } }));
+    }
+
+    // Send the diagram to Fusion as loops of arcs and lines.  Like the DXF, the
+    // loops are fitted and sent ARC_LOOPS_PER_MESSAGE at a time.
+    function sendArcsToFusion() {
+        adsk.fusionSendData('send', JSON.stringify({ action: "arcsBegin", arguments: {} }));
+
+        var tolerance = propertyArcTolerance();
+        var timeStart = performance.now();
+
+        var loops = [];
+        var countBeziers = 0;   // Béziers (spline curves) the arcs replace
+        var countLines = 0;     // Straight edges (lines either way)
+
+        function sendLoops() {
+            adsk.fusionSendData('send', JSON.stringify({
+                action: "arcsCells",
+                arguments: {
+                    loops: loops,
+                    countBeziers: countBeziers,
+                    countLines: countLines
+                }
+            }));
+            loops = [];
+            countBeziers = 0;
+            countLines = 0;
+        }
+
+        forEachExportCell(function(coords, isBezier) {
+            if (isBezier) {
+                countBeziers += (coords.length / 2 - 1) / 3;
+            }
+            else {
+                countLines += coords.length / 2;
+            }
+
+            loops.push(fitLoopWithBiarcs(coords, isBezier, tolerance));
+            if (loops.length >= ARC_LOOPS_PER_MESSAGE) {
+                sendLoops();
+            }
+        });
+        sendLoops();
+
+        adsk.fusionSendData('send', JSON.stringify({
+            action: "arcsEnd",
+            arguments: {
+                msFit: Math.round(performance.now() - timeStart)
+            }
+        }));
+    }
+
     function sendEventCloseDialogToFusion() {
 
         if (typeof adsk === 'undefined') {
@@ -1695,4 +3488,8 @@ $(function() {
             }
         }
     };
+
+    // Tell Fusion we are alive as soon as it's available.  Last, so that all of
+    // the above is initialized if it's available right away.
+    waitForFusion();
 });
\ No newline at end of file
@@ -0,0 +1,154 @@
+// Tests for fitting the Béziers of curved cells with arcs and lines.  Run with:
+//     node --test tests/
+
+const test = require('node:test');
+const assert = require('node:assert');
+const { loadEditor } = require('./editor-harness.js');
+
+// Distance from p to the arc through a, m and b
+function distanceToArcThrough(editor, p, a, m, b) {
+    var d = 2 * (a[0] * (m[1] - b[1]) + m[0] * (b[1] - a[1]) + b[0] * (a[1] - m[1]));
+    if (Math.abs(d) < 1e-12) {
+        return editor.call('distanceToSegment', p, a, b);
+    }
+    var sa = a[0]*a[0] + a[1]*a[1], sm = m[0]*m[0] + m[1]*m[1], sb = b[0]*b[0] + b[1]*b[1];
+    var center = [(sa * (m[1] - b[1]) + sm * (b[1] - a[1]) + sb * (a[1] - m[1])) / d,
+                  (sa * (b[0] - m[0]) + sm * (a[0] - b[0]) + sb * (m[0] - a[0])) / d];
+    var radius = Math.hypot(a[0] - center[0], a[1] - center[1]);
+
+    // Which way round from a passes through m
+    var angleA = Math.atan2(a[1] - center[1], a[0] - center[0]);
+    var turn = angle => ((angle - angleA) % (2 * Math.PI) + 2 * Math.PI) % (2 * Math.PI);
+    var angleM = turn(Math.atan2(m[1] - center[1], m[0] - center[0]));
+    var angleB = turn(Math.atan2(b[1] - center[1], b[0] - center[0]));
+    var isCCW = angleM < angleB;
+    var sweep = isCCW ? angleB : 2 * Math.PI - angleB;
+    var along = turn(Math.atan2(p[1] - center[1], p[0] - center[0]));
+    if (!isCCW) along = (2 * Math.PI - along) % (2 * Math.PI);
+
+    if (along <= sweep) {
+        return Math.abs(Math.hypot(p[0] - center[0], p[1] - center[1]) - radius);
+    }
+    return Math.min(Math.hypot(p[0] - a[0], p[1] - a[1]), Math.hypot(p[0] - b[0], p[1] - b[1]));
+}
+
+test('the distance to an arc is to its span, not its whole circle', () => {
+    var editor = loadEditor();
+
+    // Quarter circle counterclockwise from (1,0) to (0,1) around the origin
+    var arc = editor.call('arcFromTangent', [1, 0], [0, 1], [0, 1]);
+    assert.ok(Math.hypot(arc.center[0], arc.center[1]) < 1e-9);
+
+    assert.ok(Math.abs(editor.call('distanceToArc', [Math.SQRT2, Math.SQRT2], arc, [1, 0], [0, 1]) - 1) < 1e-9);
+    assert.ok(Math.abs(editor.call('distanceToArc', [-1, 0], arc, [1, 0], [0, 1]) - Math.SQRT2) < 1e-9);
+    assert.ok(Math.abs(editor.call('distanceToArc', [0, -1], arc, [1, 0], [0, 1]) - Math.SQRT2) < 1e-9);
+});
+
+test('the fitted arcs and lines stay within the tolerance', () => {
+    var editor = loadEditor();
+    var tolerance = 0.01;
+    var beziers = [
+        [[0, 0], [1, 2], [2, -2], [3, 0]],      // S bend
+        [[0, 0], [4, 0], [4, 4], [0, 4]],       // U turn
+        [[0, 0], [3, 3], [0, 3], [3, 0]],       // Loop
+        [[0, 0], [1, 0.001], [2, -0.001], [3, 0]]
+    ];
+
+    beziers.forEach(([p0, p1, p2, p3], iBezier) => {
+        var segments = [];
+        editor.call('fitBezierWithBiarcs', p0, p1, p2, p3, tolerance, segments, 0);
+
+        // The curves of the fit in order, each from the end of the last
+        var curves = [];
+        var last = p0;
+        for (var i = 0; i < segments.length;) {
+            if (segments[i] === 1) {
+                curves.push([last, [segments[i+1], segments[i+2]], [segments[i+3], segments[i+4]]]);
+                i += 5;
+            }
+            else {
+                curves.push([last, null, [segments[i+1], segments[i+2]]]);
+                i += 3;
+            }
+            last = curves[curves.length - 1][2];
+        }
+        assert.deepStrictEqual(last, p3);
+
+        for (var k = 0; k <= 200; k++) {
+            var q = editor.call('bezierPoint', p0, p1, p2, p3, k / 200);
+            var d = Math.min(...curves.map(([a, m, b]) =>
+                (m === null) ? editor.call('distanceToSegment', q, a, b) : distanceToArcThrough(editor, q, a, m, b)));
+            assert.ok(d <= 1.5 * tolerance, 'Bézier ' + iBezier + ' is ' + d.toFixed(4) + ' off at t = ' + k / 200);
+        }
+    });
+});
+
+test('arcs on the same circle are merged into one', () => {
+    var editor = loadEditor();
+    var tolerance = 0.001;
+
+    // Half a unit circle as four arcs, then an arc of a larger circle
+    var point = angle => [Math.cos(angle), Math.sin(angle)];
+    var segments = [];
+    for (var k = 0; k < 4; k++) {
+        segments.push(1, ...point((k + 0.5) * Math.PI / 4), ...point((k + 1) * Math.PI / 4));
+    }
+    segments.push(1, -1.5, 0.5, -2, 0);
+
+    var merged = Array.from(editor.call('mergeArcSegments', [1, 0], segments, tolerance));
+    assert.strictEqual(merged.length, 10);
+    assert.deepStrictEqual(merged.slice(3, 5), point(Math.PI));
+    assert.ok(distanceToArcThrough(editor, [0, 1], [1, 0], merged.slice(1, 3), merged.slice(3, 5)) < 1e-9);
+    assert.deepStrictEqual(merged.slice(5), segments.slice(20));
+
+    // Lines merge along a line but not around a corner
+    assert.deepStrictEqual(Array.from(editor.call('mergeArcSegments', [0, 0], [0, 1, 0, 0, 2, 0, 0, 2, 1], tolerance)),
+                           [0, 2, 0, 0, 2, 1]);
+});
+
+test('the merged loops stay within the tolerance with fewer curves', () => {
+    var editor = loadEditor();
+    editor.$('#cellCountInput').val(20).trigger('change');
+    editor.call('forceUpdate');
+    editor.runFrames();
+
+    var tolerance = 0.02;
+    var countCurves = 0;
+    var countUnmerged = 0;
+    editor.call('forEachExportCell', function(coords, isBezier) {
+        if (!isBezier) return;
+
+        var fit = editor.call('fitLoopWithBiarcs', coords, isBezier, tolerance);
+        var curves = [];
+        var last = fit.start;
+        for (var i = 0; i < fit.segments.length;) {
+            if (fit.segments[i] === 1) {
+                curves.push([last, fit.segments.slice(i + 1, i + 3), fit.segments.slice(i + 3, i + 5)]);
+                i += 5;
+            }
+            else {
+                curves.push([last, null, fit.segments.slice(i + 1, i + 3)]);
+                i += 3;
+            }
+            last = curves[curves.length - 1][2];
+        }
+        assert.ok(Math.hypot(last[0] - fit.start[0], last[1] - fit.start[1]) < 1e-4);
+        countCurves += curves.length;
+
+        for (var i = 0; i + 7 < coords.length; i += 6) {
+            var [p0, p1, p2, p3] = [0, 2, 4, 6].map(k => [coords[i + k], coords[i + k + 1]]);
+            var segments = [];
+            editor.call('fitBezierWithBiarcs', p0, p1, p2, p3, tolerance / 2, segments, 0);
+            for (var j = 0; j < segments.length; j += (segments[j] === 1) ? 5 : 3) countUnmerged++;
+
+            for (var k = 0; k <= 50; k++) {
+                var q = editor.call('bezierPoint', p0, p1, p2, p3, k / 50);
+                var d = Math.min(...curves.map(([a, m, b]) =>
+                    (m === null) ? editor.call('distanceToSegment', q, a, b) : distanceToArcThrough(editor, q, a, m, b)));
+                assert.ok(d <= tolerance, 'loop is ' + d.toFixed(4) + ' off');
+            }
+        }
+    });
+
+    assert.ok(countCurves < 0.8 * countUnmerged, countCurves + ' curves merged from ' + countUnmerged);
+});
@@ -0,0 +1,39 @@
+// Tests for changing the cell count of a relaxed diagram.  Run with:
+//     node --test tests/
+
+const test = require('node:test');
+const assert = require('node:assert');
+const { loadEditor } = require('./editor-harness.js');
+
+// A relaxed diagram on the default page (no profile)
+function loadDiagram(countCells) {
+    var editor = loadEditor();
+    editor.$('#cellCountInput').val(countCells).trigger('change');
+    editor.$('#lloydsRange').val(20).trigger('change');
+    editor.call('forceUpdate');
+    editor.runFrames();
+    return editor;
+}
+
+test('a large decrease relaxes the remaining sites again', () => {
+    var editor = loadDiagram(200);
+    var residualBefore = editor.call('relaxationResidual');
+
+    editor.$('#cellCountInput').val(40).trigger('change');
+    editor.runFrames();
+
+    assert.strictEqual(editor.call('cellSitesCount'), 40);
+    assert.strictEqual(editor.call('lloydsCounter'), 0);
+    var residual = editor.call('relaxationResidual');
+    assert.ok(residual < 2 * residualBefore, 'residual ' + residual + ' vs ' + residualBefore + ' before');
+});
+
+test('insertion stops when there is no room for more sites', () => {
+    var editor = loadDiagram(40);
+
+    // No site fits in a profile this small
+    editor.set('_profilePath', new editor.paper.Path.Rectangle(new editor.paper.Point(0, 0), new editor.paper.Size(1, 1)));
+    editor.call('updateCellSitesCount', 100);
+
+    assert.strictEqual(editor.call('cellSitesCount'), 40);
+});
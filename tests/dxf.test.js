@@ -0,0 +1,31 @@
+// Tests for streaming the diagram to Fusion as DXF.  Run with:
+//     node --test tests/
+
+const test = require('node:test');
+const assert = require('node:assert');
+const { loadEditor } = require('./editor-harness.js');
+
+test('the DXF text is streamed to Fusion as generated', () => {
+    var editor = loadEditor();
+    editor.$('#cellCountInput').val(60).trigger('change');
+    editor.call('forceUpdate');
+    editor.runFrames();
+
+    editor.connectFusion();
+    editor.call('sendDXFToFusion');
+
+    var actions = Array.from(editor.messages, message => message.action);
+    assert.strictEqual(actions[0], 'dxfBegin');
+    assert.strictEqual(actions[actions.length - 1], 'dxfEnd');
+    assert.ok(actions.slice(1, -1).every(action => action === 'dxfText'));
+
+    var text = editor.messages.filter(message => message.action === 'dxfText').map(message => message.arguments.text).join('');
+    var generated = '';
+    var count = editor.call('generateDXF', chunk => { generated += chunk; });
+    assert.strictEqual(text, generated);
+    assert.strictEqual(editor.messages[editor.messages.length - 1].arguments.count, count);
+    assert.strictEqual(count, 60);
+
+    assert.ok(text.startsWith('0\nSECTION\n2\nHEADER\n'));
+    assert.ok(text.endsWith('0\nEOF\n'));
+});
@@ -0,0 +1,235 @@
+// Loads the Voronoi editor (js/voronoi-editor.js) headless in node for tests.
+//
+// The editor runs in a sandbox with paper.js, d3-delaunay and d3-polygon from
+// dist/, a stand-in for the few jQuery calls it makes and a canvas that draws
+// nothing.  The form controls start with the values from Voronoi.html.  The
+// editor's own functions are reached through editor.call(name, ...args) and
+// its variables through editor.get(name).
+
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+
+const ROOT = path.join(__dirname, '..');
+
+// Initial values of the form controls by id, read from the palette HTML
+function readControls() {
+    var html = fs.readFileSync(path.join(ROOT, 'Voronoi.html'), 'utf8');
+    var controls = {};
+
+    for (const [tag] of html.matchAll(/<input\b[^>]*>/g)) {
+        var id = /\bid="([^"]*)"/.exec(tag);
+        if (id === null) continue;
+        var attrs = {};
+        for (const [, name, value] of tag.matchAll(/\s([\w-]+)="([^"]*)"/g)) {
+            attrs[name] = value;
+        }
+        controls[id[1]] = {
+            value: (attrs.value !== undefined) ? attrs.value : '',
+            checked: /\schecked\b/.test(tag),
+            disabled: /\sdisabled\b/.test(tag),
+            attrs: attrs
+        };
+    }
+
+    for (const [, id, options] of html.matchAll(/<select\b[^>]*\bid="([^"]*)"[^>]*>([\s\S]*?)<\/select>/g)) {
+        var first = /<option value="([^"]*)"/.exec(options);
+        var selected = /<option value="([^"]*)"[^>]*\bselected\b/.exec(options);
+        controls[id] = { value: (selected || first)[1], checked: false, disabled: false, attrs: {} };
+    }
+
+    return controls;
+}
+
+// A canvas whose 2d context ignores drawing and reads back transparent pixels
+class HTMLCanvasElement {}
+
+function createContext2D() {
+    return new Proxy({}, {
+        get: (target, key) => {
+            if (key in target) return target[key];
+            if (key === 'getImageData') return (x, y, w, h) => ({ data: new Uint8ClampedArray(w * h * 4) });
+            if (key === 'measureText') return () => ({ width: 0 });
+            return () => {};
+        },
+        set: (target, key, value) => { target[key] = value; return true; }
+    });
+}
+
+function createCanvas(width = 800, height = 600) {
+    var canvas = Object.assign(Object.create(HTMLCanvasElement.prototype), {
+        width: width,
+        height: height,
+        style: {},
+        nodeType: 1,
+        parentNode: null,
+        clientWidth: width,
+        clientHeight: height,
+        offsetWidth: width,
+        offsetHeight: height,
+        ownerDocument: { body: {}, documentElement: {}, defaultView: { pageXOffset: 0, pageYOffset: 0 } },
+        getContext: () => createContext2D(),
+        getBoundingClientRect: () => ({ left: 0, top: 0, width: width, height: height })
+    });
+    return new Proxy(canvas, {
+        get: (target, key) => (key in target) ? target[key] : ((typeof key === 'string') ? () => null : undefined),
+        set: (target, key, value) => { target[key] = value; return true; }
+    });
+}
+
+// Just enough of jQuery for the editor: controls with values, properties and
+// event handlers.
+function createJQuery(controls, onReady) {
+    var elements = {};
+
+    function element(selector) {
+        if (elements[selector] !== undefined) {
+            return elements[selector];
+        }
+
+        var id = (typeof selector === 'string' && selector[0] === '#') ? selector.slice(1) : null;
+        var state = Object.assign({ value: '', checked: false, disabled: false, html: '', attrs: {} },
+            (id !== null) ? controls[id] : {});
+        var handlers = {};
+
+        var el = {
+            state: state,
+            val(value) {
+                if (value === undefined) return state.value;
+                state.value = String(value);
+                return el;
+            },
+            prop(name, value) {
+                if (value === undefined) return state[name];
+                state[name] = value;
+                return el;
+            },
+            attr(name) { return state.attrs[name]; },
+            is(what) { return (what === ':checked') ? state.checked : false; },
+            html(value) {
+                if (value === undefined) return state.html;
+                state.html = value;
+                return el;
+            },
+            on(events, handler) {
+                events.split(' ').forEach(event => { (handlers[event] = handlers[event] || []).push(handler); });
+                return el;
+            },
+            trigger(event) {
+                (handlers[event] || []).forEach(handler => handler.call(el, {}));
+                return el;
+            }
+        };
+        el.text = el.html;
+        ['change', 'click'].forEach(event => {
+            el[event] = (handler) => (handler === undefined) ? el.trigger(event) : el.on(event, handler);
+        });
+        ['css', 'hide', 'show', 'toggleClass', 'addClass', 'removeClass'].forEach(name => {
+            el[name] = () => el;
+        });
+
+        elements[selector] = el;
+        return el;
+    }
+
+    return function $(selector) {
+        if (typeof selector === 'function') {
+            onReady.push(selector);
+            return;
+        }
+        return element(selector);
+    };
+}
+
+// Names of the editor's top level functions and variables
+function editorNames(source) {
+    var names = new Set();
+    for (const [, name] of source.matchAll(/^    (?:function|var|let|const) ([A-Za-z_$][\w$]*)/gm)) {
+        names.add(name);
+    }
+    return Array.from(names);
+}
+
+// Load the editor as if standalone (no Fusion).  Returns { call, get, set, $,
+// paper, messages, runFrames, connectFusion }.  runFrames() runs the animation
+// frames that draw and relax the diagram until it settles (or for count frames).
+// connectFusion() injects the 'adsk' namespace, after which messages collects
+// what the editor sends to Fusion.
+function loadEditor() {
+    var controls = readControls();
+    var onReady = [];
+    var messages = [];
+
+    var document = {
+        body: { appendChild: () => {} },
+        documentElement: {},
+        createElement: () => createCanvas(),
+        getElementById: () => createCanvas(),
+        addEventListener: () => {},
+        removeEventListener: () => {}
+    };
+    var window = {
+        document: document,
+        navigator: { userAgent: 'node' },
+        innerWidth: 1200,
+        innerHeight: 900,
+        devicePixelRatio: 1,
+        HTMLCanvasElement: HTMLCanvasElement,
+        addEventListener: () => {},
+        removeEventListener: () => {},
+        getComputedStyle: () => ({ getPropertyValue: () => '' })
+    };
+    window.window = window;
+
+    var sandbox = Object.assign(window, {
+        self: window,
+        console: console,
+        performance: performance,
+        // Nothing runs later; the tests drive the editor directly
+        setTimeout: () => 0,
+        clearTimeout: () => {},
+        setInterval: () => 0,
+        clearInterval: () => {},
+        Path2D: function() {},
+        $: createJQuery(controls, onReady)
+    });
+    vm.createContext(sandbox);
+
+    ['dist/paper/paper-full.js', 'dist/d3-delaunay/d3-delaunay.js', 'dist/d3-delaunay/d3-polygon.v1.min.js'].forEach(file => {
+        vm.runInContext(fs.readFileSync(path.join(ROOT, file), 'utf8'), sandbox, { filename: file });
+    });
+
+    // Expose the editor's closure to the tests from inside its ready handler
+    var source = fs.readFileSync(path.join(ROOT, 'js/voronoi-editor.js'), 'utf8');
+    var names = editorNames(source);
+    var hook = '\n    window.__editor = {\n' +
+        '        call: (name, ...args) => eval(name)(...args),\n' +
+        '        get: (name) => eval(name),\n' +
+        '        set: (name, value) => { eval(name + " = value"); }\n' +
+        '    };\n';
+    var end = source.lastIndexOf('});');
+    vm.runInContext(source.slice(0, end) + hook + source.slice(end), sandbox, { filename: 'js/voronoi-editor.js' });
+
+    onReady.forEach(handler => handler());
+
+    var editor = sandbox.__editor;
+    return {
+        call: editor.call,
+        get: editor.get,
+        set: editor.set,
+        names: names,
+        $: sandbox.$,
+        paper: sandbox.paper,
+        messages: messages,
+        runFrames: (count = Infinity) => {
+            for (var i = 0; i < count && editor.get('_updateView'); i++) {
+                sandbox.paper.view.onFrame({});
+            }
+        },
+        connectFusion: () => {
+            sandbox.adsk = { fusionSendData: (action, data) => { messages.push(JSON.parse(data)); return null; } };
+        }
+    };
+}
+
+module.exports = { loadEditor };
@@ -0,0 +1,30 @@
+# A stand-in for Fusion's 'adsk' modules so Voronoi.py can be imported and its
+# Fusion independent parts tested outside of Fusion.  Every name resolves to a
+# placeholder that can be called, cast and subclassed (the event handlers).
+
+import sys
+import types
+
+
+class _Placeholder:
+    def __getattr__(self, name):
+        return _Placeholder()
+
+    def __call__(self, *args, **kwargs):
+        return _Placeholder()
+
+    def __mro_entries__(self, bases):
+        return (object,)
+
+
+def install():
+    if 'adsk' in sys.modules:
+        return
+
+    adsk = types.ModuleType('adsk')
+    for name in ['core', 'fusion', 'cam']:
+        module = types.ModuleType('adsk.' + name)
+        module.__getattr__ = lambda attr: _Placeholder()
+        sys.modules['adsk.' + name] = module
+        setattr(adsk, name, module)
+    sys.modules['adsk'] = adsk
@@ -0,0 +1,124 @@
+// Tests for the raster approximated Lloyd's relaxation.  Run with:
+//     node --test tests/
+
+const test = require('node:test');
+const assert = require('node:assert');
+const { loadEditor } = require('./editor-harness.js');
+
+// A small relaxed diagram on the default page (no profile)
+function loadDiagram(countCells) {
+    var editor = loadEditor();
+    editor.$('#cellCountInput').val(countCells).trigger('change');
+    editor.$('#lloydsRange').val(5).trigger('change');
+    editor.call('forceUpdate');
+    editor.runFrames();
+    return editor;
+}
+
+// A diagram in a 20 cm star shaped profile with a round hole
+function loadProfileDiagram(countCells) {
+    var star = [];
+    for (var k = 0; k < 24; k++) {
+        var radius = (k % 2 === 0) ? 10 : 5;
+        var angle = 2 * Math.PI * k / 24;
+        star.push({ x: 10 + radius * Math.cos(angle), y: 10 + radius * Math.sin(angle) });
+    }
+    var hole = [];
+    for (var k = 0; k < 16; k++) {
+        var angle = -2 * Math.PI * k / 16;
+        hole.push({ x: 10 + 2 * Math.cos(angle), y: 10 + 2 * Math.sin(angle) });
+    }
+
+    var editor = loadEditor();
+    editor.call('setPropertyProfile', [star, hole]);
+    editor.call('setPropertyPageWidth', 20);
+    editor.call('setPropertyPageHeight', 20);
+    editor.$('#cellCountInput').val(countCells).trigger('change');
+    editor.$('#lloydsRange').val(0).trigger('change');
+    editor.call('forceUpdate');
+    editor.runFrames();
+    return editor;
+}
+
+// The harness canvas can't rasterize, so fill the profile mask of the cached
+// raster from the profile path itself
+function maskRasterWithProfile(editor) {
+    var raster = editor.call('relaxRaster');
+    var profilePath = editor.get('_profilePathGap') || editor.get('_profilePath');
+    for (var row = 0; row < raster.rows; row++) {
+        for (var col = 0; col < raster.cols; col++) {
+            var center = new editor.paper.Point(raster.x + (col + 0.5) * raster.cellSize,
+                                                raster.y + (row + 0.5) * raster.cellSize);
+            raster.weights[row * raster.cols + col] = profilePath.contains(center) ? 1 : 0;
+        }
+    }
+    return { raster, profilePath };
+}
+
+test('raster centroids match the exact centroids', () => {
+    var editor = loadDiagram(40);
+    var raster = editor.call('relaxRaster');
+    var centroids = editor.call('rasterCellCentroids', raster);
+    var voronoi = editor.get('_voronoi');
+
+    assert.strictEqual(centroids.length, 40);
+    for (var i = 0; i < centroids.length; i++) {
+        var exact = editor.call('constrainedCellCentroid', voronoi.cellPolygon(i), null);
+        assert.notStrictEqual(centroids[i], null);
+
+        // Within a grid cell of the exact centroid
+        var distance = Math.hypot(centroids[i][0] - exact[0], centroids[i][1] - exact[1]);
+        assert.ok(distance < raster.cellSize, 'cell ' + i + ' is ' + distance.toFixed(2) + ' px off');
+    }
+});
+
+test('raster relaxation relaxes as well as the exact relaxation', () => {
+    var editor = loadDiagram(40);
+    editor.call('setPropertyRelaxMode', 'raster');
+    var results = editor.call('benchmarkRelaxation', 20, [256]);
+
+    assert.deepStrictEqual(Array.from(results, result => result.mode), ['exact', 'raster 256']);
+    var [exact, raster] = results;
+    assert.ok(raster.residual < exact.residual + 0.02, 'raster residual ' + raster.residual + ' vs exact ' + exact.residual);
+    assert.ok(raster.offsetFromExact < 1, 'raster sites are ' + raster.offsetFromExact + ' px from the exact sites');
+
+    // The diagram is restored afterwards
+    assert.strictEqual(editor.call('propertyRelaxMode'), 'raster');
+});
+
+test('raster centroids match the clipped centroids in a profile', () => {
+    var editor = loadProfileDiagram(300);
+    var { raster, profilePath } = maskRasterWithProfile(editor);
+    var centroids = editor.call('rasterCellCentroids', raster);
+    var voronoi = editor.get('_voronoi');
+
+    var countChecked = 0;
+    var sumDistance = 0;
+    for (var i = 0; i < centroids.length; i++) {
+        var exact = editor.call('constrainedCellCentroid', voronoi.cellPolygon(i), profilePath);
+        if (exact === null || centroids[i] === null) continue;
+
+        // Slivers cut off by the star's points cover only a few grid cells,
+        // so allow those a few grid cells of error
+        var distance = Math.hypot(centroids[i][0] - exact[0], centroids[i][1] - exact[1]);
+        assert.ok(distance < 3 * raster.cellSize, 'cell ' + i + ' is ' + distance.toFixed(2) + ' px off');
+        sumDistance += distance;
+        countChecked++;
+    }
+    assert.ok(countChecked > 250, 'only ' + countChecked + ' cells checked');
+    assert.ok(sumDistance / countChecked < raster.cellSize / 4,
+              'centroids are ' + (sumDistance / countChecked).toFixed(2) + ' px off on average');
+});
+
+test('raster relaxation is faster than the exact relaxation for thousands of cells in a profile', () => {
+    var editor = loadProfileDiagram(3000);
+    maskRasterWithProfile(editor);
+    var results = editor.call('benchmarkRelaxation', 3, [256]);
+
+    var [exact, raster] = results;
+    assert.strictEqual(raster.cells, 3000);
+    assert.ok(raster.residual < exact.residual + 0.02, 'raster residual ' + raster.residual + ' vs exact ' + exact.residual);
+    assert.ok(raster.offsetFromExact < 1, 'raster sites are ' + raster.offsetFromExact + ' px from the exact sites');
+    assert.ok(raster.msPerIteration * 5 < exact.msPerIteration,
+              'raster ' + raster.msPerIteration + ' ms vs exact ' + exact.msPerIteration + ' ms per iteration');
+});
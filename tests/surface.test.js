@@ -0,0 +1,42 @@
+// Tests for the cells sent to Fusion for a curved face.  Run with:
+//     node --test tests/
+
+const test = require('node:test');
+const assert = require('node:assert');
+const { loadEditor } = require('./editor-harness.js');
+
+function surfaceCells(edgeStyle) {
+    var editor = loadEditor();
+    editor.$('#cellCountInput').val(10).trigger('change');
+    editor.$('#edgeStyleSelect').val(edgeStyle).trigger('change');
+    editor.call('forceUpdate');
+    editor.runFrames();
+    return editor.call('generateSurfaceCells');
+}
+
+// Each edge starts where the one before it ends
+function assertEdgesJoin(cells) {
+    cells.forEach(cell => cell.forEach((edge, k) => {
+        var next = cell[(k + 1) % cell.length];
+        assert.deepStrictEqual([edge[edge.length - 2], edge[edge.length - 1]], [next[0], next[1]]);
+    }));
+}
+
+test('straight cells are split into an edge per side', () => {
+    var cells = surfaceCells(1);    // Straight
+    assert.strictEqual(cells.length, 10);
+    assert.ok(cells.every(cell => cell.length >= 3));
+    assertEdgesJoin(cells);
+});
+
+test('square cells keep their four corners', () => {
+    var cells = surfaceCells(3);    // Square
+    assert.ok(cells.every(cell => cell.length === 4));
+    assertEdgesJoin(cells);
+});
+
+test('circle cells are a single closed edge', () => {
+    var cells = surfaceCells(2);    // Circle
+    assert.ok(cells.every(cell => cell.length === 1 && cell[0].length > 8));
+    assertEdgesJoin(cells);
+});
@@ -0,0 +1,562 @@
+# Tests for ChunkedSVGPublisher driven by a fake event loop and fake sketches.
+
+import math
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import fake_adsk
+fake_adsk.install()
+
+import Voronoi
+
+
+class FakeCurve:
+    countTokens = 0
+
+    def __init__(self, curves):
+        FakeCurve.countTokens += 1
+        self.entityToken = 'curve{0}'.format(FakeCurve.countTokens)
+        self.isFixed = True
+        self.curves = curves
+
+    def deleteMe(self):
+        self.curves.items.remove(self)
+
+
+class FakePoint3D:
+    def __init__(self, x, y, z):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    @staticmethod
+    def create(x, y, z):
+        return FakePoint3D(x, y, z)
+
+    def distanceTo(self, other):
+        return math.hypot(self.x - other.x, self.y - other.y, self.z - other.z)
+
+
+class FakePoint2D:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    @staticmethod
+    def create(x, y):
+        return FakePoint2D(x, y)
+
+
+class FakeObjectCollection:
+    def __init__(self):
+        self.items = []
+
+    @staticmethod
+    def create():
+        return FakeObjectCollection()
+
+    def add(self, item):
+        self.items.append(item)
+
+
+Voronoi.adsk.core.Point3D = FakePoint3D
+Voronoi.adsk.core.Point2D = FakePoint2D
+Voronoi.adsk.core.ObjectCollection = FakeObjectCollection
+
+
+class FakeSketchPoint:
+    def __init__(self, geometry):
+        self.geometry = geometry
+
+
+# Adds lines or arcs (only their ends matter) to the sketch's curves.  Fails once
+# the sketch has failAt curves, if set.
+class FakeCurveAdder:
+    def __init__(self, sketchCurves):
+        self.sketchCurves = sketchCurves
+
+    def add(self, startPoint, endPoint):
+        if self.sketchCurves.failAt is not None and self.sketchCurves.count >= self.sketchCurves.failAt:
+            raise RuntimeError('Failed to add the curve')
+
+        curve = FakeCurve(self.sketchCurves)
+        curve.startSketchPoint = startPoint if isinstance(startPoint, FakeSketchPoint) else FakeSketchPoint(startPoint)
+        curve.endSketchPoint = endPoint if isinstance(endPoint, FakeSketchPoint) else FakeSketchPoint(endPoint)
+        self.sketchCurves.items.append(curve)
+        return curve
+
+    def addByTwoPoints(self, startPoint, endPoint):
+        return self.add(startPoint, endPoint)
+
+    def addByThreePoints(self, startPoint, midPoint, endPoint):
+        return self.add(startPoint, endPoint)
+
+
+# Adds fitted splines, open unless isClosed is set
+class FakeSplineAdder(FakeCurveAdder):
+    def add(self, fitPoints):
+        curve = super().add(fitPoints.items[0], fitPoints.items[-1])
+        curve.fitPoints = fitPoints.items
+        curve.isClosed = False
+        return curve
+
+
+class FakeSketchCurves:
+    def __init__(self):
+        self.items = []
+        self.failAt = None
+        self.sketchLines = FakeCurveAdder(self)
+        self.sketchArcs = FakeCurveAdder(self)
+        self.sketchFittedSplines = FakeSplineAdder(self)
+
+    @property
+    def count(self):
+        return len(self.items)
+
+    def item(self, index):
+        return self.items[index]
+
+
+# A sketch whose importSVG adds a curve per <path> of the SVG.  By default the
+# new curves are inserted at the start of the sketch's curves (not appended) and
+# failAfter makes the import fail once that many chunks have been imported,
+# after adding its curves.
+class FakeSketch:
+    def __init__(self, countExisting=0, insertAt=0, failAfter=None):
+        self.sketchCurves = FakeSketchCurves()
+        for _ in range(countExisting):
+            self.sketchCurves.items.append(FakeCurve(self.sketchCurves))
+        self.insertAt = insertAt
+        self.failAfter = failAfter
+        self.countImports = 0
+        self.isComputeDeferred = False
+        self.isDeleted = False
+
+    def importSVG(self, filePath, xPos, yPos, scale):
+        with open(filePath) as fp:
+            countPaths = fp.read().count('<path')
+        for _ in range(countPaths):
+            self.sketchCurves.items.insert(self.insertAt, FakeCurve(self.sketchCurves))
+        self.countImports += 1
+        return self.failAfter is None or self.countImports <= self.failAfter
+
+    def deleteMe(self):
+        self.isDeleted = True
+
+
+class FakeProgressDialog:
+    def __init__(self):
+        self.isCancelButtonShown = False
+        self.wasCancelled = False
+        self.progressValue = 0
+        self.isShowing = False
+
+    def show(self, title, message, minimum, maximum):
+        self.isShowing = True
+
+    def hide(self):
+        self.isShowing = False
+
+
+class FakeUI:
+    def __init__(self):
+        self.messages = []
+        self.progressDialog = FakeProgressDialog()
+
+    def createProgressDialog(self):
+        return self.progressDialog
+
+    def messageBox(self, message):
+        self.messages.append(message)
+
+
+# Queues the custom events fired by the publisher.  run() delivers them the way
+# PublishChunkEventHandler does (rolling back if a step raises) until none are
+# left or stopAfter steps.
+class FakeApp:
+    def __init__(self):
+        self.events = []
+
+    def fireCustomEvent(self, eventId):
+        self.events.append(eventId)
+
+    def run(self, publisher, stopAfter=None):
+        countSteps = 0
+        while self.events and (stopAfter is None or countSteps < stopAfter):
+            self.events.pop(0)
+            countSteps += 1
+            try:
+                if publisher.step():
+                    self.fireCustomEvent(publisher.eventId)
+            except Exception:
+                publisher.rollback()
+                publisher.ui.messageBox('Failed')
+        return countSteps
+
+
+def svgChunk(countPaths):
+    return '<svg>' + '<path d="M0 0L1 1"/>' * countPaths + '</svg>'
+
+
+class ChunkedSVGPublisherTests(unittest.TestCase):
+    def setUp(self):
+        self.app = FakeApp()
+        self.ui = FakeUI()
+
+    def publisher(self, parts, createSketch=None, onFinished=None):
+        publisher = Voronoi.ChunkedSVGPublisher(self.app, self.ui, 'publish', parts, 0, 0, createSketch, onFinished)
+        publisher.start()
+        return publisher
+
+    def test_publishes_every_chunk_and_unfixes_only_new_curves(self):
+        sketch = FakeSketch(countExisting=3)
+        existing = list(sketch.sketchCurves.items)
+        finished = []
+
+        publisher = self.publisher([Voronoi.PublishPart([svgChunk(2), svgChunk(4)], sketch, False)], onFinished=finished.append)
+        self.app.run(publisher)
+
+        self.assertTrue(publisher.isFinished)
+        self.assertFalse(publisher.wasCancelled)
+        self.assertEqual(finished, [publisher])
+        self.assertEqual(len(publisher.chunkTimes), 2)
+        self.assertFalse(sketch.isComputeDeferred)
+
+        added = [curve for curve in sketch.sketchCurves.items if curve not in existing]
+        self.assertEqual(len(added), 6)
+        self.assertEqual(publisher.parts[0].curveTokens, set(curve.entityToken for curve in added))
+        self.assertTrue(all(not curve.isFixed for curve in added))
+        self.assertTrue(all(curve.isFixed for curve in existing))
+
+    def test_cancel_removes_only_the_published_curves(self):
+        sketch = FakeSketch(countExisting=3)
+        existing = list(sketch.sketchCurves.items)
+
+        publisher = self.publisher([Voronoi.PublishPart([svgChunk(2), svgChunk(2), svgChunk(2)], sketch, False)])
+        self.app.run(publisher, stopAfter=1)
+        self.assertEqual(len(sketch.sketchCurves.items), 5)
+
+        self.ui.progressDialog.wasCancelled = True
+        self.app.run(publisher)
+
+        self.assertTrue(publisher.wasCancelled)
+        self.assertEqual(len(publisher.chunkTimes), 1)
+        self.assertEqual(sketch.sketchCurves.items, existing)
+        self.assertFalse(sketch.isComputeDeferred)
+        self.assertFalse(sketch.isDeleted)
+        self.assertFalse(self.ui.progressDialog.isShowing)
+
+    def test_failed_import_rolls_back_its_curves_too(self):
+        sketch = FakeSketch(countExisting=2, failAfter=1)
+        existing = list(sketch.sketchCurves.items)
+
+        publisher = self.publisher([Voronoi.PublishPart([svgChunk(3), svgChunk(3)], sketch, False)])
+        self.app.run(publisher)
+
+        self.assertTrue(publisher.wasCancelled)
+        self.assertEqual(sketch.sketchCurves.items, existing)
+        self.assertEqual(len(self.ui.messages), 1)
+
+    def test_cancel_deletes_the_sketches_created_for_the_publish(self):
+        created = []
+        def createSketch(partIndex):
+            created.append(FakeSketch())
+            return created[-1]
+
+        target = FakeSketch(countExisting=1)
+        parts = [Voronoi.PublishPart([svgChunk(2)], target, False),
+                 Voronoi.PublishPart([svgChunk(2), svgChunk(2)]),
+                 Voronoi.PublishPart([svgChunk(2)])]
+        publisher = self.publisher(parts, createSketch)
+
+        self.app.run(publisher, stopAfter=2)
+        self.ui.progressDialog.wasCancelled = True
+        self.app.run(publisher)
+
+        self.assertEqual(len(created), 1)   # The third part was never started
+        self.assertTrue(created[0].isDeleted)
+        self.assertFalse(target.isDeleted)
+        self.assertEqual(len(target.sketchCurves.items), 1)
+
+    def test_extrudes_exactly_the_published_curves(self):
+        created = []
+        def createSketch(partIndex):
+            created.append(FakeSketch(countExisting=1, insertAt=1))
+            return created[-1]
+
+        # The new curves go in ahead of and between the existing ones
+        target = FakeSketch(countExisting=4, insertAt=2)
+        existing = list(target.sketchCurves.items)
+        parts = [Voronoi.PublishPart([svgChunk(3), svgChunk(2)], target, False),
+                 Voronoi.PublishPart([svgChunk(2), svgChunk(1)])]
+        extruded = []
+        publisher = self.publisher(parts, createSketch, lambda publisher: extruded.append(Voronoi.publishedCurveTokens(publisher)))
+        self.app.run(publisher)
+
+        existing += created[0].sketchCurves.items[:1]
+        published = [curve for sketch in [target] + created for curve in sketch.sketchCurves.items if curve not in existing]
+        self.assertEqual(len(published), 8)
+        self.assertEqual(extruded, [set(curve.entityToken for curve in published)])
+
+
+# A square loop of three lines and an arc with its corner at x,y
+def arcLoop(x, y):
+    return {'start': [x, y], 'segments': [0, x + 1, y, 1, x + 1.5, y + 0.5, x + 1, y + 1, 0, x, y + 1, 0, x, y]}
+
+
+class ChunkedArcPublisherTests(unittest.TestCase):
+    def setUp(self):
+        self.app = FakeApp()
+        self.ui = FakeUI()
+
+    def publisher(self, parts, createSketch=None, onFinished=None):
+        publisher = Voronoi.ChunkedArcPublisher(self.app, self.ui, 'publish', parts, createSketch, onFinished)
+        publisher.start()
+        return publisher
+
+    def test_publishes_the_loops_a_chunk_at_a_time_into_each_sketch(self):
+        created = []
+        def createSketch(partIndex):
+            created.append(FakeSketch())
+            return created[-1]
+
+        loops = [arcLoop(x * 10, y * 10) for x in range(3) for y in range(2)]
+        loopParts = Voronoi.partitionArcLoops(loops, 3)
+        self.assertEqual(sorted(len(loopPart) for loopPart in loopParts), [3, 3])
+
+        target = FakeSketch()
+        parts = [Voronoi.PublishPart(Voronoi.splitCellsIntoChunks(loopParts[0], 2), target),
+                 Voronoi.PublishPart(Voronoi.splitCellsIntoChunks(loopParts[1], 2))]
+        extruded = []
+        publisher = self.publisher(parts, createSketch, lambda publisher: extruded.append(Voronoi.publishedCurveTokens(publisher)))
+        self.app.run(publisher)
+
+        self.assertTrue(publisher.isFinished)
+        self.assertFalse(publisher.wasCancelled)
+        self.assertEqual(len(publisher.chunkTimes), 4)
+        self.assertEqual((publisher.countLines, publisher.countArcs), (18, 6))
+        self.assertEqual(len(created), 1)
+
+        curves = target.sketchCurves.items + created[0].sketchCurves.items
+        self.assertEqual(len(curves), 24)
+        self.assertEqual(extruded, [set(curve.entityToken for curve in curves)])
+
+        # Each loop closes on its first point
+        firstCurve, lastCurve = target.sketchCurves.items[0], target.sketchCurves.items[3]
+        self.assertIs(lastCurve.endSketchPoint, firstCurve.startSketchPoint)
+
+    def test_failure_deletes_the_new_sketch(self):
+        target = FakeSketch()
+        target.sketchCurves.failAt = 6
+        publisher = self.publisher([Voronoi.PublishPart([[arcLoop(0, 0)], [arcLoop(10, 0)]], target)])
+        self.app.run(publisher)
+
+        self.assertTrue(publisher.wasCancelled)
+        self.assertTrue(target.isDeleted)
+        self.assertEqual(len(self.ui.messages), 1)
+        self.assertFalse(self.ui.progressDialog.isShowing)
+
+
+# A face whose parameters (u, v) are at (u, v, u + v) in model space
+class FakeFaceEvaluator:
+    def getPointsAtParameters(self, params):
+        return True, [FakePoint3D(uv.x, uv.y, uv.x + uv.y) for uv in params]
+
+
+class FakeFace:
+    def __init__(self):
+        self.evaluator = FakeFaceEvaluator()
+
+
+class AddSurfaceCellsTests(unittest.TestCase):
+    mapping = {'uMin': 0, 'vMin': 0, 'uScale': 1, 'vScale': 1}
+
+    def test_splits_cells_at_their_corners(self):
+        # A triangle: a line, a curved edge and a line back to the start
+        triangle = [[0, 0, 1, 0], [1, 0, 1.2, 0.5, 1, 1], [1, 1, 0, 0]]
+        sketch = FakeSketch()
+        self.assertTrue(Voronoi.addSurfaceCells(sketch, FakeFace(), self.mapping, [triangle]))
+
+        line0, spline, line1 = sketch.sketchCurves.items
+        self.assertEqual(len(spline.fitPoints), 3)
+        self.assertIs(spline.startSketchPoint, line0.endSketchPoint)
+        self.assertIs(line1.startSketchPoint, spline.endSketchPoint)
+        self.assertIs(line1.endSketchPoint, line0.startSketchPoint)
+        self.assertEqual(spline.fitPoints[1].z, 1.7)
+
+    def test_a_smooth_cell_is_one_closed_spline(self):
+        circle = [[1, 0, 0, 1, -1, 0, 0, -1, 1, 0]]
+        sketch = FakeSketch()
+        self.assertTrue(Voronoi.addSurfaceCells(sketch, FakeFace(), self.mapping, [circle]))
+
+        spline, = sketch.sketchCurves.items
+        self.assertTrue(spline.isClosed)
+        self.assertEqual(len(spline.fitPoints), 4)
+
+    def test_publishes_the_cells_a_chunk_at_a_time(self):
+        app = FakeApp()
+        ui = FakeUI()
+        cells = [[[x, 0, x + 1, 0], [x + 1, 0, x, 1], [x, 1, x, 0]] for x in range(5)]
+        sketch = FakeSketch()
+        publisher = Voronoi.ChunkedSurfacePublisher(app, ui, 'publish', [Voronoi.PublishPart(Voronoi.splitCellsIntoChunks(cells, 2), sketch)],
+                                                    FakeFace(), self.mapping)
+        publisher.start()
+        app.run(publisher)
+
+        self.assertTrue(publisher.isFinished)
+        self.assertEqual(len(publisher.chunkTimes), 3)
+        self.assertEqual(len(sketch.sketchCurves.items), 15)
+
+
+class FakeMatrix:
+    def __init__(self, origin):
+        self.origin = origin
+
+    def isEqualTo(self, other):
+        return self.origin == other.origin
+
+
+# A sketch added on a plane.  Its transform starts out as the plane's own and
+# can't be set unless isTransformSettable.
+class FakePlaneSketch(FakeSketch):
+    def __init__(self, plane, isTransformSettable):
+        super().__init__()
+        self.name = ''
+        self.referencePlane = plane
+        self.isTransformSettable = isTransformSettable
+        self._transform = FakeMatrix(plane)
+
+    @property
+    def transform(self):
+        return self._transform
+
+    @transform.setter
+    def transform(self, value):
+        if not self.isTransformSettable:
+            raise RuntimeError('The transform is read only')
+        self._transform = value
+
+
+class FakeSketches:
+    def __init__(self, isTransformSettable=True):
+        self.isTransformSettable = isTransformSettable
+        self.added = []
+
+    def add(self, plane):
+        self.added.append(FakePlaneSketch(plane, self.isTransformSettable))
+        return self.added[-1]
+
+    @property
+    def count(self):
+        return len(self.added)
+
+    def item(self, index):
+        return self.added[index]
+
+
+class FakeDXFImportOptions:
+    def __init__(self, filePath, planarEntity):
+        self.planarEntity = planarEntity
+        self.isSingleSketchResult = False
+
+
+# Imports a DXF as a new sketch on the options' plane
+class FakeImportManager:
+    def createDXF2DImportOptions(self, filePath, planarEntity):
+        return FakeDXFImportOptions(filePath, planarEntity)
+
+    def importToTarget(self, options, rootComp):
+        rootComp.sketches.add(options.planarEntity)
+        return True
+
+
+class FakeImportApp:
+    def __init__(self):
+        self.importManager = FakeImportManager()
+
+
+class FakeComponent:
+    def __init__(self, sketches):
+        self.sketches = sketches
+
+
+class CreateSketchLikeTests(unittest.TestCase):
+    def sourceSketch(self, origin):
+        sketch = FakeSketch()
+        sketch.name = 'Voronoi'
+        sketch.referencePlane = 'plane'
+        sketch.transform = FakeMatrix(origin)
+        return sketch
+
+    def test_matches_the_source_sketch_transform(self):
+        sketches = FakeSketches()
+        sketch = Voronoi.createSketchLike(FakeComponent(sketches), self.sourceSketch('face origin'), 'Part 2')
+
+        self.assertIs(sketch, sketches.added[0])
+        self.assertEqual(sketch.name, 'Part 2')
+        self.assertTrue(sketch.transform.isEqualTo(FakeMatrix('face origin')))
+
+    def test_fails_and_deletes_the_sketch_if_the_transform_differs(self):
+        sketches = FakeSketches(isTransformSettable=False)
+        with self.assertRaises(RuntimeError):
+            Voronoi.createSketchLike(FakeComponent(sketches), self.sourceSketch('face origin'), 'Part 2')
+        self.assertTrue(sketches.added[0].isDeleted)
+
+    def test_lines_up_the_imported_dxf_with_the_source_sketch(self):
+        sketches = FakeSketches()
+        sketch = Voronoi.importDXFToTarget(FakeImportApp(), FakeComponent(sketches), 'cells.dxf', 'plane', self.sourceSketch('face origin'))
+
+        self.assertIs(sketch, sketches.added[0])
+        self.assertTrue(sketch.transform.isEqualTo(FakeMatrix('face origin')))
+
+    def test_deletes_an_imported_dxf_that_cant_be_lined_up(self):
+        sketches = FakeSketches(isTransformSettable=False)
+        sketch = Voronoi.importDXFToTarget(FakeImportApp(), FakeComponent(sketches), 'cells.dxf', 'plane', self.sourceSketch('face origin'))
+
+        self.assertIsNone(sketch)
+        self.assertTrue(sketches.added[0].isDeleted)
+
+    def test_lines_up_the_arcs_sketch_and_its_parts_with_the_source_sketch(self):
+        sketches = FakeSketches()
+        rootComp = FakeComponent(sketches)
+        with mock.patch.object(Voronoi, '_selectedSketch', self.sourceSketch('face origin')):
+            sketch = Voronoi.createTargetSketch(rootComp)
+        part = Voronoi.createSketchLike(rootComp, sketch, 'Part 2')
+
+        self.assertIs(sketch, sketches.added[0])
+        self.assertEqual(sketch.name, 'Voronoi - Voronoi')
+        self.assertTrue(sketch.transform.isEqualTo(FakeMatrix('face origin')))
+        self.assertTrue(part.transform.isEqualTo(FakeMatrix('face origin')))
+
+    def test_deletes_an_arcs_sketch_that_cant_be_lined_up(self):
+        sketches = FakeSketches(isTransformSettable=False)
+        ui = FakeUI()
+        with mock.patch.object(Voronoi, '_profileSketch', self.sourceSketch('face origin')), \
+             mock.patch.object(Voronoi, '_ui', ui):
+            sketch = Voronoi.createTargetSketch(FakeComponent(sketches))
+
+        self.assertIsNone(sketch)
+        self.assertTrue(sketches.added[0].isDeleted)
+        self.assertEqual(len(ui.messages), 1)
+
+    def test_adds_the_arcs_sketch_on_the_face_without_a_source_sketch(self):
+        sketches = FakeSketches(isTransformSettable=False)
+        with mock.patch.object(Voronoi, '_selectedFace', 'face'):
+            sketch = Voronoi.createTargetSketch(FakeComponent(sketches))
+
+        self.assertTrue(sketch.transform.isEqualTo(FakeMatrix('face')))
+        self.assertFalse(sketch.isDeleted)
+
+    def test_keeps_a_matching_sketch_as_is(self):
+        sketches = FakeSketches(isTransformSettable=False)
+        sketch = Voronoi.createSketchLike(FakeComponent(sketches), self.sourceSketch('plane'), 'Part 2')
+        self.assertFalse(sketch.isDeleted)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+// Tests for tile mode.  Run with:
+//     node --test tests/
+
+const test = require('node:test');
+const assert = require('node:assert');
+const { loadEditor } = require('./editor-harness.js');
+
+// Area of the drawn cells, counting each placed tile
+function drawnArea(paper, item) {
+    if (item instanceof paper.SymbolItem) {
+        return drawnArea(paper, item.definition.item);
+    }
+    if (item.className === 'Group' || item.className === 'Layer') {
+        return item.children.reduce((sum, child) => sum + drawnArea(paper, child), 0);
+    }
+    return Math.abs(item.area);
+}
+
+test('the tiles cover the page up to its edges', () => {
+    var editor = loadEditor();
+    editor.$('#tileModeCheckbox').prop('checked', true).trigger('change');
+    editor.$('#cellCountInput').val(20).trigger('change');
+    editor.$('#cellGapRange').val(0).trigger('change');
+    editor.$('#edgeStyleSelect').val(1).trigger('change');    // Straight
+    editor.call('forceUpdate');
+    editor.runFrames();
+
+    // The tiles start before the page's top left corner
+    var clipBounds = editor.call('tileClipPath').bounds;
+    var offsets = editor.call('tileOffsets', editor.call('tileClipPath'), editor.call('tileCellBounds'));
+    assert.ok(offsets.some(offset => offset[0] < clipBounds.x && offset[1] < clipBounds.y));
+
+    // Nothing missing along the edges and nothing drawn twice
+    var coverage = drawnArea(editor.paper, editor.get('_layerVoronoi')) / (clipBounds.width * clipBounds.height);
+    assert.ok(coverage > 0.99 && coverage < 1.001, 'cells cover ' + coverage + ' of the page');
+});